@@ -0,0 +1,93 @@
+"""Measure how hedging changes tail latency against a stand-in provider.
+
+The stand-in answers most calls in about ``--fast-ms`` and a ``--slow-rate``
+share of them in ``--slow-ms``, independently for each request, like a
+provider with occasional stalls. The same calls run once without hedging
+and once through ``Hedger`` at ``--percentile`` with ``--budget``. The script
+fails if hedged p99 exceeds ``--max-p99-ms``.
+
+    python benchmarks/hedging.py --max-p99-ms 150
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aim.models.llm.hedging import HedgeBudget, Hedger, HedgingStats, LatencyTracker
+
+
+class StandInProvider:
+    def __init__(self, fast_ms: float, slow_ms: float, slow_rate: float, seed: int):
+        self.fast = fast_ms / 1000
+        self.slow = slow_ms / 1000
+        self.slow_rate = slow_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self) -> str:
+        with self._lock:
+            self.requests += 1
+            slow = self._random.random() < self.slow_rate
+            jitter = self._random.uniform(0.8, 1.2)
+        time.sleep((self.slow if slow else self.fast) * jitter)
+        return "ok"
+
+
+def run(args, percentile) -> dict:
+    provider = StandInProvider(args.fast_ms, args.slow_ms, args.slow_rate, args.seed)
+    stats = HedgingStats()
+    hedger = Hedger(percentile, LatencyTracker(), HedgeBudget(args.budget), stats)
+
+    def timed_call(_):
+        start = time.monotonic()
+        hedger.call(provider.call, provider.call)
+        return time.monotonic() - start
+
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        latencies = sorted(pool.map(timed_call, range(args.calls)))
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    return {
+        "p50": pct(50),
+        "p99": pct(99),
+        "max": latencies[-1] * 1000,
+        "extra_requests": provider.requests / args.calls - 1,
+        "hedged": stats.drain()["hedged"],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--fast-ms", type=float, default=20.0)
+    parser.add_argument("--slow-ms", type=float, default=500.0)
+    parser.add_argument("--slow-rate", type=float, default=0.02)
+    parser.add_argument("--percentile", type=float, default=95.0)
+    parser.add_argument("--budget", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    print(f"{'':<10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'extra':>7} {'hedged':>7}")
+    results = {}
+    for label, percentile in (("unhedged", None), ("hedged", args.percentile)):
+        r = results[label] = run(args, percentile)
+        print(
+            f"{label:<10} {r['p50']:8.1f} {r['p99']:8.1f} {r['max']:8.1f} "
+            f"{r['extra_requests']:7.1%} {r['hedged']:7d}"
+        )
+
+    if args.max_p99_ms is not None and results["hedged"]["p99"] > args.max_p99_ms:
+        print(f"hedged p99 over budget ({args.max_p99_ms:.0f} ms)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Guard against import-time regressions in ``aim``.
+
+Imports each module in a fresh interpreter, fails if any provider-, checker-
+or parser-specific dependency gets loaded eagerly, and fails if the best of
+``--repeat`` runs exceeds ``--budget-ms``.
+
+    python benchmarks/import_time.py --budget-ms 1500
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+MODULES = ["aim", "aim.metrics", "aim.cli_entrypoint", "aim.pytest_plugin"]
+
+# Only needed once a matching provider, data source or command is used.
+# (requests isn't listed: langchain_core itself imports it.)
+LAZY_DEPENDENCIES = [
+    "sklearn",
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_voyageai",
+    "langgraph",
+    "langchain_mcp_adapters",
+    "mcp",
+    "pypdf",
+    "bs4",
+    "httpx",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({lazy!r}))
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+
+def probe(module: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, lazy=LAZY_DEPENDENCIES)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        runs = [probe(module) for _ in range(args.repeat)]
+        best_ms = min(run["seconds"] for run in runs) * 1000
+        loaded = runs[0]["loaded"]
+
+        status = "ok"
+        if loaded:
+            status = f"eagerly imports {', '.join(loaded)}"
+            failed = True
+        elif best_ms > args.budget_ms:
+            status = f"over budget ({args.budget_ms:.0f} ms)"
+            failed = True
+        print(f"{module:<20} {best_ms:8.1f} ms  {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
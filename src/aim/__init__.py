@@ -1,3 +1,10 @@
-from .metrics import Metrics
-
 __all__ = ["Metrics"]
+
+
+def __getattr__(name):
+    # Imported on first access so the CLI, the pytest plugin and helpers such
+    # as aim.state don't pay for the LLM client stack.
+    if name == "Metrics":
+        from .metrics import Metrics
+        return Metrics
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
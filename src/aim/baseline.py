@@ -0,0 +1,98 @@
+import json
+import math
+from pathlib import Path
+from statistics import NormalDist
+from typing import Dict, Tuple, Union
+
+from .merge import suggested_threshold
+
+
+class RunningStats:
+    """Welford's online mean/variance."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self._m2 / (self.count - 1))
+
+    def ci_half_width(self, confidence: float) -> float:
+        if self.count < 2:
+            return math.inf
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        return z * self.std / math.sqrt(self.count)
+
+
+class BaselineTracker:
+    """Follows baseline scores as runs append them to the reference files.
+
+    An assertion has converged once it has at least ``min_runs`` new scores,
+    the ``confidence`` interval around its mean score is within
+    ``tolerance``, and its suggested threshold moved by no more than
+    ``tolerance`` in the last run. The threshold is computed from every
+    stored score, like the ``suggested_threshold`` written to the file.
+    """
+
+    def __init__(
+        self,
+        reference_dir: Union[str, Path],
+        confidence: float = 0.95,
+        tolerance: float = 0.01,
+        min_runs: int = 3,
+    ):
+        self.reference_dir = Path(reference_dir)
+        self.confidence = confidence
+        self.tolerance = tolerance
+        self.min_runs = max(min_runs, 2)
+        self.stats: Dict[Tuple[str, str], RunningStats] = {}
+        self._threshold_delta: Dict[Tuple[str, str], float] = {}
+        self._seen = {key: len(scores) for key, scores in self._read_scores()}
+
+    def update(self):
+        for key, scores in self._read_scores():
+            seen = self._seen.get(key, 0)
+            new_scores = scores[seen:]
+            if not new_scores:
+                continue
+            self._seen[key] = len(scores)
+
+            stats = self.stats.setdefault(key, RunningStats())
+            for score in new_scores:
+                stats.add(score)
+            if seen:
+                self._threshold_delta[key] = abs(
+                    suggested_threshold(scores) - suggested_threshold(scores[:seen])
+                )
+
+    def converged(self) -> bool:
+        if not self.stats:
+            return False
+        return all(self._converged(key, stats) for key, stats in self.stats.items())
+
+    def unconverged(self):
+        return [key for key, stats in self.stats.items() if not self._converged(key, stats)]
+
+    def _converged(self, key, stats: RunningStats) -> bool:
+        return (
+            stats.count >= self.min_runs
+            and stats.ci_half_width(self.confidence) <= self.tolerance
+            and self._threshold_delta.get(key, math.inf) <= self.tolerance
+        )
+
+    def _read_scores(self):
+        for ref_path in sorted(self.reference_dir.glob("*.json")):
+            with ref_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            for assertion_id, entry in data.get("semantic_similarity", {}).items():
+                yield (ref_path.stem, assertion_id), entry.get("scores", [])
@@ -0,0 +1,318 @@
+"""Batch-API execution of REPORT mode evaluations.
+
+With ``AIM_BATCH=1`` (``aim report --batch``), ``Metrics.criteria_check`` and
+``Metrics.claim_check`` queue their work in a per-model ``BatchRunner``
+instead of calling the LLM. When the process exits, the runner submits the
+criteria and claim-extraction requests as one provider batch, then the claim
+verifications as a second one, and records the scores in the usual report.
+
+Jobs are held in memory until the runner submits them; from then on every
+step is written to a journal under ``aim_data/batch/`` before it happens,
+so an interrupted run can be picked up with ``aim batch-resume``.
+Requests are split into batches that fit the provider's limits. Each batch
+is journaled as "submitting", with an idempotency key, before it is sent;
+on resume, a batch left in that state is looked up at the provider by its
+key and only submitted again if it never arrived. Custom ids carry a
+per-journal prefix, and a batch whose results lack it (another process's
+batch that looked the same) is submitted again.
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .claim_checking.claim_normalization import dedupe_claims, normalize_claim
+from .files import save_json
+from .history import HistoryStore, is_history_enabled
+from .merge import add_report_score
+from .models.llm.batch_clients import batch_client_for
+from .models.llm.llm_models import LLMModel
+from .state import ExecutionContext, current_context
+
+
+def is_batch_enabled() -> bool:
+    return os.getenv("AIM_BATCH") == "1"
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        journal_path: Union[str, Path],
+        llm_service,
+        journal: Optional[Dict] = None,
+        report_file: Optional[str] = None,
+        context: Optional[ExecutionContext] = None,
+    ):
+        self.journal_path = Path(journal_path)
+        self.llm_service = llm_service
+        self.poll_interval = float(os.getenv("AIM_BATCH_POLL_INTERVAL", "30"))
+        context = context or current_context()
+        self.journal = journal or {
+            "model": llm_service.model.value,
+            "report_file": report_file or context.report_file,
+            "history_file": context.history_file,
+            "run_id": context.run_id,
+            # Marks this journal's requests among other processes' batches.
+            "prefix": uuid.uuid4().hex[:12],
+            "phase": "collect",
+            "jobs": [],
+            "batches": {},
+            "outputs": {},
+        }
+        self._lock = threading.Lock()
+        self._batch_client = None
+
+    @classmethod
+    def resume(cls, journal_path: Union[str, Path]) -> "BatchRunner":
+        from .models.llm.llm_service import LLMService
+
+        with Path(journal_path).open("r", encoding="utf-8") as f:
+            journal = json.load(f)
+        model = next(m for m in LLMModel if m.value == journal["model"])
+        llm_service = LLMService(model.api_key, model.value)
+        return cls(journal_path, llm_service, journal)
+
+    @property
+    def done(self) -> bool:
+        return self.journal["phase"] == "done"
+
+    def add_criteria(self, content: str, criteria: List[str], reference_id: str = ""):
+        self._add_job({"type": "criteria", "content": content, "criteria": criteria, "reference_id": reference_id})
+
+    def add_claims(self, content: str, chunks: List, reference_id: str = ""):
+        self._add_job({"type": "claims", "content": content, "chunks": chunks, "reference_id": reference_id})
+
+    def _add_job(self, job: Dict):
+        with self._lock:
+            if self.journal["phase"] != "collect":
+                raise RuntimeError("Batch has already been submitted")
+            self.journal["jobs"].append(job)
+
+    def run(self):
+        with self._lock:
+            try:
+                if self.journal["phase"] == "collect":
+                    self._submit("extract", self._extract_requests())
+                if self.journal["phase"] == "extract":
+                    self._collect("extract", self._extract_requests)
+                    self._submit("verify", self._verify_requests())
+                if self.journal["phase"] == "verify":
+                    self._collect("verify", self._verify_requests)
+                    self.journal["phase"] = "score"
+                    self._save()
+                if self.journal["phase"] == "score":
+                    self._score()
+                    self.journal["phase"] = "done"
+                    self._save()
+            finally:
+                if self._batch_client is not None:
+                    self._batch_client.close()
+                    self._batch_client = None
+
+    def _submit(self, phase: str, requests):
+        if not requests:
+            self.journal["phase"] = "score" if phase == "verify" else "extract"
+            self.journal["outputs"].setdefault(phase, {})
+            self._save()
+            return
+
+        client = self._client()
+        parts = self.journal["batches"].get(phase)
+        if parts is None:
+            parts = self.journal["batches"][phase] = [
+                {"key": uuid.uuid4().hex, "start": start, "end": end, "batch_id": None}
+                for start, end in client.split(requests)
+            ]
+            self._save()
+
+        for part in parts:
+            if not part["batch_id"]:
+                self._submit_part(client, phase, part, requests)
+
+        self.journal["phase"] = phase
+        self._save()
+
+    def _submit_part(self, client, phase: str, part: Dict, requests):
+        if part.get("submitted_at"):
+            # An earlier attempt stopped after sending; it may have arrived.
+            part["batch_id"] = client.find(part["key"], part["submitted_at"], part["end"] - part["start"])
+        if not part["batch_id"]:
+            part["submitted_at"] = time.time()
+            self._save()
+            part["batch_id"] = client.submit(requests[part["start"]:part["end"]], part["key"])
+            print(f"Submitted {part['end'] - part['start']} {phase} requests as batch {part['batch_id']}")
+        self._save()
+
+    def _collect(self, phase: str, build_requests):
+        if phase in self.journal["outputs"]:
+            return
+        client = self._client()
+        prefix = self.journal["prefix"] + "-"
+
+        task_for = {"c": "evaluate_criterion", "e": "extract_claims", "v": "verify_claims"}
+        outputs = {}
+        for part in self.journal["batches"][phase]:
+            while True:
+                while not client.is_done(part["batch_id"]):
+                    time.sleep(self.poll_interval)
+                results = client.results(part["batch_id"])
+                if all(custom_id.startswith(prefix) for custom_id in results):
+                    break
+                # find() matched a look-alike batch from another process.
+                print(f"Batch {part['batch_id']} holds other requests; submitting {phase} requests again")
+                part["batch_id"] = None
+                part.pop("submitted_at", None)
+                self._submit_part(client, phase, part, build_requests())
+            for custom_id, tool_args in results.items():
+                local_id = custom_id[len(prefix):]
+                outputs[local_id] = self.llm_service.parse_batch_result(task_for[local_id[0]], tool_args)
+        self.journal["outputs"][phase] = outputs
+        self._save()
+
+    def _extract_requests(self):
+        requests = []
+        for j, job in enumerate(self.journal["jobs"]):
+            if job["type"] == "criteria":
+                for k, criterion in enumerate(job["criteria"]):
+                    requests.append(self.llm_service.batch_request(
+                        self._custom_id(f"c{j}-{k}"), "evaluate_criterion",
+                        criterion=criterion, content=job["content"],
+                    ))
+            else:
+                requests.append(self.llm_service.batch_request(
+                    self._custom_id(f"e{j}"), "extract_claims", content=job["content"]
+                ))
+        return requests
+
+    def _verify_requests(self):
+        # All chunks are verified at once rather than stopping at the first
+        # supporting chunk as ClaimChecker does; batch calls are cheap and a
+        # claim is valid if any chunk supports it, so the verdicts match.
+        requests = []
+        for j, job in enumerate(self.journal["jobs"]):
+            if job["type"] != "claims":
+                continue
+            unique_claims, _ = dedupe_claims(self._claims(j))
+            if not unique_claims:
+                continue
+            pending = [{"claim": claim, "validity": False} for claim in unique_claims]
+            for n, chunk in enumerate(job["chunks"]):
+                requests.append(self.llm_service.batch_request(
+                    self._custom_id(f"v{j}-{n}"), "verify_claims", claims=pending, content=chunk
+                ))
+        return requests
+
+    def _custom_id(self, local_id: str) -> str:
+        return f"{self.journal['prefix']}-{local_id}"
+
+    def _claims(self, j: int) -> List[str]:
+        claims = self.journal["outputs"]["extract"].get(f"e{j}")
+        return claims if isinstance(claims, list) else []
+
+    def _score(self):
+        outputs = self.journal["outputs"]
+        report_file = self.journal["report_file"]
+
+        for j, job in enumerate(self.journal["jobs"]):
+            if job["type"] == "criteria":
+                results = [bool(outputs["extract"].get(f"c{j}-{k}")) for k in range(len(job["criteria"]))]
+                score = len([result for result in results if result]) / len(job["criteria"]) * 100
+                job["result"] = {
+                    "score": score,
+                    "content": job["content"],
+                    "criteria": [
+                        {"criterion": criterion, "result": result}
+                        for criterion, result in zip(job["criteria"], results)
+                    ],
+                }
+                add_report_score(report_file, "criteria_check", score)
+                self._record_history(job, "criteria_check", score)
+                for criterion in job["result"]["criteria"]:
+                    self._record_history(
+                        job, "criterion", 100.0 if criterion["result"] else 0.0, bool(criterion["result"]),
+                        assertion=criterion["criterion"],
+                    )
+                continue
+
+            claims = self._claims(j)
+            if not claims:
+                continue
+            supported = set()
+            for n in range(len(job["chunks"])):
+                for verdict in outputs.get("verify", {}).get(f"v{j}-{n}") or []:
+                    if verdict.get("validity"):
+                        supported.add(normalize_claim(verdict["claim"]))
+
+            claim_results = [
+                {"claim": claim, "validity": normalize_claim(claim) in supported}
+                for claim in claims
+            ]
+            score = len([claim for claim in claim_results if claim["validity"]]) / len(claims) * 100
+            job["result"] = {"total_score": score, "content": job["content"], "claims": claim_results}
+            add_report_score(report_file, "claim_check", score)
+            self._record_history(job, "claim_check", score)
+
+    def _record_history(
+        self, job: Dict, metric: str, score: float, passed: Optional[bool] = None, assertion: Optional[str] = None
+    ):
+        if not is_history_enabled():
+            return
+        history_file = self.journal["history_file"]
+        try:
+            HistoryStore.open(history_file).record(
+                self.journal["run_id"], metric, score, passed, reference_id=job.get("reference_id", ""),
+                assertion=assertion, mode="report",
+            )
+        except sqlite3.Error as e:
+            print(f"Failed to record {metric} in {history_file}: {e}")
+
+    def _client(self):
+        if self._batch_client is None:
+            self._batch_client = batch_client_for(self.llm_service.model, self.llm_service.api_key)
+        return self._batch_client
+
+    def _save(self):
+        save_json(self.journal_path, self.journal, durable=True)
+
+
+_runners: Dict[str, BatchRunner] = {}
+_runners_lock = threading.Lock()
+
+
+def batch_runner_for(llm_service, context: Optional[ExecutionContext] = None) -> BatchRunner:
+    """The process-wide runner collecting requests for ``llm_service``'s model
+    under ``context`` (the current execution context by default)."""
+    context = context or current_context()
+    model = llm_service.model.value
+    suffix = f"{context.timestamp}.{context.shard}" if context.shard else context.timestamp
+    journal_path = str(Path(context.batch_dir) / f"batch_{suffix}_{model}.json")
+    with _runners_lock:
+        if not _runners:
+            atexit.register(flush_batches)
+        if journal_path not in _runners:
+            _runners[journal_path] = BatchRunner(journal_path, llm_service, report_file=context.report_file, context=context)
+        return _runners[journal_path]
+
+
+def flush_batches():
+    with _runners_lock:
+        runners = list(_runners.values())
+        _runners.clear()
+    for runner in runners:
+        if runner.journal["jobs"] and not runner.done:
+            runner.run()
+
+
+def resume_batches(journal_paths: Optional[List[Union[str, Path]]] = None):
+    if not journal_paths:
+        journal_paths = sorted(Path(current_context().batch_dir).glob("batch_*.json"))
+    for journal_path in journal_paths:
+        runner = BatchRunner.resume(journal_path)
+        if not runner.done:
+            print(f"Resuming {journal_path} ({runner.journal['phase']})...")
+            runner.run()
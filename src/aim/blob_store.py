@@ -0,0 +1,126 @@
+"""Content-addressed, compressed storage for long texts in ``aim_data/``.
+
+Failure entries keep only a reference like ``{"$blob": "<sha256>"}`` for each
+long string (candidates, references, judged content), and the text itself
+is written once to ``<blob_dir>/<sha256[:2]>/<sha256>.z``. A text repeated
+across thousands of failures and runs costs one compressed file.
+
+``aim gc`` removes blobs that no file under ``aim_data/`` refers to any more.
+"""
+import json
+import os
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from .cache import content_hash
+from .files import PathLike, SharedPerPath, write_atomic
+
+BLOB_KEY = "$blob"
+# Shorter strings cost less inline than as a separate file.
+MIN_BLOB_CHARS = 256
+
+_BLOB_REF = re.compile(r'"\$blob":\s*"([0-9a-f]{64})"')
+
+
+class BlobStore(SharedPerPath):
+    def __init__(self, root: PathLike):
+        self.root = Path(root)
+
+    def put(self, text: str) -> str:
+        digest = content_hash(text)
+        path = self._path(digest)
+        try:
+            # Reusing a blob makes it young again, so a concurrent ``aim gc``
+            # keeps it until the new reference is written.
+            os.utime(path)
+            return digest
+        except FileNotFoundError:
+            pass
+
+        compressed = zlib.compress(text.encode("utf-8"))
+        write_atomic(path, lambda f: f.write(compressed))
+        return digest
+
+    def get(self, digest: str) -> str:
+        with self._path(digest).open("rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    def pack(self, value: Any) -> Any:
+        """Replace every long string in ``value`` with a blob reference."""
+        if isinstance(value, str):
+            return {BLOB_KEY: self.put(value)} if len(value) >= MIN_BLOB_CHARS else value
+        if isinstance(value, dict):
+            return {key: self.pack(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.pack(item) for item in value]
+        return value
+
+    def unpack(self, value: Any) -> Any:
+        """Inverse of ``pack``."""
+        if isinstance(value, dict):
+            if set(value) == {BLOB_KEY}:
+                return self.get(value[BLOB_KEY])
+            return {key: self.unpack(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.unpack(item) for item in value]
+        return value
+
+    def gc(self, roots: Iterable[PathLike], grace_seconds: float = 3600, dry_run: bool = False) -> Dict:
+        """Delete blobs not referenced by any JSON/JSONL file under ``roots``.
+
+        Blobs younger than ``grace_seconds`` are kept so a run that is still
+        writing its failures doesn't lose them.
+        """
+        referenced = set()
+        for path in _json_files(roots):
+            with path.open("r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    referenced.update(_BLOB_REF.findall(line))
+
+        cutoff = time.time() - grace_seconds
+        stats = {"referenced": len(referenced), "kept": 0, "removed": 0, "freed_bytes": 0}
+        for path in self.root.glob("*/*.z"):
+            stat = path.stat()
+            if path.stem in referenced or stat.st_mtime > cutoff:
+                stats["kept"] += 1
+                continue
+            stats["removed"] += 1
+            stats["freed_bytes"] += stat.st_size
+            if not dry_run:
+                path.unlink()
+        return stats
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.z"
+
+
+def append_jsonl(path: PathLike, entry: Dict):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def read_failures(path: PathLike, store: Optional[BlobStore] = None) -> Iterator[Dict]:
+    """Failure entries from a ``.jsonl`` (or legacy ``.json``) failures file,
+    with blob references resolved when ``store`` is given."""
+    path = Path(path)
+    with path.open("r", encoding="utf-8") as f:
+        if path.suffix == ".json":
+            entries = json.load(f).get("failures", [])
+        else:
+            entries = (json.loads(line) for line in f if line.strip())
+        for entry in entries:
+            yield store.unpack(entry) if store else entry
+
+
+def _json_files(roots: Iterable[PathLike]) -> Iterator[Path]:
+    for root in map(Path, roots):
+        if root.is_file():
+            yield root
+        elif root.is_dir():
+            for pattern in ("*.json", "*.jsonl"):
+                yield from root.rglob(pattern)
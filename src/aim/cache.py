@@ -0,0 +1,64 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Union
+
+from .files import SharedPerPath
+
+
+def content_hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SqliteCache(SharedPerPath):
+    """Persistent key/value cache in a SQLite file.
+
+    Instances are shared per path within a process (use ``SqliteCache.open``).
+    A write only touches its own rows, so its cost doesn't grow with the
+    cache, and WAL mode lets concurrent processes share the file.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str, default=None):
+        try:
+            row = self.connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Failed to read {self.path}: {e}")
+            return default
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any):
+        self.update({key: value})
+
+    def update(self, entries: Dict[str, Any]):
+        if not entries:
+            return
+        try:
+            with self.connection as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?)",
+                    [(key, json.dumps(value, ensure_ascii=False)) for key, value in entries.items()],
+                )
+        except sqlite3.Error as e:
+            print(f"Failed to update {self.path}: {e}")
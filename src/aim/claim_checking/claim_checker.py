@@ -1,5 +1,9 @@
+import json
 from abc import ABC, abstractmethod
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
+
+from ..cache import SqliteCache, content_hash
+from .claim_normalization import normalize_claim
 
 
 class ClaimChecker(ABC):
@@ -14,21 +18,81 @@ class ClaimChecker(ABC):
         pass
     
     def check_claims(
-        self, claims: List[Dict[str, str]], content_chunks: List
+        self,
+        claims: List[Dict[str, str]],
+        content_chunks: List,
+        verdict_cache: Optional[SqliteCache] = None,
+        max_votes: Optional[int] = None,
     ) -> List[Dict[str, Union[str, bool]]]:
+        """Verify claims chunk by chunk until each one is supported.
+
+        With a ``verdict_cache``, (claim, chunk) pairs already judged by the
+        same model and ``max_votes`` are answered from the cache and only
+        new or edited pairs reach the LLM. Claims the model leaves out of its answer are asked
+        again once; if still missing they count as unsupported for this
+        chunk but aren't cached.
+        """
         all_claims = [{"claim": claim, "validity": False} for claim in claims]
+        model = self.llm_service.model.value
+        votes = max_votes or self.llm_service.max_votes
 
         for chunk in content_chunks:
             pending = [claim for claim in all_claims if not claim["validity"]]
             if not pending:
                 break
 
-            updated = self.llm_service.verify_claims(pending, chunk)
+            chunk_hash = content_hash(self._chunk_text(chunk))
+            keys = {
+                claim["claim"]: content_hash(model, str(votes), normalize_claim(claim["claim"]), chunk_hash)
+                for claim in pending
+            }
+
+            to_verify = []
+            for claim in pending:
+                cached = verdict_cache.get(keys[claim["claim"]]) if verdict_cache else None
+                if cached is None:
+                    to_verify.append(claim)
+                else:
+                    claim["validity"] = cached
+
+            if not to_verify:
+                continue
+
+            answered = self._verify(to_verify, chunk, max_votes)
+            missing = [claim for claim in to_verify if claim["claim"] not in answered]
+            if missing:
+                answered.update(self._verify(missing, chunk, max_votes))
+
+            for claim in to_verify:
+                if claim["claim"] in answered:
+                    claim["validity"] = answered[claim["claim"]]
+
+            if verdict_cache is not None:
+                verdict_cache.update(
+                    {keys[claim]: validity for claim, validity in answered.items()}
+                )
+
+        return all_claims
+
+    def _verify(self, claims: List[Dict], chunk, max_votes: Optional[int] = None) -> Dict[str, bool]:
+        """Verdicts the model returned, keyed by the original claim text."""
+        updated = self.llm_service.verify_claims(claims, chunk, max_votes=max_votes)
+        if not isinstance(updated, list):
+            return {}
 
-            for claim in updated:
-                for existing_claim in all_claims:
-                    if existing_claim["claim"] == claim["claim"]:
-                        existing_claim["validity"] = claim["validity"]
-                        break
+        by_normalized = {normalize_claim(claim["claim"]): claim["claim"] for claim in claims}
+        answered = {}
+        for result in updated:
+            # Undecided votes (validity None) count as unanswered.
+            if not isinstance(result, dict) or result.get("claim") is None or result.get("validity") is None:
+                continue
+            claim = by_normalized.get(normalize_claim(result["claim"]))
+            if claim is not None:
+                answered[claim] = bool(result["validity"])
+        return answered
 
-        return all_claims
\ No newline at end of file
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        if isinstance(chunk, str):
+            return chunk
+        return json.dumps(chunk, sort_keys=True, ensure_ascii=False, default=str)
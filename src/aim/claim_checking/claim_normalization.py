@@ -0,0 +1,34 @@
+import re
+import unicodedata
+from typing import List, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = " .;:!,"
+
+
+def normalize_claim(claim: str) -> str:
+    """Canonical form used to spot claims that differ only in formatting."""
+    text = unicodedata.normalize("NFKC", claim)
+    text = text.replace("’", "'").replace("“", '"').replace("”", '"')
+    text = _WHITESPACE.sub(" ", text).strip().rstrip(_TRAILING_PUNCTUATION)
+    return text.casefold()
+
+
+def dedupe_claims(claims: List[str]) -> Tuple[List[str], List[int]]:
+    """Drop duplicate claims, keeping the first spelling of each.
+
+    Returns the unique claims plus, for every original claim, the index of
+    the unique claim standing in for it, so results can be fanned back out.
+    """
+    unique: List[str] = []
+    positions = {}
+    owners: List[int] = []
+
+    for claim in claims:
+        key = normalize_claim(claim)
+        if key not in positions:
+            positions[key] = len(unique)
+            unique.append(claim)
+        owners.append(positions[key])
+
+    return unique, owners
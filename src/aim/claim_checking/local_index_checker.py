@@ -0,0 +1,49 @@
+from typing import Dict, List, Optional, Union
+from pathlib import Path
+from ..claim_checking.claim_checker import ClaimChecker
+from ..local_index import LocalVectorIndex
+from ..models.embeddings.embeddings_service import EmbeddingService
+from ..models.llm.llm_service import LLMService
+
+
+class LocalIndexChecker(ClaimChecker):
+    def __init__(self, llm_service: LLMService, embeds_service: Optional[EmbeddingService]):
+        self.MAX_CHUNK_CHARS = 4000
+        self.llm_service = llm_service
+        self.embeds_service = embeds_service
+
+    async def fetch_reference(
+        self,
+        index: Union[str, Path, LocalVectorIndex],
+        claims: List[str],
+        k: int = 5,
+        **kwargs
+    ) -> List[Dict]:
+        """Top-``k`` chunks for each claim, deduplicated and ordered by best score."""
+        if not isinstance(index, LocalVectorIndex):
+            if self.embeds_service is None:
+                raise ValueError("An embedding model is required for DataSource.LOCAL_INDEX")
+            index = LocalVectorIndex.open(index, self.embeds_service)
+
+        best: Dict[int, Dict] = {}
+        for hits in index.search_many(claims, k=k):
+            for hit in hits:
+                if hit["row"] not in best or hit["score"] > best[hit["row"]]["score"]:
+                    best[hit["row"]] = hit
+        return sorted(best.values(), key=lambda hit: hit["score"], reverse=True)
+
+    def chunk_content(self, hits: List[Dict]) -> List[str]:
+        # Pack the retrieved chunks into as few verification calls as fit.
+        grouped = []
+        current = []
+        length = 0
+        for hit in hits:
+            if current and length + len(hit["text"]) > self.MAX_CHUNK_CHARS:
+                grouped.append("\n\n".join(current))
+                current = []
+                length = 0
+            current.append(hit["text"])
+            length += len(hit["text"])
+        if current:
+            grouped.append("\n\n".join(current))
+        return grouped
@@ -1,18 +1,23 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, TYPE_CHECKING
 from ..claim_checking.claim_checker import ClaimChecker
 from ..models.llm.llm_service import LLMService
-from mcp import StdioServerParameters
+
+if TYPE_CHECKING:
+    from mcp import StdioServerParameters
 
 class MCPChecker(ClaimChecker):
-    def __init__(self, llm_service: LLMService, params: StdioServerParameters):
+    def __init__(self, llm_service: LLMService, params: Optional["StdioServerParameters"] = None):
         self.llm_service = llm_service
         self.mcp_server_params = params
 
-    async def fetch_reference(self, claims: List[str]) -> List[str]:
+    async def fetch_reference(
+        self, claims: List[str], params: Optional["StdioServerParameters"] = None, **kwargs
+    ) -> List[str]:
+        server_params = params or self.mcp_server_params
         reference = []
         for claim in claims:
             relevant_content = await self.llm_service.run_mcp_agent(
-                input=claim, server=self.mcp_server_params
+                input=claim, server=server_params
             )
             if relevant_content:
                 reference.append(relevant_content)
@@ -1,10 +1,8 @@
+import asyncio
 from typing import List
 import io
-from pypdf import PdfReader
 from ..claim_checking.claim_checker import ClaimChecker
-import requests
 import re
-from bs4 import BeautifulSoup
 from ..models.llm.llm_service import LLMService
 
 
@@ -13,20 +11,20 @@ class WebChecker(ClaimChecker):
         self.MAX_CHUNK_CHARS = 4000
         self.llm_service = llm_service
 
-    def fetch_reference(self, urls: List[str]) -> List[str]:
-        texts = []
-        for url in urls:
-            response = requests.get(url)
-            content_type = response.headers.get("Content-Type", "")
+    async def fetch_reference(self, urls: List[str], **kwargs) -> List[str]:
+        # requests and the parsers block, so each page is fetched on a
+        # worker thread, all of them at once.
+        return list(await asyncio.gather(*(asyncio.to_thread(self._fetch, url) for url in urls)))
 
-            if url.lower().endswith(".pdf") or "application/pdf" in content_type:
-                pdf_bytes = response.content
-                texts.append(self._extract_text_from_pdf(pdf_bytes))
-            else:
-                html_str = response.text
-                texts.append(self._extract_text_from_html(html_str))
+    def _fetch(self, url: str) -> str:
+        import requests
+
+        response = requests.get(url)
+        content_type = response.headers.get("Content-Type", "")
 
-        return texts
+        if url.lower().endswith(".pdf") or "application/pdf" in content_type:
+            return self._extract_text_from_pdf(response.content)
+        return self._extract_text_from_html(response.text)
 
     def chunk_content(self, content: List[str]) -> List[str]:
         all_chunks = []
@@ -66,6 +64,8 @@ class WebChecker(ClaimChecker):
         return grouped
 
     def _extract_text_from_pdf(self, pdf_bytes: bytes) -> str:
+        from pypdf import PdfReader
+
         reader = PdfReader(io.BytesIO(pdf_bytes))
         text_chunks = []
 
@@ -77,6 +77,8 @@ class WebChecker(ClaimChecker):
         return "\n".join(text_chunks)
 
     def _extract_text_from_html(self, html_str: str) -> str:
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(html_str, "html.parser")
 
         for tag in soup(["script", "style"]):
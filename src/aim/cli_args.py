@@ -14,9 +14,84 @@ def build_parser():
 
     p = sub.add_parser("set-baseline")
     p.add_argument("-c", "--config", required=True)
-    p.add_argument("-r", "--runs", type=int, required=True)
+    p.add_argument("-r", "--runs", type=int, required=True,
+                   help="Number of runs (the maximum with --adaptive)")
+    p.add_argument("--adaptive", action="store_true",
+                   help="Stop early once every assertion's baseline has converged")
+    p.add_argument("--confidence", type=float, default=0.95)
+    p.add_argument("--tolerance", type=float, default=0.01)
+    p.add_argument("--min-runs", type=int, default=3)
+    p.add_argument("-w", "--workers", type=int, default=1,
+                   help="Number of baseline runs executed concurrently")
 
     p = sub.add_parser("report")
     p.add_argument("-c", "--config", required=True)
+    p.add_argument("--batch", action="store_true",
+                   help="Submit LLM evaluations through the provider batch API")
+
+    p = sub.add_parser("batch-resume")
+    p.add_argument("journals", nargs="*",
+                   help="Batch journals to resume (defaults to every unfinished one)")
+
+    p = sub.add_parser("eval")
+    p.add_argument("-c", "--config", required=True)
+    p.add_argument("-i", "--input", required=True, help="JSONL dataset to evaluate")
+    p.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--checkpoint", help="Checkpoint file (defaults to <output>.checkpoint.json)")
+    p.add_argument("--shard", help="Only evaluate shard i of n (i/n), split by item id")
+
+    p = sub.add_parser("merge")
+    p.add_argument("-o", "--output", required=True, help="Directory for the merged files")
+    p.add_argument("--results", nargs="*", default=[], help="Per-shard result JSONL files")
+    p.add_argument("--reports", nargs="*", default=[], help="Per-shard report files")
+    p.add_argument("--failures", nargs="*", default=[], help="Per-shard failure files")
+
+    p = sub.add_parser("index")
+    p.add_argument("-c", "--config", required=True)
+    p.add_argument("paths", nargs="+", help="Files or directories (.txt, .md, .rst) to index")
+    p.add_argument("--index", default="aim_data/index", help="Index directory")
+    p.add_argument("--chunk-chars", type=int, default=1500)
+    p.add_argument("--chunk-overlap", type=int, default=200)
+    p.add_argument("--ivf-min-chunks", type=int, default=100000,
+                   help="Build an approximate (IVF) index once the index has this many chunks")
+
+    p = sub.add_parser("gc")
+    p.add_argument("--data-dir", default="aim_data")
+    p.add_argument("--keep", nargs="*", default=[],
+                   help="Extra files or directories whose blob references must be kept (e.g. merged outputs)")
+    p.add_argument("--grace-minutes", type=float, default=60,
+                   help="Never delete blobs written more recently than this")
+    p.add_argument("--dry-run", action="store_true")
+
+    p = sub.add_parser("history")
+    p.add_argument("--data-dir", default="aim_data")
+    queries = p.add_subparsers(dest="query", required=True)
+
+    q = queries.add_parser("index", help="Import report files from runs recorded before the history store")
+    q.add_argument("reports", nargs="*", help="Report files (defaults to <data-dir>/report/report_*.json)")
+
+    q = queries.add_parser("trend", help="Average score per run")
+    q.add_argument("metric")
+    q.add_argument("--reference-id")
+    q.add_argument("--assertion")
+    q.add_argument("--last", type=int, default=50, help="Number of most recent runs")
+    q.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+
+    q = queries.add_parser("regressions", help="Latest run scoring below its recent average")
+    q.add_argument("--metric")
+    q.add_argument("--window", type=int, default=5, help="Previous runs to compare against")
+    q.add_argument("--min-drop", type=float, default=0.05, help="Minimum relative drop (0.05 = 5%%)")
+    q.add_argument("--runs", type=int, default=50, help="Number of most recent runs to scan")
+    q.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+
+    q = queries.add_parser("worst", help="Most frequently failing assertions")
+    q.add_argument("--metric")
+    q.add_argument("--runs", type=int, default=20, help="Number of most recent runs")
+    q.add_argument("--limit", type=int, default=10)
+    q.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+
+    p = sub.add_parser("serve")
+    p.add_argument("--socket", help="Unix socket path (defaults to $AIM_DAEMON_SOCKET or a per-user temp path)")
 
     return parser
@@ -1,15 +1,19 @@
 import json
 import os
 from pathlib import Path
+import signal
 import subprocess
+import time
+from .baseline import BaselineTracker
 from .cli_args import build_parser
-from .state import set_mode, ExecutionModes
+from .merge import merge_reference_shards, merge_runs, merge_shard_outputs
+from .state import ExecutionMode, set_mode, ExecutionModes
 
 def load_config(path: str) -> dict:
     p = Path(path)
     with p.open("r", encoding="utf-8") as f:
         return json.load(f)
-    
+
 def main():
     parser = build_parser()
     args = parser.parse_args()
@@ -19,22 +23,195 @@ def main():
         return
 
     cmd = args.command
+    if cmd == "batch-resume":
+        from .batch_runner import resume_batches
+        resume_batches(args.journals)
+        return
+
+    if cmd == "serve":
+        import asyncio
+        from .daemon import EvaluationDaemon
+        asyncio.run(EvaluationDaemon(args.socket).serve())
+        return
+
+    if cmd == "gc":
+        from .blob_store import BlobStore
+        store = BlobStore(Path(args.data_dir) / "blobs")
+        stats = store.gc([args.data_dir, *args.keep], grace_seconds=args.grace_minutes * 60, dry_run=args.dry_run)
+        print(json.dumps(stats, indent=2))
+        return
+
+    if cmd == "history":
+        _history(args)
+        return
+
+    if cmd == "merge":
+        summary = merge_runs(args.output, args.results, args.reports, args.failures)
+        print(json.dumps(summary, indent=2))
+        return
+
     aim_config = load_config(args.config)
-    
+
+    if cmd == "eval":
+        from .dataset_eval import DatasetEvaluator, build_metrics, parse_shard
+        set_mode(ExecutionModes.REPORT, config=aim_config)
+        checkpoint = DatasetEvaluator(
+            build_metrics(aim_config),
+            args.input,
+            args.output,
+            concurrency=args.concurrency,
+            checkpoint_path=args.checkpoint,
+            shard=parse_shard(args.shard),
+        ).run()
+        print(f"Evaluated {checkpoint['items_done']} items ({checkpoint['errors']} errors); report: {checkpoint['report_file']}")
+        return
+
+    if cmd == "index":
+        from .dataset_eval import build_embedding_service
+        from .local_index import LocalVectorIndex, read_documents
+        index = LocalVectorIndex(
+            args.index,
+            build_embedding_service(aim_config),
+            chunk_chars=args.chunk_chars,
+            chunk_overlap=args.chunk_overlap,
+            ivf_min_chunks=args.ivf_min_chunks,
+        )
+        embedded = index.add_documents(read_documents(args.paths))
+        index.save()
+        print(f"Embedded {embedded} new chunks; {args.index} holds {len(index.chunks)} chunks from {len(index.documents)} documents.")
+        return
+
     mode = ExecutionModes(cmd)
     iteration = getattr(args, 'runs', None)
-    
+
     set_mode(mode, iteration=iteration, config=aim_config)
-    
+
     env = os.environ.copy()
     env["AIM_MODE"] = cmd
     if iteration:
         env["AIM_ITERATION"] = str(iteration)
+    if getattr(args, "batch", False):
+        env["AIM_BATCH"] = "1"
+    if aim_config.get("max_votes"):
+        env["AIM_MAX_VOTES"] = str(int(aim_config["max_votes"]))
+    for key, var in (
+        ("rate_limit_rpm", "AIM_RATE_LIMIT_RPM"),
+        ("hedge_percentile", "AIM_HEDGE_PERCENTILE"),
+        ("hedge_budget", "AIM_HEDGE_BUDGET"),
+        ("fallback_model", "AIM_FALLBACK_MODEL"),
+    ):
+        if aim_config.get(key):
+            env[var] = str(aim_config[key])
 
     # For baseline mode, run multiple times
     if mode == ExecutionModes.SET_BASELINE and iteration:
+        tracker = None
+        if args.adaptive:
+            tracker = BaselineTracker(
+                ExecutionMode.reference_dir,
+                confidence=args.confidence,
+                tolerance=args.tolerance,
+                min_runs=args.min_runs,
+            )
+
+        if args.workers > 1:
+            _run_parallel_baseline(aim_config, env, iteration, args.workers, tracker)
+            return
+
         for i in range(iteration):
             print(f"Running iteration {i+1}/{iteration}...")
             subprocess.run(aim_config["run"], shell=True, check=False, env=env)
+
+            if tracker:
+                tracker.update()
+                if tracker.converged():
+                    print(f"Baseline converged after {i+1} runs.")
+                    break
     else:
         subprocess.run(aim_config["run"], shell=True, check=False, env=env)
+
+
+def _run_parallel_baseline(aim_config, env, runs, workers, tracker=None):
+    """Run baseline iterations in up to ``workers`` concurrent processes.
+
+    Each run writes its scores to its own reference shard, which is merged
+    into the reference file as soon as that run exits (together with its
+    report and failures shards, which the run leaves to this process). The
+    ``AIM_RATE_LIMIT_RPM`` budget is split evenly across the workers. If
+    this process is interrupted, the runs still going are terminated.
+    """
+    rpm = env.get("AIM_RATE_LIMIT_RPM")
+    if rpm:
+        env = {**env, "AIM_RATE_LIMIT_RPM": str(float(rpm) / workers)}
+
+    running = {}
+    next_run = 0
+    finished = 0
+    converged = False
+
+    try:
+        while running or (next_run < runs and not converged):
+            while len(running) < workers and next_run < runs and not converged:
+                shard = f"run{next_run}"
+                print(f"Starting iteration {next_run+1}/{runs}...")
+                # In its own process group, so the whole run (shell, pytest
+                # and its xdist workers) can be stopped together.
+                running[shard] = subprocess.Popen(
+                    aim_config["run"], shell=True, env={**env, "AIM_SHARD": shard}, start_new_session=True
+                )
+                next_run += 1
+
+            done = [shard for shard, process in running.items() if process.poll() is not None]
+            if not done:
+                time.sleep(0.1)
+                continue
+
+            for shard in done:
+                del running[shard]
+                merge_reference_shards(ExecutionMode.reference_dir, shard=shard)
+                merge_shard_outputs(ExecutionMode.report_dir, "report", ".json", shard)
+                merge_shard_outputs(ExecutionMode.failures_dir, "failures", ".jsonl", shard)
+                finished += 1
+
+            if tracker and not converged:
+                tracker.update()
+                if tracker.converged():
+                    converged = True
+                    print(f"Baseline converged after {finished} runs; waiting for in-flight runs.")
+    finally:
+        _terminate(running.values())
+
+
+def _terminate(processes, timeout: float = 10.0):
+    processes = [process for process in processes if process.poll() is None]
+    for process in processes:
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        else:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def _history(args):
+    from .history import HistoryStore, format_table
+
+    store = HistoryStore(Path(args.data_dir) / "history.sqlite")
+    if args.query == "index":
+        reports = args.reports or sorted((Path(args.data_dir) / "report").glob("report_*.json"))
+        print(f"Indexed {store.index_reports(reports)} runs.")
+        return
+
+    rows = {
+        "trend": lambda: store.trend(args.metric, args.reference_id, args.assertion, args.last),
+        "regressions": lambda: store.regressions(args.metric, args.window, args.min_drop, args.runs),
+        "worst": lambda: store.worst(args.metric, args.runs, args.limit),
+    }[args.query]()
+    print(json.dumps(rows, indent=2) if args.json else format_table(rows))
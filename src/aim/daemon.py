@@ -0,0 +1,298 @@
+"""Warm evaluation daemon (``aim serve``).
+
+The daemon listens on a Unix socket and keeps ``LLMService`` and
+``EmbeddingService`` clients, MCP sessions, prompts and an embedding cache
+alive between test runs. With ``AIM_DAEMON=1``, when a socket owned by the
+current user is listening, ``Metrics`` builds thin
+``RemoteLLMService``/``RemoteEmbeddingService`` clients that forward each
+call to it instead of setting up providers in every process.
+
+The protocol is one JSON object per line in each direction::
+
+    -> {"op": "evaluate_criterion", "service": {...}, "args": {...}}
+    <- {"ok": true, "result": ...}
+
+Model calls return ``{"value": ..., "stats": {...}}`` as their result: the
+prompt-cache, voting and hedging stats of that call, which the client adds
+to its own so reports look the same with or without the daemon.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import signal
+import socket
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .models.embeddings.embeddings_service import EmbeddingService
+from .models.llm.hedging import HedgingStats
+from .models.llm.llm_service import LLMService
+from .models.llm.prompt_cache import PromptCacheStats
+from .models.llm.self_consistency import AgreementStats
+from .models.llm.usage_stats import service_stats
+
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+def default_socket_path() -> str:
+    return os.getenv("AIM_DAEMON_SOCKET") or str(
+        Path(tempfile.gettempdir()) / f"aim-{os.getuid()}.sock"
+    )
+
+
+class EvaluationDaemon:
+    def __init__(self, socket_path: Optional[str] = None, embedding_cache_size: int = 10000):
+        self.socket_path = socket_path or default_socket_path()
+        self.embedding_cache_size = embedding_cache_size
+        self._services: Dict[tuple, Any] = {}
+        self._embeddings: "OrderedDict[str, list]" = OrderedDict()
+
+    async def serve(self):
+        path = Path(self.socket_path)
+        if path.exists():
+            if _is_listening(self.socket_path):
+                raise RuntimeError(f"An aim daemon is already listening on {self.socket_path}")
+            path.unlink()
+
+        # Create the socket owner-only; a chmod after bind leaves a window in
+        # which other users could connect.
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self.socket_path, limit=MAX_MESSAGE_BYTES)
+        finally:
+            os.umask(umask)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        print(f"aim daemon listening on {self.socket_path}")
+        async with server:
+            await stop.wait()
+
+        for service in self._services.values():
+            if isinstance(service, LLMService):
+                await service.close_mcp_sessions()
+        path.unlink(missing_ok=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    response = {"ok": True, "result": await self._dispatch(request)}
+                except Exception as e:
+                    response = {"ok": False, "type": type(e).__name__, "error": str(e)}
+                writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Dict):
+        op = request["op"]
+        args = request.get("args", {})
+        if op == "ping":
+            return {"services": len(self._services), "cached_embeddings": len(self._embeddings)}
+
+        service = self._service(request["service"])
+        if op == "embed":
+            return (await self._embed(service, [args["content"]]))[0]
+        if op in ("embed_batch", "embed_documents"):
+            return await self._embed(service, args["contents"], op)
+        if op == "run_mcp_agent":
+            from mcp import StdioServerParameters
+            return await service.run_mcp_agent(args["input"], StdioServerParameters(**args["server"]))
+        if op in ("evaluate_criterion", "extract_claims", "verify_claims"):
+            return await self._call_llm(service, op, args)
+        raise ValueError(f"Unknown op: {op}")
+
+    @staticmethod
+    async def _call_llm(service: LLMService, op: str, args: Dict) -> Dict:
+        """Run ``service.<op>`` and return its result with the stats of
+        this call alone, which the client adds to its own."""
+        # Concurrent calls share the service, so each records into its own
+        # copy's stats; clients, prompts and latency history stay shared.
+        call = copy.copy(service)
+        call.prompt_cache_stats = PromptCacheStats()
+        call.agreement_stats = AgreementStats()
+        call.hedging_stats = HedgingStats()
+        value = await asyncio.to_thread(getattr(call, op), **args)
+        return {"value": value, "stats": {stats.REPORT_KEY: stats.drain() for stats in service_stats(call)}}
+
+    async def _embed(self, service: EmbeddingService, contents: List[str], method: str = "embed_batch"):
+        """Embed ``contents`` with ``service.<method>``, sending only the
+        texts missing from the cache, in one batch."""
+        keys = [
+            hashlib.sha256(f"{service.embed_model_name}\0{method}\0{content}".encode("utf-8")).hexdigest()
+            for content in contents
+        ]
+        found = {}
+        for key in keys:
+            if key in self._embeddings:
+                self._embeddings.move_to_end(key)
+                found[key] = self._embeddings[key]
+
+        missing = {key: content for key, content in zip(keys, contents) if key not in found}
+        if missing:
+            embeddings = await asyncio.to_thread(getattr(service, method), list(missing.values()))
+            found.update(zip(missing, embeddings))
+            self._embeddings.update(zip(missing, embeddings))
+            while len(self._embeddings) > self.embedding_cache_size:
+                self._embeddings.popitem(last=False)
+        return [found[key] for key in keys]
+
+    def _service(self, spec: Dict):
+        options = spec.get("options") or {}
+        key = (spec["kind"], spec["model"], spec.get("api_key"), json.dumps(options, sort_keys=True))
+        if key not in self._services:
+            if spec["kind"] == "llm":
+                self._services[key] = LLMService(
+                    spec.get("api_key"), spec["model"], keep_mcp_sessions=True, **options
+                )
+            else:
+                self._services[key] = EmbeddingService(spec.get("api_key"), spec["model"])
+        return self._services[key]
+
+
+class DaemonClient:
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or default_socket_path()
+
+    def call(self, op: str, service: Optional[Dict] = None, **args):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            sock.sendall(self._encode(op, service, args))
+            with sock.makefile("rb") as stream:
+                return self._decode(stream.readline())
+
+    async def acall(self, op: str, service: Optional[Dict] = None, **args):
+        reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=MAX_MESSAGE_BYTES)
+        try:
+            writer.write(self._encode(op, service, args))
+            await writer.drain()
+            return self._decode(await reader.readline())
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _encode(op, service, args) -> bytes:
+        return (json.dumps({"op": op, "service": service, "args": args}, ensure_ascii=False) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _decode(line: bytes):
+        if not line:
+            raise ConnectionError("aim daemon closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise RuntimeError(f"aim daemon: {response['type']}: {response['error']}")
+        return response["result"]
+
+
+class RemoteLLMService(LLMService):
+    """``LLMService`` whose model calls run in the daemon.
+
+    Prompt rendering and batch helpers still work locally; only the calls
+    that need a provider client are forwarded.
+    """
+
+    def __init__(self, api_key: str, model: str, client: DaemonClient, **options):
+        super().__init__(api_key, model, **options)
+        self.daemon = client
+        # The daemon's service hedges like this one would.
+        self._spec = {
+            "kind": "llm", "model": self.model.value, "api_key": api_key,
+            "options": {
+                "hedge_percentile": self.hedge_percentile,
+                "hedge_budget": self.hedge_budget,
+                "fallback_model": self.fallback_model.value if self.fallback_model else None,
+            },
+        }
+
+    def evaluate_criterion(self, criterion: str, content: str, max_votes: Optional[int] = None) -> bool:
+        return self._call(
+            "evaluate_criterion", criterion=criterion, content=content, max_votes=max_votes or self.max_votes
+        )
+
+    def extract_claims(self, content: str):
+        return self._call("extract_claims", content=content)
+
+    def verify_claims(self, claims, content, max_votes: Optional[int] = None):
+        return self._call("verify_claims", claims=claims, content=content, max_votes=max_votes or self.max_votes)
+
+    def _call(self, op: str, **args):
+        response = self.daemon.call(op, self._spec, **args)
+        for stats in service_stats(self):
+            stats.add(response["stats"].get(stats.REPORT_KEY, {}))
+        return response["value"]
+
+    async def run_mcp_agent(self, input: str, server, sys_prompt=None):
+        return await self.daemon.acall(
+            "run_mcp_agent", self._spec, input=input, server=server.model_dump(mode="json")
+        )
+
+
+class RemoteEmbeddingService(EmbeddingService):
+    def __init__(self, embed_api_key: str, embed_model: str, client: DaemonClient):
+        super().__init__(embed_api_key, embed_model)
+        self.daemon = client
+        self._spec = {"kind": "embed", "model": embed_model, "api_key": embed_api_key}
+
+    def embed(self, content: str) -> list:
+        return self.daemon.call("embed", self._spec, content=content)
+
+    async def aembed(self, content: str) -> list:
+        return await self.daemon.acall("embed", self._spec, content=content)
+
+    def embed_batch(self, contents: List[str]) -> List[list]:
+        return self.daemon.call("embed_batch", self._spec, contents=contents)
+
+    def embed_documents(self, contents: List[str]) -> List[list]:
+        return self.daemon.call("embed_documents", self._spec, contents=contents)
+
+
+def connect() -> Optional[DaemonClient]:
+    """A client for the running daemon, or None when there isn't one.
+
+    The daemon is opt-in (``AIM_DAEMON=1``), and only a socket owned by the
+    current user is trusted: the default path is in a shared temp directory.
+    """
+    if os.getenv("AIM_DAEMON") != "1":
+        return None
+    socket_path = default_socket_path()
+    try:
+        if os.stat(socket_path).st_uid != os.getuid():
+            print(f"Warning: ignoring aim daemon socket {socket_path} owned by another user")
+            return None
+    except OSError:
+        return None
+    if not _is_listening(socket_path):
+        return None
+    return DaemonClient(socket_path)
+
+
+def _is_listening(socket_path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def llm_service_for(api_key: str, model: str, **options) -> LLMService:
+    """``options`` are ``LLMService`` keyword arguments (hedging settings)."""
+    client = connect()
+    return RemoteLLMService(api_key, model, client, **options) if client else LLMService(api_key, model, **options)
+
+
+def embedding_service_for(api_key: str, model: str) -> EmbeddingService:
+    client = connect()
+    return RemoteEmbeddingService(api_key, model, client) if client else EmbeddingService(api_key, model)
@@ -5,11 +5,19 @@ class DataSource(Enum):
     WEB = auto()
     MCP = auto()
     RETRIEVER = auto()
+    LOCAL_INDEX = auto()
 
     @property
     def required_args(self):
         return {
             DataSource.WEB: ["urls"],
             DataSource.MCP: ["params"],
-            DataSource.RETRIEVER: ["retriever_request", "query"]
-        }[self]
\ No newline at end of file
+            DataSource.RETRIEVER: ["retriever_request", "query"],
+            DataSource.LOCAL_INDEX: ["index"],
+        }[self]
+
+    @property
+    def optional_args(self):
+        return {
+            DataSource.LOCAL_INDEX: ["k"],
+        }.get(self, [])
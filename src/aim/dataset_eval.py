@@ -0,0 +1,330 @@
+"""Streaming evaluation of JSONL datasets (``aim eval``).
+
+Each input line is one item::
+
+    {"id": "q-1",
+     "content": "...",
+     "criteria": ["The answer should mention Seattle"],
+     "claim_check": {"data_source": "WEB", "urls": ["https://..."]},
+     "similarity": {"reference": "...", "threshold": 0.8}}
+
+Only ``content`` is required; each metric runs when its key is present.
+With ``shard=(i, n)`` only items whose ``id`` hashes to ``i`` modulo ``n``
+are evaluated, so ``n`` machines can split a dataset deterministically and
+``aim merge`` can combine their outputs.
+Results are written to the output JSONL in input order, and a checkpoint
+next to it records how far both files have got, so an interrupted run
+resumes exactly where it stopped. The checkpoint is saved every
+``checkpoint_every`` items or ``checkpoint_interval`` seconds, after the
+output has been fsynced. A line that isn't valid JSON gets an ``error``
+result like any other failing item. Memory use is bounded by the number of
+in-flight items, not by the dataset size.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .data_sources import DataSource
+from .evaluation_pool import EvaluationPool
+from .files import save_json
+from .history import HistoryStore, is_history_enabled
+from .merge import save_report
+from .models.llm.usage_stats import drain_service_stats
+
+PathLike = Union[str, Path]
+
+# Result key -> the score inside it.
+_SCORE_KEYS = {
+    "criteria_check": "score",
+    "claim_check": "total_score",
+    "semantic_similarity": "score",
+}
+
+
+def build_embedding_service(aim_config: Dict):
+    """Build the ``embed_model`` service from ``aim.config.json``."""
+    from .daemon import embedding_service_for
+    from .models.embeddings.embed_models import EmbedModels
+
+    embed_model = aim_config.get("embed_model")
+    if not embed_model:
+        raise ValueError("aim.config.json needs an embed_model")
+    return embedding_service_for(EmbedModels.api_key_for(embed_model), embed_model)
+
+
+def build_metrics(aim_config: Dict):
+    """Build a ``Metrics`` from ``aim.config.json``, reading API keys from env."""
+    from .metrics import Metrics
+    from .models.embeddings.embed_models import EmbedModels
+    from .models.llm.llm_models import LLMModel
+
+    llm_model = aim_config.get("llm_model")
+    embed_model = aim_config.get("embed_model")
+    return Metrics(
+        reference_id=aim_config.get("reference_id", "eval"),
+        llm_model=llm_model,
+        llm_api_key=LLMModel.api_key_for(llm_model),
+        embed_api_key=EmbedModels.api_key_for(embed_model),
+        embed_model=embed_model,
+        claim_check_threshold=aim_config.get("claim_check_threshold"),
+        criteria_check_threshold=aim_config.get("criteria_check_threshold"),
+        similarity_threshold=aim_config.get("similarity_threshold"),
+        max_votes=int(aim_config["max_votes"]) if aim_config.get("max_votes") else None,
+        hedge_percentile=aim_config.get("hedge_percentile"),
+        hedge_budget=aim_config.get("hedge_budget"),
+        fallback_model=aim_config.get("fallback_model"),
+    )
+
+
+class DatasetEvaluator:
+    def __init__(
+        self,
+        metrics,
+        input_path: PathLike,
+        output_path: PathLike,
+        concurrency: int = 8,
+        checkpoint_path: Optional[PathLike] = None,
+        shard: Optional[Tuple[int, int]] = None,
+        checkpoint_every: int = 100,
+        checkpoint_interval: float = 5.0,
+    ):
+        self.metrics = metrics
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.shard = shard
+        self.input_path = Path(input_path)
+        self.output_path = Path(output_path)
+        self.concurrency = concurrency
+        self.checkpoint_path = Path(checkpoint_path or f"{self.output_path}.checkpoint.json")
+        # Results written since the last checkpoint; recorded in history once it's saved.
+        self._unsaved = []
+        self._last_save = time.monotonic()
+
+    def run(self) -> Dict:
+        checkpoint = self._load_checkpoint()
+        if checkpoint["complete"]:
+            print(f"{self.input_path} already evaluated ({checkpoint['items_done']} items).")
+            return checkpoint
+
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.output_path.touch(exist_ok=True)
+        if not self.checkpoint_path.exists():
+            # A fresh run appends after whatever the output already holds;
+            # saving that offset now lets a crash before the first commit
+            # resume from it instead of keeping a partial tail.
+            checkpoint["output_offset"] = self.output_path.stat().st_size
+            self._save_checkpoint(checkpoint)
+
+        pool = EvaluationPool(self.concurrency, self.concurrency * 2)
+        in_flight = deque()
+
+        with self.input_path.open("rb") as source, self.output_path.open("r+b") as sink:
+            if os.fstat(sink.fileno()).st_size < checkpoint["output_offset"]:
+                raise ValueError(
+                    f"{self.output_path} is shorter than its checkpoint records; it is corrupt. "
+                    f"Delete it and {self.checkpoint_path} to start over."
+                )
+            # Drop any results written after the last checkpoint.
+            sink.truncate(checkpoint["output_offset"])
+            sink.seek(checkpoint["output_offset"])
+            source.seek(checkpoint["input_offset"])
+
+            for line in iter(source.readline, b""):
+                offset = source.tell()
+                future = pool.submit(self._evaluate_line, line) if self._owns(line) else None
+                in_flight.append((offset, future))
+                while in_flight and (len(in_flight) >= pool.max_pending or _is_done(in_flight[0][1])):
+                    self._write_next(in_flight, sink, checkpoint)
+
+            while in_flight:
+                self._write_next(in_flight, sink, checkpoint)
+            self._commit(sink, checkpoint)
+
+        pool.shutdown()
+        checkpoint["complete"] = True
+        self._save_checkpoint(checkpoint)
+
+        save_report(checkpoint["report_file"], checkpoint["stats"])
+        return checkpoint
+
+    def _write_next(self, in_flight, sink, checkpoint):
+        offset, future = in_flight.popleft()
+        if future is not None:
+            result = future.result()
+            sink.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+            checkpoint["items_done"] += 1
+            self._update_stats(checkpoint, result)
+            self._unsaved.append(result)
+            drain_service_stats(checkpoint["stats"], self.metrics.llm_service)
+
+        checkpoint["input_offset"] = offset
+        checkpoint["output_offset"] = sink.tell()
+        if (
+            len(self._unsaved) >= self.checkpoint_every
+            or time.monotonic() - self._last_save >= self.checkpoint_interval
+        ):
+            self._commit(sink, checkpoint)
+
+    def _commit(self, sink, checkpoint: Dict):
+        # The checkpoint must never point past data that isn't on disk yet.
+        sink.flush()
+        os.fsync(sink.fileno())
+        self._save_checkpoint(checkpoint)
+        self._last_save = time.monotonic()
+        self._record_history(checkpoint, self._unsaved)
+        self._unsaved = []
+
+    def _owns(self, line: bytes) -> bool:
+        if not line.strip():
+            return False
+        if self.shard is None:
+            return True
+        index, count = self.shard
+        try:
+            item_id = json.loads(line).get("id")
+        except (ValueError, AttributeError):
+            # Malformed lines still belong to exactly one shard, which reports them.
+            item_id = None
+        key = str(item_id).encode("utf-8") if item_id is not None else line.strip()
+        return int(hashlib.sha256(key).hexdigest(), 16) % count == index
+
+    def _evaluate_line(self, line: bytes) -> Dict:
+        result = {"id": None}
+        try:
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                raise ValueError(f"Expected a JSON object, got {type(item).__name__}")
+            result["id"] = item.get("id")
+            content = item["content"]
+            if item.get("criteria"):
+                result["criteria_check"] = self._with_verdict(
+                    self.metrics._criteria_check_handler(content, item["criteria"]),
+                    "score",
+                    self.metrics.criteria_check_threshold,
+                    self.metrics.context.default_thresholds.general_criteria,
+                )
+            if item.get("claim_check"):
+                data_source, kwargs = self._claim_args(item["claim_check"])
+                result["claim_check"] = self._with_verdict(
+                    asyncio.run(self.metrics._claim_check_handler(content, data_source, **kwargs)),
+                    "total_score",
+                    self.metrics.claim_check_threshold,
+                    self.metrics.context.default_thresholds.claim_check,
+                )
+            if item.get("similarity"):
+                similarity = item["similarity"]
+                score = self.metrics._cosim(content, similarity["reference"])
+                threshold = similarity.get("threshold", self.metrics.similarity_threshold)
+                result["semantic_similarity"] = {
+                    "score": score,
+                    "threshold": threshold,
+                    "passed": None if threshold is None else score >= threshold,
+                }
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    @staticmethod
+    def _with_verdict(result: Dict, score_key: str, threshold: Optional[float], default: float) -> Dict:
+        threshold = (threshold if threshold is not None else default) * 100
+        return {**result, "threshold": threshold, "passed": result[score_key] >= threshold}
+
+    @staticmethod
+    def _claim_args(spec: Dict):
+        kwargs = dict(spec)
+        data_source = DataSource[kwargs.pop("data_source").upper()]
+        if data_source == DataSource.MCP:
+            from mcp import StdioServerParameters
+            kwargs["params"] = StdioServerParameters(**kwargs["params"])
+        elif data_source == DataSource.RETRIEVER:
+            raise ValueError("DataSource.RETRIEVER needs a Python retriever and can't be used from a dataset")
+        return data_source, kwargs
+
+    @staticmethod
+    def _update_stats(checkpoint: Dict, result: Dict):
+        scores = {key: result.get(key, {}).get(score_key) for key, score_key in _SCORE_KEYS.items()}
+        for key, score in scores.items():
+            if score is None:
+                continue
+            entry = checkpoint["stats"].setdefault(key, {"count": 0, "avg": 0.0, "failed": 0})
+            c = entry["count"]
+            entry["avg"] = (entry["avg"] * c + score) / (c + 1)
+            entry["count"] = c + 1
+            if result[key].get("passed") is False:
+                entry["failed"] += 1
+        if "error" in result:
+            checkpoint["errors"] += 1
+
+    def _record_history(self, checkpoint: Dict, results: List[Dict]):
+        """Record the scores of ``results`` in one transaction."""
+        if not is_history_enabled():
+            return
+        context = self.metrics.context
+        run_id = checkpoint.get("run_id", context.run_id)
+        try:
+            HistoryStore.open(context.history_file).record_many(
+                {
+                    "run_id": run_id, "metric": key, "score": result[key][score_key],
+                    "passed": result[key].get("passed"), "reference_id": self.metrics.reference_id,
+                    "assertion": None if result.get("id") is None else str(result["id"]), "mode": "eval",
+                }
+                for result in results
+                for key, score_key in _SCORE_KEYS.items()
+                if key in result
+            )
+        except sqlite3.Error as e:
+            print(f"Failed to record results in {context.history_file}: {e}")
+
+    def _load_checkpoint(self) -> Dict:
+        if self.checkpoint_path.exists():
+            with self.checkpoint_path.open("r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            if checkpoint["input"] != str(self.input_path) or checkpoint.get("shard") != self._shard_label():
+                raise ValueError(
+                    f"Checkpoint {self.checkpoint_path} belongs to {checkpoint['input']} "
+                    f"(shard {checkpoint.get('shard')}), not {self.input_path} (shard {self._shard_label()})"
+                )
+            print(f"Resuming after {checkpoint['items_done']} items...")
+            return checkpoint
+
+        return {
+            "input": str(self.input_path),
+            "shard": self._shard_label(),
+            "input_offset": 0,
+            "output_offset": 0,
+            "items_done": 0,
+            "errors": 0,
+            "stats": {},
+            "report_file": self.metrics.context.report_file,
+            "run_id": self.metrics.context.run_id,
+            "complete": False,
+        }
+
+    def _shard_label(self) -> Optional[str]:
+        return None if self.shard is None else f"{self.shard[0]}/{self.shard[1]}"
+
+    def _save_checkpoint(self, checkpoint: Dict):
+        save_json(self.checkpoint_path, checkpoint, durable=True)
+
+
+def _is_done(future) -> bool:
+    return future is None or future.done()
+
+
+def parse_shard(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse ``"i/n"`` into ``(i, n)``."""
+    if not spec:
+        return None
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {spec!r}, expected i/n") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {spec!r}, expected 0 <= i < n")
+    return index, count
@@ -0,0 +1,133 @@
+import asyncio
+import contextvars
+import inspect
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class EvaluationPool:
+    """Bounded background pool that runs evaluations and hands back futures.
+
+    At most ``max_pending`` evaluations can be queued or running at once;
+    ``submit`` blocks (and ``asubmit`` awaits) until a slot frees up, which
+    gives callers natural backpressure when they generate faster than the
+    pool can evaluate. A ``submit`` that would block inside a running event
+    loop, or on one of the pool's own workers (which can't free a slot
+    while they wait), raises ``RuntimeError`` instead.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: Optional[int] = None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 2
+        if self.max_pending < max_workers:
+            raise ValueError("max_pending must be greater than or equal to max_workers")
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="aim-eval"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.local()
+        # asubmit callers waiting for a slot, woken on their own loops.
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        self._check_open()
+        if not self._slots.acquire(blocking=False):
+            self._check_can_block()
+            self._slots.acquire()
+        return self._submit_acquired(fn, *args, **kwargs)
+
+    async def asubmit(self, fn: Callable[..., Any], *args, **kwargs) -> asyncio.Future:
+        self._check_open()
+        loop = asyncio.get_running_loop()
+        # Never block a thread on the semaphore: a cancelled waiter must not
+        # go on to take a slot that nobody would release.
+        while not self._slots.acquire(blocking=False):
+            waiter = (loop, loop.create_future())
+            with self._lock:
+                self._waiters.append(waiter)
+            try:
+                # A slot freed before the waiter was registered woke nobody.
+                if self._slots.acquire(blocking=False):
+                    break
+                await waiter[1]
+            finally:
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+        return asyncio.wrap_future(self._submit_acquired(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """Stop accepting work; by default drain everything already queued."""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+
+    def _submit_acquired(self, fn, *args, **kwargs) -> Future:
+        try:
+            with self._lock:
+                self._check_open()
+                # Run under the submitter's contextvars (e.g. its ExecutionContext).
+                context = contextvars.copy_context()
+                future = self._executor.submit(context.run, self._run, self._worker, fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        self._slots.release()
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:  # the waiter's loop has closed
+                pass
+
+    def _check_can_block(self):
+        if getattr(self._worker, "active", False):
+            raise RuntimeError(
+                "EvaluationPool is full and submit was called from one of its workers; "
+                "this would deadlock"
+            )
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        raise RuntimeError(
+            "EvaluationPool is full; use asubmit inside an event loop instead of blocking it"
+        )
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("EvaluationPool has been shut down")
+
+    @staticmethod
+    def _run(worker, fn, *args, **kwargs):
+        worker.active = True
+        try:
+            result = fn(*args, **kwargs)
+            if inspect.iscoroutine(result):
+                return asyncio.run(result)
+            return result
+        finally:
+            worker.active = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=True)
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
@@ -0,0 +1,64 @@
+"""Helpers shared by everything AIM keeps under ``aim_data/``."""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import IO, Callable, Dict, Union
+
+PathLike = Union[str, Path]
+
+
+def write_atomic(path: PathLike, write: Callable[[IO[bytes]], None], durable: bool = False):
+    """Write ``path`` by calling ``write`` on a temporary file and swapping it in.
+
+    Readers in other threads and processes never see a half-written file.
+    ``durable`` also fsyncs the data before the swap, for files a crash must
+    not lose (journals, checkpoints).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp_path.open("wb") as f:
+            write(f)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def save_json(path: PathLike, data, durable: bool = False):
+    encoded = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    write_atomic(path, lambda f: f.write(encoded), durable)
+
+
+def load_json(path: PathLike, default):
+    path = Path(path)
+    if not path.exists():
+        return default
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class SharedPerPath:
+    """Base for stores shared per path within a process (use ``cls.open``)."""
+
+    _instances: Dict[Path, "SharedPerPath"]
+    _instances_lock: threading.Lock
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._instances = {}
+        cls._instances_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: PathLike, *args):
+        """The instance for ``path``, created from ``cls(path, *args)`` on first use."""
+        key = Path(path).resolve()
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(path, *args)
+            return cls._instances[key]
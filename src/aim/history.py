@@ -0,0 +1,234 @@
+"""SQLite index of past results (``aim history``).
+
+Every metric evaluated in ``test`` or ``report`` mode adds a row to
+``aim_data/history.sqlite`` keyed by run (the run's timestamp and process
+id), reference id, metric and assertion (the similarity ``assertion_id``,
+each criterion, or the dataset item id for ``aim eval``). Reports from before the store existed can
+be imported with ``aim history index``; each becomes one row per metric
+weighted by its ``count``.
+
+Trend, regression and worst-offender queries are single indexed SQL
+statements, so they stay fast over thousands of runs.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .files import PathLike, SharedPerPath
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    mode TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL,
+    reference_id TEXT NOT NULL DEFAULT '',
+    metric TEXT NOT NULL,
+    assertion TEXT NOT NULL DEFAULT '',
+    score REAL NOT NULL,
+    weight INTEGER NOT NULL DEFAULT 1,
+    failures INTEGER
+);
+CREATE INDEX IF NOT EXISTS results_by_metric ON results (metric, run_id);
+CREATE INDEX IF NOT EXISTS results_by_key ON results (reference_id, metric, assertion, run_id);
+"""
+
+_REPORT_NAME = re.compile(r"report_(\d{8}_\d{6})(?:\.[^.]+)?\.json$")
+
+
+def is_history_enabled() -> bool:
+    return os.getenv("AIM_HISTORY") != "0"
+
+
+class HistoryStore(SharedPerPath):
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def record(
+        self,
+        run_id: str,
+        metric: str,
+        score: float,
+        passed: Optional[bool] = None,
+        reference_id: str = "",
+        assertion: Optional[str] = None,
+        mode: Optional[str] = None,
+    ):
+        self.record_many([{
+            "run_id": run_id, "metric": metric, "score": score, "passed": passed,
+            "reference_id": reference_id, "assertion": assertion, "mode": mode,
+        }])
+
+    def record_many(self, rows: Iterable[Dict]):
+        """Add result rows, given as ``record`` keyword arguments, in one transaction."""
+        rows = list(rows)
+        if not rows:
+            return
+        with self.connection as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO runs VALUES (?, ?)",
+                {row["run_id"]: row.get("mode") for row in rows}.items(),
+            )
+            connection.executemany(
+                "INSERT INTO results (run_id, reference_id, metric, assertion, score, failures) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        row["run_id"], row.get("reference_id") or "", row["metric"], row.get("assertion") or "",
+                        row["score"], None if row.get("passed") is None else int(not row["passed"]),
+                    )
+                    for row in rows
+                ],
+            )
+
+    def index_reports(self, report_paths: Iterable[PathLike]) -> int:
+        """Import aggregate scores from report files of runs not yet indexed."""
+        imported = 0
+        with self.connection as connection:
+            for path in map(Path, report_paths):
+                match = _REPORT_NAME.search(path.name)
+                if not match:
+                    continue
+                run_id = match.group(1)
+                # Runs recorded live have ids like "<timestamp>-<pid>".
+                if connection.execute(
+                    "SELECT 1 FROM runs WHERE run_id = ? OR run_id LIKE ?", (run_id, f"{run_id}-%")
+                ).fetchone():
+                    continue
+                with path.open("r", encoding="utf-8") as f:
+                    report = json.load(f)
+
+                connection.execute("INSERT INTO runs VALUES (?, ?)", (run_id, "report"))
+                for metric, entry in report.items():
+                    if not isinstance(entry, dict) or not entry.get("count") or "avg" not in entry:
+                        continue
+                    connection.execute(
+                        "INSERT INTO results (run_id, metric, score, weight, failures) VALUES (?, ?, ?, ?, ?)",
+                        (run_id, metric, entry["avg"], entry["count"], entry.get("failed")),
+                    )
+                imported += 1
+        return imported
+
+    def trend(
+        self,
+        metric: str,
+        reference_id: Optional[str] = None,
+        assertion: Optional[str] = None,
+        last: int = 50,
+    ) -> List[Dict]:
+        """Per-run average score (oldest first) over the ``last`` runs."""
+        where, params = self._filters(metric, reference_id, assertion)
+        rows = self.connection.execute(f"""
+            SELECT run_id, SUM(weight) AS n, SUM(score * weight) / SUM(weight) AS avg,
+                   {_FAIL_RATE} AS fail_rate
+            FROM results WHERE {where}
+            GROUP BY run_id ORDER BY run_id DESC LIMIT ?
+        """, (*params, last)).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def regressions(
+        self,
+        metric: Optional[str] = None,
+        window: int = 5,
+        min_drop: float = 0.05,
+        runs: int = 50,
+    ) -> List[Dict]:
+        """Keys whose latest run scores at least ``min_drop`` (relative) below
+        the mean of their previous ``window`` runs, largest drop first.
+
+        Only the last ``runs`` runs are scanned; a key missing from all of
+        them has no current regression to report.
+        """
+        where, params = self._filters(metric)
+        rows = self.connection.execute(f"""
+            WITH recent AS (SELECT run_id FROM runs ORDER BY run_id DESC LIMIT ?),
+            per_run AS (
+                SELECT reference_id, metric, assertion, run_id,
+                       SUM(score * weight) / SUM(weight) AS avg
+                FROM results WHERE {where} AND run_id IN recent
+                GROUP BY reference_id, metric, assertion, run_id
+            ), ranked AS (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY reference_id, metric, assertion ORDER BY run_id DESC
+                ) AS rn
+                FROM per_run
+            ), compared AS (
+                SELECT reference_id, metric, assertion,
+                       MAX(CASE WHEN rn = 1 THEN run_id END) AS latest_run,
+                       MAX(CASE WHEN rn = 1 THEN avg END) AS latest,
+                       AVG(CASE WHEN rn > 1 THEN avg END) AS baseline,
+                       COUNT(*) - 1 AS baseline_runs
+                FROM ranked WHERE rn <= ?
+                GROUP BY reference_id, metric, assertion
+            )
+            SELECT *, (baseline - latest) / ABS(baseline) AS drop_ratio
+            FROM compared
+            WHERE baseline_runs > 0 AND baseline != 0 AND (baseline - latest) / ABS(baseline) >= ?
+            ORDER BY drop_ratio DESC
+        """, (max(runs, window + 1), *params, window + 1, min_drop)).fetchall()
+        return [dict(row) for row in rows]
+
+    def worst(self, metric: Optional[str] = None, runs: int = 20, limit: int = 10) -> List[Dict]:
+        """Keys with the highest failure rate (then lowest score) over the last ``runs`` runs."""
+        where, params = self._filters(metric)
+        rows = self.connection.execute(f"""
+            WITH recent AS (SELECT run_id FROM runs ORDER BY run_id DESC LIMIT ?)
+            SELECT reference_id, metric, assertion, COUNT(DISTINCT run_id) AS runs,
+                   SUM(weight) AS n, SUM(score * weight) / SUM(weight) AS avg,
+                   {_FAIL_RATE} AS fail_rate
+            FROM results WHERE {where} AND run_id IN recent
+            GROUP BY reference_id, metric, assertion
+            ORDER BY fail_rate IS NULL, fail_rate DESC, avg ASC LIMIT ?
+        """, (runs, *params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _filters(metric=None, reference_id=None, assertion=None):
+        clauses, params = ["1 = 1"], []
+        for column, value in (("metric", metric), ("reference_id", reference_id), ("assertion", assertion)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return " AND ".join(clauses), params
+
+
+_FAIL_RATE = (
+    "CAST(SUM(failures) AS REAL) / NULLIF(SUM(CASE WHEN failures IS NOT NULL THEN weight END), 0)"
+)
+
+
+def format_table(rows: List[Dict]) -> str:
+    if not rows:
+        return "(no results)"
+    columns = list(rows[0])
+    cells = [[_format_cell(row[column]) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(row[i]) for row in cells)) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines += ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in cells]
+    return "\n".join(lines)
+
+
+def _format_cell(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
@@ -0,0 +1,305 @@
+"""On-disk vector index for claim checking (``DataSource.LOCAL_INDEX``).
+
+Documents are chunked, embedded through ``EmbeddingService`` and stored in a
+directory::
+
+    <path>/index.json                  # embedding model, chunking settings,
+                                       # document hashes, current version
+    <path>/<version>/chunks.json       # chunk texts and the document they came from
+    <path>/<version>/vectors.npy       # unit-normalised float32 embeddings, one row per chunk
+    <path>/<version>/ivf.npz           # inverted-file lists, once the index is large enough
+
+Each ``save`` writes a new version directory and then swaps ``index.json``,
+so a reader in another process always loads files from one save. The
+previous version is kept for readers that are still loading it.
+
+Small indexes are searched exactly with one matrix product. Once an index
+holds ``ivf_min_chunks`` chunks, ``save`` also clusters the vectors
+(spherical k-means) and queries only scan the ``nprobe`` closest clusters.
+"""
+import json
+import math
+import re
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .cache import content_hash
+from .files import PathLike, SharedPerPath, save_json
+from .models.embeddings.embeddings_service import EmbeddingService
+
+TEXT_SUFFIXES = {".txt", ".md", ".rst"}
+
+
+class LocalVectorIndex(SharedPerPath):
+    def __init__(
+        self,
+        path: PathLike,
+        embeds_service: EmbeddingService,
+        chunk_chars: int = 1500,
+        chunk_overlap: int = 200,
+        ivf_min_chunks: int = 100_000,
+    ):
+        self.path = Path(path)
+        self.embeds_service = embeds_service
+        self.chunk_chars = chunk_chars
+        self.chunk_overlap = chunk_overlap
+        self.ivf_min_chunks = ivf_min_chunks
+        self.documents: Dict[str, str] = {}
+        self.chunks: List[Dict[str, str]] = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self._centroids: Optional[np.ndarray] = None
+        self._list_order: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+        self._loaded_mtime: Optional[int] = None
+        self._version: Optional[str] = None
+        if self._mtime() is not None:
+            self._load()
+
+    @classmethod
+    def open(cls, path: PathLike, embeds_service: EmbeddingService) -> "LocalVectorIndex":
+        """Shared, already-loaded index for ``path`` within this process.
+
+        The shared index is reloaded when another process has saved the
+        index since it was loaded. Raises ``FileNotFoundError`` if no index
+        was saved at ``path``.
+        """
+        if not (Path(path) / "index.json").exists():
+            raise FileNotFoundError(f"No index at {path}; build one with `aim index`")
+        index = super().open(path, embeds_service)
+        with index._lock:
+            if index._mtime() != index._loaded_mtime:
+                index._load()
+        return index
+
+    def add_documents(self, documents: Dict[str, str]) -> int:
+        """Index ``{doc_id: text}``; unchanged documents are skipped.
+
+        A document whose text changed replaces its old chunks. Returns the
+        number of chunks embedded.
+        """
+        with self._lock:
+            changed = {
+                doc_id: text for doc_id, text in documents.items()
+                if self.documents.get(doc_id) != content_hash(text)
+            }
+            if not changed:
+                return 0
+
+            self._remove(changed.keys())
+            new_chunks = [
+                {"doc_id": doc_id, "text": chunk}
+                for doc_id, text in changed.items()
+                for chunk in self.chunk_text(text)
+            ]
+            if new_chunks:
+                vectors = _normalize(np.asarray(
+                    self.embeds_service.embed_documents([chunk["text"] for chunk in new_chunks]),
+                    dtype=np.float32,
+                ))
+                self.vectors = vectors if not len(self.chunks) else np.vstack([self.vectors, vectors])
+                self.chunks.extend(new_chunks)
+
+            self.documents.update({doc_id: content_hash(text) for doc_id, text in changed.items()})
+            self._centroids = None
+            return len(new_chunks)
+
+    def remove_documents(self, doc_ids: Iterable[str]):
+        with self._lock:
+            self._remove(doc_ids)
+            self._centroids = None
+
+    def search(self, query: str, k: int = 5, nprobe: Optional[int] = None, exact: bool = False) -> List[Dict]:
+        return self.search_many([query], k, nprobe, exact)[0]
+
+    def search_many(
+        self, queries: List[str], k: int = 5, nprobe: Optional[int] = None, exact: bool = False
+    ) -> List[List[Dict]]:
+        """Top-``k`` chunks per query as ``{"doc_id", "text", "score"}``, best first.
+
+        Uses the IVF lists when the index has them unless ``exact`` is set.
+        """
+        if not queries:
+            return []
+        if not self.chunks:
+            return [[] for _ in queries]
+        # Embedding is the slow part; other threads can keep searching meanwhile.
+        embedded = _normalize(np.asarray(self.embeds_service.embed_batch(queries), dtype=np.float32))
+        with self._lock:
+            if not self.chunks:
+                return [[] for _ in queries]
+            if exact or self._centroids is None:
+                return [self._hits(scores, k) for scores in embedded @ self.vectors.T]
+            return [self._ivf_search(query, k, nprobe) for query in embedded]
+
+    def chunk_text(self, text: str) -> List[str]:
+        """Split ``text`` into overlapping windows, breaking on whitespace."""
+        text = re.sub(r"[ \t]+", " ", text).strip()
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = min(start + self.chunk_chars, len(text))
+            if end < len(text):
+                space = text.rfind(" ", start + self.chunk_chars // 2, end)
+                end = space if space > start else end
+            chunks.append(text[start:end].strip())
+            if end >= len(text):
+                break
+            start = max(end - self.chunk_overlap, start + 1)
+        return [chunk for chunk in chunks if chunk]
+
+    def save(self):
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            if len(self.chunks) >= self.ivf_min_chunks and self._centroids is None:
+                self.build_ivf()
+
+            version = f"v-{uuid.uuid4().hex[:12]}"
+            version_dir = self.path / version
+            version_dir.mkdir()
+            with (version_dir / "chunks.json").open("w", encoding="utf-8") as f:
+                json.dump(self.chunks, f, ensure_ascii=False)
+            np.save(version_dir / "vectors.npy", self.vectors)
+            if self._centroids is not None:
+                np.savez(
+                    version_dir / "ivf.npz",
+                    centroids=self._centroids, order=self._list_order, offsets=self._list_offsets,
+                )
+            # Swapped last, so readers only ever see a complete version. Its
+            # mtime tells other processes the index changed.
+            save_json(self.path / "index.json", {
+                "embed_model": self.embeds_service.embed_model_name,
+                "chunk_chars": self.chunk_chars,
+                "chunk_overlap": self.chunk_overlap,
+                "documents": self.documents,
+                "version": version,
+            })
+            self._loaded_mtime = self._mtime()
+
+            for old in self.path.glob("v-*"):
+                if old.name not in (version, self._version):
+                    shutil.rmtree(old, ignore_errors=True)
+            self._version = version
+
+    def build_ivf(self, n_lists: Optional[int] = None, iterations: int = 10, seed: int = 0):
+        """Cluster the vectors into ``n_lists`` inverted lists (spherical k-means)."""
+        with self._lock:
+            n = len(self.chunks)
+            n_lists = min(n, n_lists or max(1, int(math.sqrt(n))))
+            rng = np.random.default_rng(seed)
+
+            # Train on a sample; 64 points per list is plenty for stable centroids.
+            sample = self.vectors[rng.choice(n, size=min(n, n_lists * 64), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+            for _ in range(iterations):
+                assignments = _nearest(sample, centroids)
+                for i in range(n_lists):
+                    members = sample[assignments == i]
+                    if len(members):
+                        centroids[i] = members.sum(axis=0)
+                centroids = _normalize(centroids)
+
+            assignments = _nearest(self.vectors, centroids)
+            self._centroids = centroids
+            self._list_order = np.argsort(assignments, kind="stable")
+            self._list_offsets = np.searchsorted(assignments[self._list_order], np.arange(n_lists + 1))
+
+    def _ivf_search(self, query: np.ndarray, k: int, nprobe: Optional[int]) -> List[Dict]:
+        n_lists = len(self._centroids)
+        nprobe = min(n_lists, nprobe or max(8, n_lists // 16))
+        probed = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        candidates = np.concatenate([
+            self._list_order[self._list_offsets[i]:self._list_offsets[i + 1]] for i in probed
+        ])
+        return self._hits(self.vectors[candidates] @ query, k, rows=candidates)
+
+    def _hits(self, scores: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> List[Dict]:
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        hits = []
+        for i in top:
+            row = int(rows[i]) if rows is not None else int(i)
+            hits.append({**self.chunks[row], "row": row, "score": float(scores[i])})
+        return hits
+
+    def _remove(self, doc_ids: Iterable[str]):
+        doc_ids = set(doc_ids)
+        if not doc_ids & self.documents.keys():
+            return
+        keep = [i for i, chunk in enumerate(self.chunks) if chunk["doc_id"] not in doc_ids]
+        self.chunks = [self.chunks[i] for i in keep]
+        self.vectors = self.vectors[keep]
+        for doc_id in doc_ids:
+            self.documents.pop(doc_id, None)
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return (self.path / "index.json").stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        meta_path = self.path / "index.json"
+        self._loaded_mtime = self._mtime()
+        if self._loaded_mtime is None:
+            raise FileNotFoundError(f"No index at {self.path}; build one with `aim index`")
+        with meta_path.open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["embed_model"] != self.embeds_service.embed_model_name:
+            raise ValueError(
+                f"Index {self.path} was built with {meta['embed_model']}, "
+                f"not {self.embeds_service.embed_model_name}"
+            )
+        self.chunk_chars = meta["chunk_chars"]
+        self.chunk_overlap = meta["chunk_overlap"]
+        self.documents = meta["documents"]
+        self._version = meta["version"]
+        version_dir = self.path / self._version
+        with (version_dir / "chunks.json").open("r", encoding="utf-8") as f:
+            self.chunks = json.load(f)
+        self.vectors = np.load(version_dir / "vectors.npy")
+        if len(self.chunks) != len(self.vectors):
+            raise ValueError(
+                f"Index {self.path} holds {len(self.chunks)} chunks but {len(self.vectors)} vectors"
+            )
+
+        ivf_path = version_dir / "ivf.npz"
+        self._centroids = self._list_order = self._list_offsets = None
+        if ivf_path.exists():
+            with np.load(ivf_path) as ivf:
+                self._centroids = ivf["centroids"]
+                self._list_order = ivf["order"]
+                self._list_offsets = ivf["offsets"]
+
+
+def read_documents(paths: Iterable[PathLike]) -> Dict[str, str]:
+    """Read files (and text files under directories) as ``{path: text}``."""
+    documents = {}
+    for path in map(Path, paths):
+        files = sorted(
+            p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in TEXT_SUFFIXES
+        ) if path.is_dir() else [path]
+        for file in files:
+            documents[str(file)] = file.read_text(encoding="utf-8", errors="replace")
+    return documents
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray, block: int = 8192) -> np.ndarray:
+    return np.concatenate([
+        np.argmax(vectors[i:i + block] @ centroids.T, axis=1)
+        for i in range(0, len(vectors), block)
+    ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
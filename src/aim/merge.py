@@ -0,0 +1,235 @@
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .blob_store import read_failures
+from .files import PathLike, load_json, save_json
+from .models.llm.usage_stats import accumulate_section, drain_service_stats
+
+try:
+    import fcntl
+except ImportError:  # Windows: merges there are only safe from one process
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: PathLike):
+    """Exclusive lock on ``<path>.lock``, held across processes."""
+    lock_path = Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def shard_matches(name: str, shard: Optional[str]) -> bool:
+    """Whether shard ``name`` is ``shard`` or one of its xdist sub-shards (``<shard>-<worker>``)."""
+    return shard is None or name == shard or name.startswith(f"{shard}-")
+
+
+def suggested_threshold(scores: List[float]) -> float:
+    return float(min(scores) * 0.80)
+
+
+def refresh_baseline_stats(entry: Dict):
+    arr = np.array(entry["scores"])
+    if not len(arr):
+        return entry
+    entry["mean"] = float(arr.mean())
+    entry["std"] = float(arr.std()) if len(arr) > 1 else 0.0
+    entry["suggested_threshold"] = suggested_threshold(entry["scores"])
+    return entry
+
+
+def add_report_score(report_path: PathLike, key: str, score: float):
+    report_path = Path(report_path)
+    data = load_json(report_path, {})
+
+    if key not in data:
+        data[key] = {"count": 0, "avg": 0.0}
+
+    entry = data[key]
+    c = entry["count"]
+    entry["avg"] = (entry["avg"] * c + score) / (c + 1)
+    entry["count"] = c + 1
+
+    save_json(report_path, data)
+
+
+def add_service_stats(report_path: PathLike, llm_service):
+    """Move the stats ``llm_service`` recorded into the report."""
+    report_path = Path(report_path)
+    data = load_json(report_path, {})
+    if drain_service_stats(data, llm_service):
+        save_json(report_path, data)
+
+
+def save_report(report_path: PathLike, report: Dict):
+    save_json(Path(report_path), report)
+
+
+def merge_reports(paths: Iterable[PathLike]) -> Dict:
+    merged: Dict[str, Dict] = {}
+    for path in paths:
+        for key, entry in load_json(Path(path), {}).items():
+            if accumulate_section(merged, key, entry):
+                continue
+            total = merged.setdefault(key, {"count": 0, "avg": 0.0})
+            count = total["count"] + entry["count"]
+            if count:
+                total["avg"] = (total["avg"] * total["count"] + entry["avg"] * entry["count"]) / count
+            total["count"] = count
+            if "failed" in entry:
+                total["failed"] = total.get("failed", 0) + entry["failed"]
+    return merged
+
+
+def merge_failures(paths: Iterable[PathLike], output_path: PathLike) -> int:
+    """Append the entries of failures files (JSONL, or legacy JSON) to
+    ``output_path`` as JSONL, streaming, and return how many were written.
+
+    Blob references are copied as-is, so the merged file shares the blob
+    store of its inputs.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with output_path.open("a", encoding="utf-8") as out:
+        for path in paths:
+            for entry in read_failures(path):
+                out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                count += 1
+    return count
+
+
+def merge_output_shards(output_file: PathLike, kind: str, shard: Optional[str] = None):
+    """Fold ``<dir>/shards/<kind>_<timestamp>.*.json[l]`` into ``output_file``.
+
+    ``kind`` is ``"report"`` or ``"failures"``; shard files are removed once
+    merged. Only ``shard`` and its sub-shards are merged when given.
+    """
+    output_file = Path(output_file)
+    shards = [
+        path
+        for path in sorted((output_file.parent / "shards").glob(f"{output_file.stem}.*{output_file.suffix}"))
+        if shard_matches(path.name[len(output_file.stem) + 1:-len(output_file.suffix)], shard)
+    ]
+    if not shards:
+        return None
+
+    with file_lock(output_file):
+        if kind == "failures":
+            merge_failures(shards, output_file)
+        else:
+            sources = ([output_file] if output_file.exists() else []) + shards
+            save_json(output_file, merge_reports(sources))
+
+        for path in shards:
+            path.unlink()
+    return output_file
+
+
+def merge_shard_outputs(output_dir: PathLike, kind: str, suffix: str, shard: str) -> List[Path]:
+    """Merge the ``kind`` shards ``shard`` wrote, whatever their timestamps.
+
+    Used by a parent process that doesn't know its children's timestamps.
+    """
+    output_dir = Path(output_dir)
+    outputs = set()
+    for path in (output_dir / "shards").glob(f"{kind}_*{suffix}"):
+        stem, _, name = path.name[:-len(suffix)].partition(".")
+        if shard_matches(name, shard):
+            outputs.add(output_dir / f"{stem}{suffix}")
+    return [output for output in sorted(outputs) if merge_output_shards(output, kind, shard)]
+
+
+def merge_reference_shards(reference_dir: PathLike, shard: Optional[str] = None) -> List[Path]:
+    """Fold reference shards into ``<reference_dir>/<reference_id>.json``.
+
+    Shards live at ``<reference_dir>/shards/<reference_id>.<shard>.json``.
+    Entries carrying a ``reference`` replace the stored one (set-reference),
+    and ``scores`` are appended to it (set-baseline) before stats are
+    recomputed. Only ``shard`` and its sub-shards (``<shard>-<worker>``) are
+    merged when given, otherwise every shard. Each reference file is updated
+    under a file lock, so concurrent mergers don't lose each other's scores.
+    """
+    reference_dir = Path(reference_dir)
+    updated = []
+
+    for shard_path in sorted((reference_dir / "shards").glob("*.json")):
+        reference_id, _, name = shard_path.stem.rpartition(".")
+        if not shard_matches(name, shard):
+            continue
+        ref_path = reference_dir / f"{reference_id}.json"
+        with file_lock(ref_path):
+            data = load_json(ref_path, {"semantic_similarity": {}})
+            shard_data = load_json(shard_path, {"semantic_similarity": {}})
+
+            for assertion_id, shard_entry in shard_data["semantic_similarity"].items():
+                if shard_entry.get("reference") is not None:
+                    data["semantic_similarity"][assertion_id] = shard_entry
+                elif assertion_id in data["semantic_similarity"]:
+                    entry = data["semantic_similarity"][assertion_id]
+                    entry["scores"].extend(shard_entry.get("scores", []))
+                    refresh_baseline_stats(entry)
+
+            save_json(ref_path, data)
+            shard_path.unlink()
+        if ref_path not in updated:
+            updated.append(ref_path)
+
+    return updated
+
+
+def merge_results(paths: Iterable[PathLike], output_path: PathLike) -> Dict:
+    """Concatenate result JSONL files, streaming, and count items and errors."""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    totals = {"items": 0, "errors": 0}
+
+    with output_path.open("w", encoding="utf-8") as out:
+        for path in paths:
+            with Path(path).open("r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    out.write(line if line.endswith("\n") else line + "\n")
+                    totals["items"] += 1
+                    if "error" in json.loads(line):
+                        totals["errors"] += 1
+    return totals
+
+
+def merge_runs(
+    output_dir: PathLike,
+    results: Iterable[PathLike] = (),
+    reports: Iterable[PathLike] = (),
+    failures: Iterable[PathLike] = (),
+) -> Dict:
+    """Combine per-shard results, reports and failures into ``output_dir``."""
+    output_dir = Path(output_dir)
+    summary: Dict = {}
+
+    results, reports, failures = list(results), list(reports), list(failures)
+    if results:
+        summary.update(merge_results(results, output_dir / "results.jsonl"))
+    if reports:
+        report = merge_reports(reports)
+        for entry in report.values():
+            if "failed" in entry and entry.get("count"):
+                entry["pass_rate"] = 1 - entry["failed"] / entry["count"]
+        save_json(output_dir / "report.json", report)
+        summary["report"] = report
+    if failures:
+        failures_path = output_dir / "failures.jsonl"
+        failures_path.unlink(missing_ok=True)
+        summary["failures"] = merge_failures(failures, failures_path)
+    return summary
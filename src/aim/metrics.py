@@ -1,18 +1,33 @@
-import json
+import asyncio
 import math
+import sqlite3
+import threading
+from concurrent.futures import Future
 from pathlib import Path
 from typing import Dict, List, Optional, Union
+from .batch_runner import batch_runner_for, is_batch_enabled
+from .blob_store import BlobStore, append_jsonl
+from .cache import SqliteCache, content_hash
 from .claim_checking.claim_checker import ClaimChecker
-from .claim_checking.mcp_checker import MCPChecker
-from .claim_checking.vector_checker import RetrieverChecker
+from .claim_checking.claim_normalization import dedupe_claims
 from .models.embeddings.embeddings_service import EmbeddingService
 from .models.llm.llm_service import LLMService
-from .claim_checking.web_checker import WebChecker
+from .daemon import embedding_service_for, llm_service_for
 from .data_sources import DataSource
-from sklearn.metrics.pairwise import cosine_similarity
-from .state import ExecutionMode, ExecutionModes, get_mode
+from .evaluation_pool import EvaluationPool
+from .files import load_json, save_json
+from .history import HistoryStore, is_history_enabled
+from .merge import (
+    add_report_score,
+    add_service_stats,
+    file_lock,
+    refresh_baseline_stats,
+)
+from .state import ExecutionContext, ExecutionModes, current_context
 import numpy as np
 
+_io_lock = threading.RLock()
+
 class Metrics:
     def __init__(
         self,
@@ -24,27 +39,103 @@ class Metrics:
         claim_check_threshold: Optional[float] = None,
         criteria_check_threshold: Optional[float] = None,
         similarity_threshold: Optional[float] = None,
+        max_workers: int = 4,
+        max_pending: Optional[int] = None,
+        llm_service: Optional[LLMService] = None,
+        embeds_service: Optional[EmbeddingService] = None,
+        context: Optional[ExecutionContext] = None,
+        max_votes: Optional[int] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_budget: Optional[float] = None,
+        fallback_model: Optional[str] = None,
     ):
         self.reference_id = reference_id
-        self.llm_service = LLMService(llm_api_key, llm_model)
-        self.embeds_service = EmbeddingService(embed_api_key, embed_model)
+        # Without its own context a Metrics follows the caller's (see state.use_context).
+        self._context = context
+        hedging = {"hedge_percentile": hedge_percentile, "hedge_budget": hedge_budget, "fallback_model": fallback_model}
+        if llm_service is not None:
+            # A passed-in service keeps its own hedging; configure it there.
+            given = [name for name, value in hedging.items() if value is not None]
+            if given:
+                raise ValueError(f"{', '.join(given)} can't be applied to a passed-in llm_service")
+        self.llm_service = llm_service or llm_service_for(llm_api_key, llm_model, **hedging)
+        # None defers to the service's own max_votes (AIM_MAX_VOTES).
+        self.max_votes = max_votes
+        self.embeds_service = embeds_service or (
+            embedding_service_for(embed_api_key, embed_model) if embed_model else None
+        )
         self.claim_check_threshold = claim_check_threshold
         self.criteria_check_threshold = criteria_check_threshold
         self.similarity_threshold = similarity_threshold
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool: Optional[EvaluationPool] = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def context(self) -> ExecutionContext:
+        return self._context or current_context()
+
+    @property
+    def pool(self) -> EvaluationPool:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = EvaluationPool(self.max_workers, self.max_pending)
+            return self._pool
+
+    def submit_similarity_score(
+        self, candidate: str, assertion_id: str, threshold: Optional[float] = None
+    ) -> Future:
+        return self.pool.submit(self.similarity_score, candidate, assertion_id, threshold)
+
+    def submit_criteria_check(
+        self, content: str, criteria: List[str], threshold: Optional[float] = None
+    ) -> Future:
+        return self.pool.submit(self.criteria_check, content, criteria, threshold)
+
+    def submit_claim_check(
+        self,
+        content: Optional[str],
+        data_source: DataSource,
+        threshold: Optional[float] = None,
+        **kwargs
+    ) -> Future:
+        return self.pool.submit(self.claim_check, content, data_source, threshold, **kwargs)
+
+    async def asubmit_similarity_score(
+        self, candidate: str, assertion_id: str, threshold: Optional[float] = None
+    ) -> asyncio.Future:
+        return await self.pool.asubmit(self.similarity_score, candidate, assertion_id, threshold)
 
-    def _load_json(self, path: Path, default):
-        if not path.exists():
-            return default
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+    async def asubmit_criteria_check(
+        self, content: str, criteria: List[str], threshold: Optional[float] = None
+    ) -> asyncio.Future:
+        return await self.pool.asubmit(self.criteria_check, content, criteria, threshold)
+
+    async def asubmit_claim_check(
+        self,
+        content: Optional[str],
+        data_source: DataSource,
+        threshold: Optional[float] = None,
+        **kwargs
+    ) -> asyncio.Future:
+        return await self.pool.asubmit(self.claim_check, content, data_source, threshold, **kwargs)
+
+    def close(self, wait: bool = True, cancel_pending: bool = False):
+        """Drain (or cancel) background evaluations and release the pool."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_pending=cancel_pending)
 
-    def _save_json(self, path: Path, data):
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def similarity_score(self, candidate: str, assertion_id: str, threshold: Optional[float] = None):
-        handler = self._handler(get_mode(), threshold)
+        handler = self._handler(self.context.mode, threshold)
         return handler(candidate, assertion_id)
 
     def _handler(self, mode, threshold=None):
@@ -56,8 +147,8 @@ class Metrics:
         }[mode]
 
     def _assert_similarity(self, candidate, assertion_id, threshold=None):
-        ref_path = Path(ExecutionMode.reference_dir) / f"{self.reference_id}.json"
-        data = self._load_json(ref_path, {"semantic_similarity": {}})
+        ref_path = Path(self.context.reference_dir) / f"{self.reference_id}.json"
+        data = load_json(ref_path, {"semantic_similarity": {}})
         entry = data["semantic_similarity"][assertion_id]
 
         score = self._cosim(candidate, entry["reference"])
@@ -65,6 +156,7 @@ class Metrics:
                else self.similarity_threshold if self.similarity_threshold is not None 
                else entry["suggested_threshold"])
 
+        self._record_history("semantic_similarity", score, score >= thr, assertion=assertion_id)
         if score < thr:
             self._save_failure("semantic_similarity", {
                 "assertion_id": assertion_id,
@@ -78,74 +170,100 @@ class Metrics:
         return score
 
     def _set_reference(self, candidate, assertion_id):
-        ref_path = Path(ExecutionMode.reference_dir) / f"{self.reference_id}.json"
-        data = self._load_json(ref_path, {"semantic_similarity": {}})
-        data["semantic_similarity"][assertion_id] = {
-            "reference": candidate,
-            "scores": [],
-            "mean": None,
-            "std": None,
-            "suggested_threshold": None,
-        }
-        self._save_json(ref_path, data)
+        ref_path = self._reference_write_path()
+        with _io_lock, file_lock(ref_path):
+            data = load_json(ref_path, {"semantic_similarity": {}})
+            data["semantic_similarity"][assertion_id] = {
+                "reference": candidate,
+                "scores": [],
+                "mean": None,
+                "std": None,
+                "suggested_threshold": None,
+            }
+            save_json(ref_path, data)
 
     def _set_baseline(self, candidate, assertion_id):
-        ref_path = Path(ExecutionMode.reference_dir) / f"{self.reference_id}.json"
-        data = self._load_json(ref_path, {"semantic_similarity": {}})
+        ref_path = Path(self.context.reference_dir) / f"{self.reference_id}.json"
+        data = load_json(ref_path, {"semantic_similarity": {}})
         entry = data["semantic_similarity"][assertion_id]
 
         score = self._cosim(candidate, entry["reference"])
-        entry["scores"].append(score)
 
-        arr = np.array(entry["scores"])
-        entry["mean"] = float(arr.mean())
-        entry["std"] = float(arr.std()) if len(arr) > 1 else 0.0
-        entry["suggested_threshold"] = float(arr.min() * 0.80)
+        write_path = self._reference_write_path()
+        with _io_lock, file_lock(write_path):
+            data = load_json(write_path, {"semantic_similarity": {}})
+            entry = data["semantic_similarity"].setdefault(assertion_id, {"scores": []})
+            entry["scores"].append(score)
+            if "reference" in entry:
+                refresh_baseline_stats(entry)
 
-        self._save_json(ref_path, data)
+            save_json(write_path, data)
         return score
 
+    def _reference_write_path(self) -> Path:
+        # Sharded processes write to their own file; merge.merge_reference_shards
+        # folds those back into the reference file.
+        context = self.context
+        reference_dir = Path(context.reference_dir)
+        if context.shard:
+            return reference_dir / "shards" / f"{self.reference_id}.{context.shard}.json"
+        return reference_dir / f"{self.reference_id}.json"
+
     def _report_similarity(self, candidate, assertion_id):
-        ref_path = Path(ExecutionMode.reference_dir) / f"{self.reference_id}.json"
-        data = self._load_json(ref_path, {"semantic_similarity": {}})
+        ref_path = Path(self.context.reference_dir) / f"{self.reference_id}.json"
+        data = load_json(ref_path, {"semantic_similarity": {}})
         entry = data["semantic_similarity"][assertion_id]
 
         score = self._cosim(candidate, entry["reference"])
         self._update_global("semantic_similarity", score)
+        self._record_history("semantic_similarity", score, assertion=assertion_id)
         return score
 
     def _update_global(self, key, score):
-        report_path = Path(ExecutionMode.report_file)
-        data = self._load_json(report_path, {})
-
-        if key not in data:
-            data[key] = {"count": 0, "avg": 0.0}
-
-        entry = data[key]
-        c = entry["count"]
-        entry["avg"] = (entry["avg"] * c + score) / (c + 1)
-        entry["count"] = c + 1
-
-        self._save_json(report_path, data)
+        with _io_lock:
+            add_report_score(self.context.report_file, key, score)
+
+    def _record_history(self, metric, score, passed=None, assertion=None):
+        self._record_history_rows([(metric, score, passed, assertion)])
+
+    def _record_history_rows(self, rows):
+        """Record ``(metric, score, passed, assertion)`` rows in one transaction."""
+        if not is_history_enabled():
+            return
+        context = self.context
+        try:
+            HistoryStore.open(context.history_file).record_many(
+                {
+                    "run_id": context.run_id, "metric": metric, "score": score, "passed": passed,
+                    "reference_id": self.reference_id, "assertion": assertion, "mode": context.mode.value,
+                }
+                for metric, score, passed, assertion in rows
+            )
+        except sqlite3.Error as e:
+            print(f"Failed to record {rows[0][0]} in {context.history_file}: {e}")
 
     def _save_failure(self, metric_type, result):
-        failures_path = Path(ExecutionMode.failures_file)
-        data = self._load_json(failures_path, {"failures": []})
-        data["failures"].append({
-            "metric_type": metric_type,
-            "result": result
-        })
-        self._save_json(failures_path, data)
+        # Long texts go to the blob store once; the entry keeps their hashes.
+        store = BlobStore.open(self.context.blob_dir)
+        entry = {"metric_type": metric_type, "result": store.pack(result)}
+        with _io_lock:
+            append_jsonl(self.context.failures_file, entry)
 
     def _cosim(self, a, b):
-        ea = np.array(self.embeds_service.embed(a)).reshape(1, -1)
-        eb = np.array(self.embeds_service.embed(b)).reshape(1, -1)
-        return float(cosine_similarity(ea, eb)[0][0])
+        if self.embeds_service is None:
+            raise ValueError("An embedding model is required for similarity scores")
+        ea, eb = (np.asarray(e, dtype=float) for e in self.embeds_service.embed_batch([a, b]))
+        norm = np.linalg.norm(ea) * np.linalg.norm(eb)
+        return float(ea @ eb / norm) if norm else 0.0
     
     def criteria_check(
         self, content: str, criteria: List[str], threshold: Optional[float] = None
     ):
-        mode = get_mode()
+        mode = self.context.mode
+        if mode == ExecutionModes.REPORT and is_batch_enabled():
+            batch_runner_for(self.llm_service, self.context).add_criteria(content, criteria, self.reference_id)
+            return None
+
         if mode in [ExecutionModes.ASSERT, ExecutionModes.REPORT]:
             result = self._criteria_check_handler(content, criteria)
             handler = self._criteria_handler(mode, threshold)
@@ -162,7 +280,8 @@ class Metrics:
     def _assert_criteria(self, result, threshold=None):
         threshold = (threshold if threshold is not None 
                      else self.criteria_check_threshold if self.criteria_check_threshold is not None 
-                     else ExecutionMode.default_thresholds.general_criteria) * 100
+                     else self.context.default_thresholds.general_criteria) * 100
+        self._record_criteria_history(result, result["score"] >= threshold)
         if result["score"] < threshold:
             self._save_failure("criteria_check", result)
             raise AssertionError(f"Criteria check score {result['score']} < {threshold}")
@@ -170,8 +289,17 @@ class Metrics:
 
     def _report_criteria(self, result):
         self._update_global("criteria_check", result["score"])
+        self._report_service_stats()
+        self._record_criteria_history(result)
         return result
 
+    def _record_criteria_history(self, result, passed=None):
+        # One row per criterion, so `aim history worst` can single out the ones that fail.
+        self._record_history_rows([("criteria_check", result["score"], passed, None)] + [
+            ("criterion", 100.0 if criterion["result"] else 0.0, bool(criterion["result"]), criterion["criterion"])
+            for criterion in result["criteria"]
+        ])
+
     def _criteria_check_handler(
         self, content: str, criteria: List[str]
     ):
@@ -179,7 +307,7 @@ class Metrics:
 
         for criterion in criteria:
             llm_judgement_result = self.llm_service.evaluate_criterion(
-                criterion, content
+                criterion, content, max_votes=self.max_votes
             )
             results.append(llm_judgement_result)
 
@@ -205,7 +333,11 @@ class Metrics:
         threshold: Optional[float] = None,
         **kwargs
     ):
-        mode = get_mode()
+        mode = self.context.mode
+        if mode == ExecutionModes.REPORT and is_batch_enabled() and data_source not in (DataSource.MCP, DataSource.LOCAL_INDEX):
+            await self._queue_claim_batch(content, data_source, **kwargs)
+            return None
+
         if mode in [ExecutionModes.ASSERT, ExecutionModes.REPORT]:
             result = await self._claim_check_handler(content, data_source, **kwargs)
             handler = self._claim_handler(mode, threshold)
@@ -222,7 +354,8 @@ class Metrics:
     def _assert_claim(self, result, threshold=None):
         threshold = (threshold if threshold is not None 
                      else self.claim_check_threshold if self.claim_check_threshold is not None 
-                     else ExecutionMode.default_thresholds.claim_check) * 100
+                     else self.context.default_thresholds.claim_check) * 100
+        self._record_history("claim_check", result["total_score"], result["total_score"] >= threshold)
         if result["total_score"] < threshold:
             self._save_failure("claim_check", result)
             raise AssertionError(f"Claim check score {result['total_score']} < {threshold}")
@@ -230,25 +363,42 @@ class Metrics:
 
     def _report_claim(self, result):
         self._update_global("claim_check", result["total_score"])
+        self._report_service_stats()
+        self._record_history("claim_check", result["total_score"])
         return result
 
+    def _report_service_stats(self):
+        with _io_lock:
+            add_service_stats(self.context.report_file, self.llm_service)
+
     async def _claim_check_handler(
         self,
         content: Optional[str],
         data_source: DataSource,
         **kwargs
     ) -> List[Dict[str, Union[str, bool]]]:
-        claims = self.llm_service.extract_claims(content)
+        claims = self._extract_claims(content)
+        unique_claims, owners = dedupe_claims(claims)
 
         call_args = self._collect_args(data_source, **kwargs)
 
         checker = self._get_checker(data_source)
 
-        reference = await checker.fetch_reference(claims=claims, **call_args)
+        reference = await checker.fetch_reference(claims=unique_claims, **call_args)
 
         chunked_reference = checker.chunk_content(reference)
 
-        claim_check_result = checker.check_claims(claims=claims, content_chunks=chunked_reference)
+        unique_results = checker.check_claims(
+            claims=unique_claims,
+            content_chunks=chunked_reference,
+            verdict_cache=SqliteCache.open(Path(self.context.cache_dir) / "verdicts.sqlite"),
+            max_votes=self.max_votes,
+        )
+
+        claim_check_result = [
+            {**unique_results[owner], "claim": claim}
+            for claim, owner in zip(claims, owners)
+        ]
 
         score = 0
 
@@ -265,18 +415,51 @@ class Metrics:
         }
 
 
+    async def _queue_claim_batch(self, content: str, data_source: DataSource, **kwargs):
+        # MCP and local index references depend on the extracted claims, so
+        # only sources that don't need them are deferred to the batch.
+        call_args = self._collect_args(data_source, **kwargs)
+        checker = self._get_checker(data_source)
+        reference = await checker.fetch_reference(claims=[], **call_args)
+        batch_runner_for(self.llm_service, self.context).add_claims(
+            content, checker.chunk_content(reference), self.reference_id
+        )
+
+    def _extract_claims(self, content: str) -> List[str]:
+        cache = SqliteCache.open(Path(self.context.cache_dir) / "claims.sqlite")
+        key = content_hash(self.llm_service.model.value, str(self._votes()), content)
+
+        claims = cache.get(key)
+        if claims is None:
+            claims = self.llm_service.extract_claims(content)
+            if isinstance(claims, list):
+                cache.set(key, claims)
+        return claims
+
+    def _votes(self) -> int:
+        return self.max_votes or self.llm_service.max_votes
+
     def _collect_args(self, data_source, **kwargs):
         args = {arg: kwargs.get(arg) for arg in data_source.required_args}
         missing = [k for k, v in args.items() if not v or (isinstance(v, str) and not v.strip())]
         if missing:
             raise ValueError(f"Missing required args for {data_source.name}: {missing}")
+        args.update({arg: kwargs[arg] for arg in data_source.optional_args if kwargs.get(arg) is not None})
         return args
     
     def _get_checker(self, data_source: DataSource) -> ClaimChecker:
+        # Checkers pull in their source's dependencies (mcp, pypdf, bs4,
+        # requests), so they're only imported once a check needs them.
+        from .claim_checking.local_index_checker import LocalIndexChecker
+        from .claim_checking.mcp_checker import MCPChecker
+        from .claim_checking.vector_checker import RetrieverChecker
+        from .claim_checking.web_checker import WebChecker
+
         checker_factory = {
             DataSource.WEB: lambda: WebChecker(self.llm_service),
             DataSource.MCP: lambda: MCPChecker(self.llm_service),
             DataSource.RETRIEVER: lambda: RetrieverChecker(self.llm_service),
+            DataSource.LOCAL_INDEX: lambda: LocalIndexChecker(self.llm_service, self.embeds_service),
         }
 
         return checker_factory[data_source]()
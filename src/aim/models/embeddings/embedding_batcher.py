@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embed requests into batched ``embed_texts`` calls.
+
+    Up to ``max_in_flight`` batches are sent at once. A request that finds
+    a sender free goes out right away, together with whatever else is
+    already waiting; while every sender is busy, new requests queue up and
+    leave as one batch of at most ``max_batch_size`` texts and roughly
+    ``max_batch_tokens`` tokens when the next one frees up. ``max_wait_ms``
+    optionally holds a batch open a little longer for more requests. Each
+    caller gets a future for its own embedding.
+    """
+
+    def __init__(
+        self,
+        embed_texts: Callable[[List[str]], List[List[float]]],
+        max_wait_ms: float = 0.0,
+        max_batch_size: int = 64,
+        max_batch_tokens: int = 100_000,
+        before_request: Optional[Callable[[], None]] = None,
+        max_in_flight: int = 4,
+    ):
+        self.embed_texts = embed_texts
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.before_request = before_request
+        self.max_in_flight = max_in_flight
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._held: Optional[Tuple[str, Future]] = None
+        self._senders = threading.Semaphore(max_in_flight)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        self._ensure_worker()
+        return future
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_in_flight, thread_name_prefix="aim-embed")
+                self._thread = threading.Thread(
+                    target=self._work, name="aim-embed-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _work(self):
+        while True:
+            first = self._held or self._queue.get()
+            self._held = None
+            # Requests arriving while every sender is busy join this batch.
+            self._senders.acquire()
+            # Drop requests whose callers gave up; the rest can't be cancelled now.
+            batch = [item for item in self._collect(first) if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                self._senders.release()
+                continue
+            self._executor.submit(self._send, batch)
+
+    def _send(self, batch: List[Tuple[str, Future]]):
+        texts = [text for text, _ in batch]
+        try:
+            if self.before_request:
+                self.before_request()
+            embeddings = self.embed_texts(texts)
+            if len(embeddings) != len(texts):
+                # Which vector belongs to which text is unknown now.
+                raise RuntimeError(f"Embedding request returned {len(embeddings)} vectors for {len(texts)} texts")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._senders.release()
+        for (_, future), embedding in zip(batch, embeddings):
+            future.set_result(embedding)
+
+    def _collect(self, first: Tuple[str, Future]) -> List[Tuple[str, Future]]:
+        batch = [first]
+        tokens = _estimate_tokens(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            item_tokens = _estimate_tokens(item[0])
+            if tokens + item_tokens > self.max_batch_tokens:
+                # Starts the next batch instead.
+                self._held = item
+                break
+            batch.append(item)
+            tokens += item_tokens
+        return batch
+
+
+def _estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text; close enough to
+    # stay under provider request limits without loading a tokenizer.
+    return len(text) // 4 + 1
@@ -1,15 +1,38 @@
+import asyncio
+from functools import cached_property
+from typing import List
+
 from langchain_core.embeddings.embeddings import Embeddings
-from langchain_openai import OpenAIEmbeddings
-from langchain_voyageai import VoyageAIEmbeddings
 from ..providers import ModelProvider
+from ..rate_limiter import shared_rate_limiter
 from .embed_models import EmbedModels
+from .embedding_batcher import EmbeddingBatcher
+
+def _openai_embeddings():
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings
+
+
+def _voyage_embeddings():
+    from langchain_voyageai import VoyageAIEmbeddings
+    return VoyageAIEmbeddings
+
 
 class EmbeddingService:
     def __init__(self, embed_api_key: str, embed_model: str):
         self.embed_api_key = embed_api_key
         self.embed_model_name = embed_model
         self.embed_model = self._get_model_enum()
-        self.client = self._get_embeddings_client()
+        # Concurrent embed calls share requests. Queries and documents are
+        # batched apart because Voyage embeds them with different input types.
+        self.batcher = EmbeddingBatcher(self._embed_queries, before_request=self._throttle)
+        self.document_batcher = EmbeddingBatcher(self._embed_documents, before_request=self._throttle)
+
+    @cached_property
+    def client(self) -> Embeddings:
+        # Built on first use: services whose calls run elsewhere (the
+        # daemon's RemoteEmbeddingService) never need one.
+        return self._get_embeddings_client()
 
     def _get_model_enum(self) -> EmbedModels:
         """Find the model enum matching the model name string."""
@@ -19,15 +42,53 @@ class EmbeddingService:
         raise ValueError(f"Unknown embedding model: {self.embed_model_name}")
 
     def embed(self, content: str) -> list[float]:
-        return self.client.embed_query(content)
+        return self.batcher.submit(content).result()
+
+    async def aembed(self, content: str) -> list[float]:
+        return await asyncio.wrap_future(self.batcher.submit(content))
+
+    def embed_batch(self, contents: List[str]) -> List[list[float]]:
+        """Embed each text as ``embed`` would, sharing requests."""
+        futures = [self.batcher.submit(content) for content in contents]
+        return [future.result() for future in futures]
+
+    def embed_documents(self, contents: List[str]) -> List[list[float]]:
+        """Embed texts to be searched, such as index chunks."""
+        futures = [self.document_batcher.submit(content) for content in contents]
+        return [future.result() for future in futures]
+
+    def _embed_queries(self, texts: List[str]) -> List[list[float]]:
+        """``embed_query`` for several texts in one request."""
+        if self.embed_model.provider == ModelProvider.VOYAGE_AI:
+            # VoyageAIEmbeddings only embeds one query per request, so
+            # batches go to the Voyage client directly.
+            return self._voyage_client.embed(
+                texts, model=self.embed_model_name, input_type="query", truncation=True
+            ).embeddings
+        # OpenAI embeds queries and documents alike.
+        return self.client.embed_documents(texts)
+
+    @cached_property
+    def _voyage_client(self):
+        import voyageai
+        return voyageai.Client(api_key=self.embed_api_key)
+
+    def _embed_documents(self, texts: List[str]) -> List[list[float]]:
+        return self.client.embed_documents(texts)
+
+    @staticmethod
+    def _throttle():
+        limiter = shared_rate_limiter()
+        if limiter:
+            limiter.acquire()
     
     def _get_embeddings_client(self) -> Embeddings:
         client_factory = {
-            ModelProvider.VOYAGE_AI: lambda: VoyageAIEmbeddings(
+            ModelProvider.VOYAGE_AI: lambda: _voyage_embeddings()(
                 voyage_api_key=self.embed_api_key, 
                 model=self.embed_model_name
             ),
-            ModelProvider.OPENAI: lambda: OpenAIEmbeddings(
+            ModelProvider.OPENAI: lambda: _openai_embeddings()(
                 api_key=self.embed_api_key,
                 model=self.embed_model_name
             )
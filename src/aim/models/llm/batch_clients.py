@@ -0,0 +1,262 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .llm_models import LLMModel, ModelProvider
+
+
+class BatchRequest:
+    def __init__(
+        self,
+        custom_id: str,
+        prompt: Union[str, List[Dict]],
+        tool_name: str,
+        tool_description: str,
+        tool_schema: Dict,
+    ):
+        self.custom_id = custom_id
+        self.prompt = prompt
+        self.tool_name = tool_name
+        self.tool_description = tool_description
+        self.tool_schema = tool_schema
+
+
+class BatchClient(ABC):
+    """Submits forced-tool-call requests through a provider's batch endpoint.
+
+    Every submission carries a caller-chosen ``key`` so that ``find`` can
+    tell whether a submission interrupted before its id was recorded
+    reached the provider.
+    """
+
+    default_base_url: str
+    # Per-batch provider limits on request count and payload size.
+    max_requests: int
+    max_bytes: int
+
+    def __init__(self, api_key: str, model: LLMModel, base_url: Optional[str] = None, timeout: float = 60.0):
+        self.api_key = api_key
+        self.model = model
+        # AIM_BATCH_BASE_URL points every client at a local stand-in server.
+        self.base_url = (base_url or os.getenv("AIM_BATCH_BASE_URL") or self.default_base_url).rstrip("/")
+        import httpx
+
+        self.client = httpx.Client(base_url=self.base_url, headers=self._headers(), timeout=timeout)
+
+    def close(self):
+        self.client.close()
+
+    @abstractmethod
+    def submit(self, requests: List[BatchRequest], key: str) -> str:
+        """Create a batch and return its id."""
+
+    @abstractmethod
+    def find(self, key: str, submitted_after: float, count: int) -> Optional[str]:
+        """The id of a batch submitted with ``key``, if the provider has one."""
+
+    def split(self, requests: List[BatchRequest]) -> List[Tuple[int, int]]:
+        """``[start, end)`` ranges of ``requests`` that each fit in one batch."""
+        parts = []
+        start, size = 0, 0
+        for i, request in enumerate(requests):
+            request_size = len(json.dumps(self._payload(request)).encode("utf-8")) + 1
+            if i > start and (i - start >= self.max_requests or size + request_size > self.max_bytes):
+                parts.append((start, i))
+                start, size = i, 0
+            size += request_size
+        if start < len(requests):
+            parts.append((start, len(requests)))
+        return parts
+
+    @abstractmethod
+    def _payload(self, request: BatchRequest) -> Dict:
+        """The provider's representation of one request."""
+
+    @abstractmethod
+    def is_done(self, batch_id: str) -> bool:
+        """Whether the provider has finished processing the batch."""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Map each custom id to its tool-call arguments (None if it failed)."""
+
+    @abstractmethod
+    def _headers(self) -> Dict[str, str]:
+        pass
+
+    @staticmethod
+    def _jsonl(text: str):
+        for line in text.splitlines():
+            if line.strip():
+                yield json.loads(line)
+
+
+class OpenAIBatchClient(BatchClient):
+    default_base_url = "https://api.openai.com/v1"
+    max_requests = 50_000
+    max_bytes = 200 * 1024 * 1024
+
+    def _headers(self):
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def _payload(self, request):
+        return {
+            "custom_id": request.custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.model.value,
+                "messages": [{"role": "user", "content": request.prompt}],
+                "tools": [{
+                    "type": "function",
+                    "function": {
+                        "name": request.tool_name,
+                        "description": request.tool_description,
+                        "parameters": request.tool_schema,
+                    },
+                }],
+                "tool_choice": {"type": "function", "function": {"name": request.tool_name}},
+            },
+        }
+
+    def submit(self, requests, key):
+        lines = [json.dumps(self._payload(request)) for request in requests]
+        upload = self.client.post(
+            "/files",
+            data={"purpose": "batch"},
+            files={"file": ("aim_batch.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+        )
+        upload.raise_for_status()
+
+        batch = self.client.post("/batches", json={
+            "input_file_id": upload.json()["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+            "metadata": {"aim_key": key},
+        })
+        batch.raise_for_status()
+        return batch.json()["id"]
+
+    def find(self, key, submitted_after, count):
+        params = {"limit": 100}
+        while True:
+            response = self.client.get("/batches", params=params)
+            response.raise_for_status()
+            page = response.json()
+            for batch in page.get("data", []):
+                if (batch.get("metadata") or {}).get("aim_key") == key:
+                    return batch["id"]
+                # Batches are listed newest first.
+                if batch.get("created_at", 0) < submitted_after - 60:
+                    return None
+            if not page.get("has_more") or not page.get("data"):
+                return None
+            params["after"] = page["data"][-1]["id"]
+
+    def is_done(self, batch_id):
+        response = self.client.get(f"/batches/{batch_id}")
+        response.raise_for_status()
+        status = response.json()["status"]
+        if status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"OpenAI batch {batch_id} ended with status {status}")
+        return status == "completed"
+
+    def results(self, batch_id):
+        batch = self.client.get(f"/batches/{batch_id}")
+        batch.raise_for_status()
+        output_file_id = batch.json().get("output_file_id")
+        if not output_file_id:
+            return {}
+
+        content = self.client.get(f"/files/{output_file_id}/content")
+        content.raise_for_status()
+
+        results = {}
+        for line in self._jsonl(content.text):
+            response = line.get("response") or {}
+            try:
+                message = response["body"]["choices"][0]["message"]
+                arguments = message["tool_calls"][0]["function"]["arguments"]
+                results[line["custom_id"]] = json.loads(arguments)
+            except (KeyError, IndexError, TypeError, ValueError):
+                results[line["custom_id"]] = None
+        return results
+
+
+class AnthropicBatchClient(BatchClient):
+    """Anthropic batches carry no metadata, so ``find`` matches a batch of the
+    same size created right after the interrupted submission."""
+
+    default_base_url = "https://api.anthropic.com/v1"
+    max_requests = 100_000
+    max_bytes = 256 * 1024 * 1024
+
+    def _headers(self):
+        return {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
+
+    def _payload(self, request):
+        return {
+            "custom_id": request.custom_id,
+            "params": {
+                "model": self.model.value,
+                "max_tokens": 8192,
+                "messages": [{"role": "user", "content": request.prompt}],
+                "tools": [{
+                    "name": request.tool_name,
+                    "description": request.tool_description,
+                    "input_schema": request.tool_schema,
+                }],
+                "tool_choice": {"type": "tool", "name": request.tool_name},
+            },
+        }
+
+    def submit(self, requests, key):
+        response = self.client.post("/messages/batches", json={
+            "requests": [self._payload(request) for request in requests]
+        })
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def find(self, key, submitted_after, count):
+        response = self.client.get("/messages/batches", params={"limit": 100})
+        response.raise_for_status()
+        candidates = []
+        for batch in response.json().get("data", []):
+            created = datetime.fromisoformat(batch["created_at"].replace("Z", "+00:00")).timestamp()
+            if created >= submitted_after - 5 and sum((batch.get("request_counts") or {}).values()) == count:
+                candidates.append((created, batch["id"]))
+        return min(candidates)[1] if candidates else None
+
+    def is_done(self, batch_id):
+        response = self.client.get(f"/messages/batches/{batch_id}")
+        response.raise_for_status()
+        return response.json()["processing_status"] == "ended"
+
+    def results(self, batch_id):
+        response = self.client.get(f"/messages/batches/{batch_id}/results")
+        response.raise_for_status()
+
+        results = {}
+        for line in self._jsonl(response.text):
+            result = line.get("result") or {}
+            tool_input = None
+            if result.get("type") == "succeeded":
+                for block in result["message"].get("content", []):
+                    if block.get("type") == "tool_use":
+                        tool_input = block.get("input")
+                        break
+            results[line["custom_id"]] = tool_input
+        return results
+
+
+def batch_client_for(model: LLMModel, api_key: str, base_url: Optional[str] = None) -> BatchClient:
+    client_factory = {
+        ModelProvider.OPENAI: OpenAIBatchClient,
+        ModelProvider.ANTHROPIC: AnthropicBatchClient,
+    }.get(model.provider)
+
+    if client_factory is None:
+        raise ValueError(f"No batch API available for {model.provider.name}")
+    return client_factory(api_key, model, base_url)
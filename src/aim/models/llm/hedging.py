@@ -0,0 +1,312 @@
+"""Hedged LLM calls.
+
+A call still running when it passes the ``percentile``-th latency of recent
+calls with the same model and prompt gets a duplicate, sent to the same
+model or a fallback model. The first answer is used. Every call adds
+``AIM_HEDGE_BUDGET`` (a fraction) to a budget and every hedge spends one
+from it, so only that share of calls is ever sent twice.
+
+Only ``acall`` can cancel the losing request. Chains run through
+``invoke`` and ``batch``, which use ``call``, and there the loser keeps
+running until it answers and is billed like any request. Such orphaned
+requests hold the budget while they run: no new hedge is sent while
+``burst`` of them are still in flight, so a provider stall can't pile up
+duplicates faster than they finish.
+
+Deadlines come from the latency of primary requests alone, measured until
+each one answers even after a hedge won (async primaries are cancelled
+then, and count with the time they ran). Counting hedge and failover
+answers instead would pull the deadline down and trigger ever more hedges.
+
+``benchmarks/hedging.py`` measures the effect on tail latency against a
+stand-in provider.
+"""
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from .usage_stats import UsageStats
+
+T = TypeVar("T")
+
+DEFAULT_BUDGET = 0.05
+# Deadlines need enough history to mean anything; until then calls aren't hedged.
+MIN_SAMPLES = 20
+WINDOW = 500
+
+
+class LatencyTracker:
+    """Latencies of the last ``window`` calls."""
+
+    def __init__(self, window: int = WINDOW, min_samples: int = MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, max(0, math.ceil(percentile / 100 * len(latencies)) - 1))
+        return latencies[index]
+
+
+class HedgeBudget:
+    """Token bucket: every call earns ``rate`` tokens and each hedge spends
+    one, unless ``burst`` orphaned requests are still running."""
+
+    def __init__(self, rate: float = DEFAULT_BUDGET, burst: float = 10.0):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = 0.0
+        self._orphans = 0
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.rate)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1 or self._orphans >= self.burst:
+                return False
+            self._tokens -= 1
+            return True
+
+    def orphan(self, future: Future):
+        """Count ``future``, a losing request nobody waits for, until it finishes."""
+        with self._lock:
+            self._orphans += 1
+        future.add_done_callback(self._release_orphan)
+
+    def _release_orphan(self, _future: Future):
+        with self._lock:
+            self._orphans -= 1
+
+
+class HedgingStats(UsageStats):
+    """Hedged calls and their latency."""
+
+    REPORT_KEY = "hedging"
+    SUMS = ("requests", "hedged", "hedge_wins", "budget_denied", "failovers", "orphaned", "latency_sum")
+    MAXIMA = ("latency_max",)
+
+    def record(
+        self,
+        latency: float,
+        hedged: bool = False,
+        hedge_won: bool = False,
+        budget_denied: bool = False,
+        failover: bool = False,
+        orphaned: bool = False,
+    ):
+        with self._lock:
+            self.requests += 1
+            self.hedged += hedged
+            self.hedge_wins += hedge_won
+            self.budget_denied += budget_denied
+            self.failovers += failover
+            self.orphaned += orphaned
+            self.latency_sum += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    @staticmethod
+    def summarize(entry: Dict):
+        entry["hedge_rate"] = entry["hedged"] / entry["requests"] if entry["requests"] else 0.0
+        entry["hedge_win_rate"] = entry["hedge_wins"] / entry["hedged"] if entry["hedged"] else 0.0
+        entry["avg_latency"] = entry["latency_sum"] / entry["requests"] if entry["requests"] else 0.0
+
+
+class Hedger:
+    """Runs ``primary`` and, past the latency deadline, also ``hedge``.
+
+    ``percentile`` of ``None`` disables hedging. With ``failover``, a
+    primary that fails before any hedge was sent is retried with ``hedge``.
+    """
+
+    def __init__(
+        self,
+        percentile: Optional[float],
+        tracker: LatencyTracker,
+        budget: HedgeBudget,
+        stats: Optional[HedgingStats] = None,
+        failover: bool = False,
+    ):
+        self.percentile = percentile
+        self.tracker = tracker
+        self.budget = budget
+        self.stats = stats or HedgingStats()
+        self.failover = failover
+
+    def deadline(self) -> Optional[float]:
+        return self.tracker.percentile(self.percentile) if self.percentile else None
+
+    def call(self, primary: Callable[[], T], hedge: Callable[[], T]) -> T:
+        start = time.monotonic()
+        self.budget.earn()
+        deadline = self.deadline()
+        if deadline is None:
+            return self._unhedged(start, primary, hedge)
+
+        first = _start(self._timed(primary))
+        try:
+            result = first.result(timeout=deadline)
+        except FutureTimeoutError:
+            pass
+        except Exception:
+            if not self.failover:
+                raise
+            return self._finish(start, hedge(), failover=True)
+        else:
+            return self._finish(start, result)
+
+        if not self.budget.try_spend():
+            return self._finish(start, first.result(), budget_denied=True)
+
+        second = _start(hedge)
+        pending = {first, second}
+        errors = {}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The loser can't be interrupted mid-request; its
+                    # answer is dropped when it arrives.
+                    for loser in pending:
+                        self.budget.orphan(loser)
+                    return self._finish(
+                        start, future.result(), hedged=True, hedge_won=future is second, orphaned=bool(pending)
+                    )
+                errors[future] = future.exception()
+        raise errors.get(first) or errors[second]
+
+    async def acall(
+        self,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Callable[[], Awaitable[T]],
+    ) -> T:
+        start = time.monotonic()
+        self.budget.earn()
+        deadline = self.deadline()
+        if deadline is None:
+            try:
+                return self._finish(start, await self._atimed(primary))
+            except Exception:
+                if not self.failover:
+                    raise
+                return self._finish(start, await hedge(), failover=True)
+
+        first = asyncio.ensure_future(self._atimed(primary))
+        done, _ = await asyncio.wait({first}, timeout=deadline)
+        if done:
+            if first.exception() is None or not self.failover:
+                return self._finish(start, first.result())
+            return self._finish(start, await hedge(), failover=True)
+
+        if not self.budget.try_spend():
+            return self._finish(start, await first, budget_denied=True)
+
+        second = asyncio.ensure_future(hedge())
+        pending = {first, second}
+        errors = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return self._finish(start, task.result(), hedged=True, hedge_won=task is second)
+                    errors[task] = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise errors.get(first) or errors[second]
+
+    def _unhedged(self, start: float, primary: Callable[[], T], hedge: Callable[[], T]) -> T:
+        try:
+            result = self._timed(primary)()
+        except Exception:
+            if not self.failover:
+                raise
+            return self._finish(start, hedge(), failover=True)
+        return self._finish(start, result)
+
+    def _timed(self, primary: Callable[[], T]) -> Callable[[], T]:
+        """``primary``, recording its latency in the tracker when it answers."""
+        def run():
+            start = time.monotonic()
+            result = primary()
+            self.tracker.record(time.monotonic() - start)
+            return result
+        return run
+
+    async def _atimed(self, primary: Callable[[], Awaitable[T]]) -> T:
+        start = time.monotonic()
+        try:
+            result = await primary()
+        except asyncio.CancelledError:
+            # Cancelled after losing to a hedge: it took at least this long.
+            self.tracker.record(time.monotonic() - start)
+            raise
+        self.tracker.record(time.monotonic() - start)
+        return result
+
+    def _finish(self, start: float, result: T, **outcome) -> T:
+        self.stats.record(time.monotonic() - start, **outcome)
+        return result
+
+
+def _start(fn: Callable[[], T]) -> "Future[T]":
+    """Run ``fn`` on a new thread, in a copy of the caller's context.
+
+    Not a pool: a losing request keeps its thread until it answers, and new
+    calls must not queue behind it.
+    """
+    future: "Future[T]" = Future()
+    context = contextvars.copy_context()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(context.run(fn))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="aim-hedge", daemon=True).start()
+    return future
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_budgets: Dict[float, HedgeBudget] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_latency_tracker(key: str) -> LatencyTracker:
+    """Process-wide latency history for one model and prompt."""
+    with _shared_lock:
+        if key not in _trackers:
+            _trackers[key] = LatencyTracker()
+        return _trackers[key]
+
+
+def shared_hedge_budget(rate: Optional[float] = None) -> HedgeBudget:
+    """Process-wide budget letting ``rate`` of calls be hedged.
+
+    ``AIM_HEDGE_BUDGET`` is the default rate.
+    """
+    rate = rate or float(os.getenv("AIM_HEDGE_BUDGET", str(DEFAULT_BUDGET)))
+    with _shared_lock:
+        if rate not in _budgets:
+            _budgets[rate] = HedgeBudget(rate)
+        return _budgets[rate]
@@ -1,25 +1,31 @@
 import ast
+import asyncio
 import uuid
 import os
+from contextlib import AsyncExitStack
+from functools import lru_cache
 from langchain_core.language_models import BaseLanguageModel
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import BaseTool
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import HumanMessage
 import pydantic
 from ...tools.claim_check_tool import ClaimCheckTool
 from ...tools.claim_extraction_tool import ClaimExtractionTool
 from ...tools.return_record_tool_input import ReturnRecordToolInput
 from ...tools.criteria_tool import CriteriaEvalTool
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
+from ...claim_checking.claim_normalization import normalize_claim
 from pydantic import BaseModel
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from .llm_models import LLMModel as Model, ModelProvider
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from langchain_mcp_adapters.tools import load_mcp_tools
-from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
-from typing import List, Dict, Union
+from .batch_clients import BatchRequest
+from .prompt_cache import PromptCacheStats, split_prompt
+from .self_consistency import AgreementStats, vote
+from .hedging import Hedger, HedgingStats, shared_hedge_budget, shared_latency_tracker
+from ..rate_limiter import shared_rate_limiter
+from typing import List, Dict, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from mcp import StdioServerParameters
 
 
 class PromptConfig:
@@ -29,37 +35,119 @@ class PromptConfig:
     MCP = "../../../../prompts/mcp.txt"
 
 
+def _chat_openai():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI
+
+
+def _chat_anthropic():
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic
+
+
+@lru_cache(maxsize=None)
+def _read_prompt(prompt_path: str) -> str:
+    try:
+        # Resolve relative path relative to this file's location
+        if not os.path.isabs(prompt_path):
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            prompt_path = os.path.join(current_dir, prompt_path)
+
+        with open(prompt_path, "r", encoding="utf-8") as file:
+            return file.read().strip()
+    except IOError as e:
+        print(f"Failed to load prompt from {prompt_path}: {e}")
+        raise
+
+
+# Self-consistency votes need samples that can differ, so voting calls to
+# Anthropic models don't use the temperature 0 of single calls.
+VOTING_TEMPERATURE = 1.0
+
+# Batchable task name -> (prompt, tool whose call carries the answer).
+BATCH_TASKS = {
+    "evaluate_criterion": (PromptConfig.GENERAL_CRITERIA_EVAL, CriteriaEvalTool),
+    "extract_claims": (PromptConfig.CLAIM_EXTRACTION, ClaimExtractionTool),
+    "verify_claims": (PromptConfig.CLAIM_CHECK, ClaimCheckTool),
+}
+
+
 class LLMService:
-    def __init__(self, api_key: str, model: Optional[Union[Model, str]] = None):
+    def __init__(
+        self,
+        api_key: str,
+        model: Optional[Union[Model, str]] = None,
+        keep_mcp_sessions: bool = False,
+        max_votes: Optional[int] = None,
+        hedge_percentile: Optional[float] = None,
+        fallback_model: Optional[Union[Model, str]] = None,
+        hedge_budget: Optional[float] = None,
+    ):
         self.api_key = api_key
         self.model = self._get_model_enum(model)
+        self.prompt_cache_stats = PromptCacheStats()
+        # With max_votes > 1, criteria and claim verdicts are majority votes
+        # over up to max_votes samples (AIM_MAX_VOTES sets the default).
+        self.max_votes = max_votes or int(os.getenv("AIM_MAX_VOTES", "1"))
+        self.agreement_stats = AgreementStats()
+        # Calls slower than the hedge_percentile-th latency get a duplicate on
+        # fallback_model (or the same model), for up to a hedge_budget share of
+        # calls; AIM_HEDGE_PERCENTILE, AIM_FALLBACK_MODEL and AIM_HEDGE_BUDGET
+        # set the defaults.
+        self.hedge_percentile = hedge_percentile or float(os.getenv("AIM_HEDGE_PERCENTILE", "0")) or None
+        self.hedge_budget = hedge_budget
+        fallback_model = fallback_model or os.getenv("AIM_FALLBACK_MODEL")
+        self.fallback_model = self._get_model_enum(fallback_model) if fallback_model else None
+        if self.fallback_model and self.fallback_model.provider != self.model.provider:
+            raise ValueError(
+                f"Fallback model {self.fallback_model.value} must use the same provider as {self.model.value}"
+            )
+        self.hedging_stats = HedgingStats()
+        # Keyed by (model, sampling); see create_ai_chain.
+        self._language_models: Dict[Tuple[Model, bool], BaseLanguageModel] = {}
+        # Long-lived processes (aim serve) keep MCP servers running between
+        # calls; sessions are tied to the event loop that opened them.
+        self.keep_mcp_sessions = keep_mcp_sessions
+        self._mcp_sessions: Dict[str, List[BaseTool]] = {}
+        # One lock per server, so concurrent first calls start it only once.
+        self._mcp_locks: Dict[str, asyncio.Lock] = {}
+        self._mcp_stack: Optional[AsyncExitStack] = None
 
-    def _get_model_enum(self, model_name: str) -> Model:
+    def _get_model_enum(self, model_name: Union[Model, str]) -> Model:
         """Convert string model name to LLMModel enum."""
+        if isinstance(model_name, Model):
+            return model_name
         for model in Model:
             if model.value == model_name:
                 return model
         raise ValueError(f"Unknown LLM model: {model_name}")
 
-    def _select_language_model(self) -> BaseLanguageModel:
+    def _select_language_model(self, model: Optional[Model] = None, sampling: bool = False) -> BaseLanguageModel:
+        key = (model or self.model, sampling)
+        if key not in self._language_models:
+            self._language_models[key] = self._create_language_model(*key)
+        return self._language_models[key]
+
+    def _create_language_model(self, model: Optional[Model] = None, sampling: bool = False) -> BaseLanguageModel:
+        model = model or self.model
         try:
             llm_factory = {
-                ModelProvider.OPENAI: lambda: ChatOpenAI(
-                    model=self.model.value,
+                ModelProvider.OPENAI: lambda: _chat_openai()(
+                    model=model.value,
                     temperature=1,
                     max_retries=3,
                     api_key=pydantic.SecretStr(self.api_key),
                 ),
-                ModelProvider.ANTHROPIC: lambda: ChatAnthropic(
-                    model_name=self.model.value,
-                    temperature=0,
+                ModelProvider.ANTHROPIC: lambda: _chat_anthropic()(
+                    model_name=model.value,
+                    temperature=VOTING_TEMPERATURE if sampling else 0,
                     api_key=pydantic.SecretStr(self.api_key),
                     timeout=None,
                     stop=None,
                     max_retries=3,
                     max_tokens_to_sample=8192,
                 ),
-            }.get(self.model.provider)
+            }.get(model.provider)
 
             return llm_factory()
 
@@ -68,33 +156,31 @@ class LLMService:
             raise
 
     def _load_prompt(self, prompt_path: str) -> str:
-        try:
-            # Resolve relative path relative to this file's location
-            if not os.path.isabs(prompt_path):
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                prompt_path = os.path.join(current_dir, prompt_path)
-            
-            with open(prompt_path, "r", encoding="utf-8") as file:
-                return file.read().strip()
-        except IOError as e:
-            print(f"Failed to load prompt from {prompt_path}: {e}")
-            raise
+        return _read_prompt(prompt_path)
 
     def create_ai_chain(
         self,
         prompt_path: str,
         tools: Optional[List[BaseTool]] = None,
         must_use_tool: Optional[bool] = False,
+        sampling: bool = False,
     ) -> Any:
+        """``sampling`` chains answer at ``VOTING_TEMPERATURE``, so repeated
+        calls can disagree and a majority vote over them means something."""
         try:
             all_tools = tools or []
 
-            llm = self._select_language_model()
-            prompt_template = ChatPromptTemplate.from_template(
-                self._load_prompt(prompt_path)
-            )
+            llm = self._select_language_model(sampling=sampling)
+            cached_prompt, prompt = split_prompt(self._load_prompt(prompt_path))
 
-            if tools:
+            def prompt_template(inputs):
+                return [HumanMessage(content=self._prompt_content(
+                    cached_prompt.format(**inputs), prompt.format(**inputs)
+                ))]
+
+            def bind_tools(llm):
+                if not tools:
+                    return llm
                 tool_choice = "auto"
                 if self.model.provider == ModelProvider.ANTHROPIC:
                     if must_use_tool:
@@ -102,11 +188,18 @@ class LLMService:
                 else:
                     if must_use_tool:
                         tool_choice = "required"
-                llm_with_tools = llm.bind_tools(all_tools, tool_choice=tool_choice)
-            else:
-                llm_with_tools = llm
+                return llm.bind_tools(all_tools, tool_choice=tool_choice)
+
+            llm_with_tools = bind_tools(llm)
+            if self.hedge_percentile or self.fallback_model:
+                fallback = (
+                    bind_tools(self._select_language_model(self.fallback_model, sampling))
+                    if self.fallback_model else llm_with_tools
+                )
+                llm_with_tools = self._hedged(prompt_path, llm_with_tools, fallback)
 
             def process_response(response):
+                self.prompt_cache_stats.record(getattr(response, "usage_metadata", None))
                 tool_map = {tool.name.lower(): tool for tool in all_tools}
 
                 if response.tool_calls:
@@ -118,47 +211,120 @@ class LLMService:
 
                 return response.content
 
-            return prompt_template | llm_with_tools | process_response
+            def throttle(prompt_value):
+                limiter = shared_rate_limiter()
+                if limiter:
+                    limiter.acquire()
+                return prompt_value
+
+            return RunnableLambda(prompt_template) | throttle | llm_with_tools | process_response
 
         except Exception as e:
             print(f"Chain creation error: {e}")
             raise
 
+    def _hedged(self, prompt_path: str, primary, fallback) -> RunnableLambda:
+        # Latency depends on the prompt as much as the model, so each gets its own deadline.
+        hedger = Hedger(
+            self.hedge_percentile,
+            shared_latency_tracker(f"{self.model.value}:{prompt_path}"),
+            shared_hedge_budget(self.hedge_budget),
+            self.hedging_stats,
+            failover=self.fallback_model is not None,
+        )
+
+        def hedge(prompt_value):
+            # The duplicate is a request like any other as far as rate limits go.
+            limiter = shared_rate_limiter()
+            if limiter:
+                limiter.acquire()
+            return fallback.invoke(prompt_value)
+
+        async def ahedge(prompt_value):
+            limiter = shared_rate_limiter()
+            if limiter:
+                await asyncio.to_thread(limiter.acquire)
+            return await fallback.ainvoke(prompt_value)
+
+        def invoke(prompt_value):
+            return hedger.call(lambda: primary.invoke(prompt_value), lambda: hedge(prompt_value))
+
+        async def ainvoke(prompt_value):
+            return await hedger.acall(lambda: primary.ainvoke(prompt_value), lambda: ahedge(prompt_value))
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+    def _prompt_content(self, cached_prompt: str, prompt: str) -> Union[str, List[Dict]]:
+        # Anthropic only caches explicitly marked blocks; OpenAI caches the
+        # longest stable prefix on its own, so a plain string is enough there.
+        if self.model.provider == ModelProvider.ANTHROPIC and cached_prompt:
+            blocks = [{"type": "text", "text": cached_prompt, "cache_control": {"type": "ephemeral"}}]
+            if prompt:
+                blocks.append({"type": "text", "text": prompt})
+            return blocks
+        return "\n\n".join(part for part in (cached_prompt, prompt) if part)
+
     async def _async_make_mcp_chain(
         self,
-        server_params: StdioServerParameters,
+        server_params: "StdioServerParameters",
         input: str,
         prompt: PromptConfig,
         tools: Optional[List[BaseTool]] = None,
         response_model: BaseModel = None,
     ) -> BaseModel:
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
+        from mcp import ClientSession
+        from mcp.client.stdio import stdio_client
+        from langchain_mcp_adapters.tools import load_mcp_tools
+        from langgraph.prebuilt import create_react_agent
+        from langgraph.checkpoint.memory import MemorySaver
 
-                all_tools = await load_mcp_tools(session)
-                if tools:
-                    all_tools.extend(tools)
+        async def run_agent(all_tools):
+            if tools:
+                all_tools = all_tools + tools
 
-                memory = MemorySaver()
+            memory = MemorySaver()
 
-                agent = create_react_agent(
-                    model=self._select_language_model(),
-                    tools=all_tools,
-                    checkpointer=memory,
-                    prompt=prompt,
-                    response_format=response_model,
-                )
-                thread_id = uuid.uuid4().hex
+            agent = create_react_agent(
+                model=self._select_language_model(),
+                tools=all_tools,
+                checkpointer=memory,
+                prompt=prompt,
+                response_format=response_model,
+            )
+            thread_id = uuid.uuid4().hex
 
-                response = await agent.ainvoke(
-                    {"messages": [("user", input)]},
-                    config={"configurable": {"thread_id": thread_id}}
-                )
+            response = await agent.ainvoke(
+                {"messages": [("user", input)]},
+                config={"configurable": {"thread_id": thread_id}}
+            )
 
-                return response["structured_response"].result
+            return response["structured_response"].result
 
-    async def run_mcp_agent(self, input: str, server: StdioServerParameters, sys_prompt = PromptConfig.MCP) -> ReturnRecordToolInput:
+        if self.keep_mcp_sessions:
+            key = server_params.model_dump_json()
+            async with self._mcp_locks.setdefault(key, asyncio.Lock()):
+                if key not in self._mcp_sessions:
+                    if self._mcp_stack is None:
+                        self._mcp_stack = AsyncExitStack()
+                    read, write = await self._mcp_stack.enter_async_context(stdio_client(server_params))
+                    session = await self._mcp_stack.enter_async_context(ClientSession(read, write))
+                    await session.initialize()
+                    self._mcp_sessions[key] = await load_mcp_tools(session)
+            return await run_agent(self._mcp_sessions[key])
+
+        async with stdio_client(server_params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                return await run_agent(await load_mcp_tools(session))
+
+    async def close_mcp_sessions(self):
+        if self._mcp_stack is not None:
+            stack, self._mcp_stack = self._mcp_stack, None
+            self._mcp_sessions.clear()
+            self._mcp_locks.clear()
+            await stack.aclose()
+
+    async def run_mcp_agent(self, input: str, server: "StdioServerParameters", sys_prompt = PromptConfig.MCP) -> ReturnRecordToolInput:
         result = await self._async_make_mcp_chain(
             server,
             input,
@@ -172,18 +338,29 @@ class LLMService:
         return result
             
 
-    def evaluate_criterion(self, criterion: str, content: str) -> bool:
+    def evaluate_criterion(self, criterion: str, content: str, max_votes: Optional[int] = None) -> bool:
         prompt = PromptConfig.GENERAL_CRITERIA_EVAL
-        return self.create_ai_chain(
+        max_votes = max_votes or self.max_votes
+        chain = self.create_ai_chain(
             prompt,
             tools=[CriteriaEvalTool()],
             must_use_tool=True,
-        ).invoke(
-            {
-                "criterion": criterion,
-                "content": content,
-            }
+            sampling=max_votes > 1,
         )
+        inputs = {
+            "criterion": criterion,
+            "content": content,
+        }
+        if max_votes <= 1:
+            return chain.invoke(inputs)
+
+        tallies = self._vote(
+            chain, inputs, max_votes,
+            lambda result: {"result": result} if isinstance(result, bool) else {},
+            keys=["result"],
+        )
+        # Undecided when every sample abstained; an unmet criterion.
+        return bool(tallies["result"].leader()[0])
 
     def extract_claims(self, content: str) -> List[str]:
         prompt = PromptConfig.CLAIM_EXTRACTION
@@ -194,11 +371,74 @@ class LLMService:
         ).invoke({"content": content})
 
     def verify_claims(
-        self, claims: List[Dict[str, str]], content: str
+        self, claims: List[Dict[str, str]], content: str, max_votes: Optional[int] = None
     ) -> List[Dict[str, Union[str, bool]]]:
         prompt = PromptConfig.CLAIM_CHECK
-        return self.create_ai_chain(
+        max_votes = max_votes or self.max_votes
+        chain = self.create_ai_chain(
             prompt,
             tools=[ClaimCheckTool()],
             must_use_tool=True,
-        ).invoke({"claims": claims, "content": content})
+            sampling=max_votes > 1,
+        )
+        inputs = {"claims": claims, "content": content}
+        if max_votes <= 1:
+            return chain.invoke(inputs)
+
+        def judgements(results):
+            if not isinstance(results, list):
+                return {}
+            return {
+                normalize_claim(result["claim"]): bool(result["validity"])
+                for result in results
+                if isinstance(result, dict) and "claim" in result and "validity" in result
+            }
+
+        # Each claim is voted on separately; sampling continues until all are
+        # decided. A claim every sample skipped gets validity None (undecided).
+        tallies = self._vote(
+            chain, inputs, max_votes, judgements, keys=[normalize_claim(claim["claim"]) for claim in claims]
+        )
+        return [
+            {"claim": claim["claim"], "validity": tallies[normalize_claim(claim["claim"])].leader()[0]}
+            for claim in claims
+        ]
+
+    def _vote(self, chain, inputs: Dict, max_votes: int, judgements, keys=()):
+        errors = []
+
+        def sample(n):
+            # The first samples of a round are requested concurrently.
+            outputs = chain.batch([inputs] * n, return_exceptions=True)
+            errors.extend(output for output in outputs if isinstance(output, Exception))
+            return outputs
+
+        tallies = vote(
+            sample,
+            lambda output: {} if isinstance(output, Exception) else judgements(output),
+            max_votes,
+            stats=self.agreement_stats,
+            keys=keys,
+        )
+        if errors and not any(tally.total for tally in tallies.values()):
+            raise errors[0]
+        return tallies
+
+    def batch_request(self, custom_id: str, task: str, **inputs) -> BatchRequest:
+        """Render ``task`` into a provider-neutral batch request."""
+        prompt_path, tool_cls = BATCH_TASKS[task]
+        tool = tool_cls()
+        cached_prompt, prompt = split_prompt(self._load_prompt(prompt_path))
+        return BatchRequest(
+            custom_id,
+            self._prompt_content(cached_prompt.format(**inputs), prompt.format(**inputs)),
+            tool.name,
+            tool.description,
+            tool.args_schema.model_json_schema(),
+        )
+
+    def parse_batch_result(self, task: str, tool_args: Optional[Dict[str, Any]]):
+        """Turn batch tool-call arguments into what the sync method returns."""
+        if tool_args is None:
+            return None
+        return BATCH_TASKS[task][1]().invoke(tool_args)
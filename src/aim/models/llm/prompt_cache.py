@@ -0,0 +1,50 @@
+from typing import Dict, Optional, Tuple
+
+from .usage_stats import UsageStats
+
+# Prompt files mark the end of their stable prefix with this line. Everything
+# before it (instructions plus the large content or chunk) is identical across
+# calls and is laid out first so providers can serve it from their cache.
+CACHE_BREAKPOINT = "<!-- cache-breakpoint -->"
+
+
+def split_prompt(template: str) -> Tuple[str, str]:
+    """Split a prompt template into its cacheable prefix and variable suffix.
+
+    Templates without a breakpoint have no cacheable prefix. Claim
+    extraction is one: its only stable part, the instructions, is far below
+    Anthropic's 1024-token caching minimum, and the content after it differs
+    on every call.
+    """
+    prefix, found, suffix = template.partition(CACHE_BREAKPOINT)
+    if not found:
+        return "", template.strip()
+    return prefix.strip(), suffix.strip()
+
+
+class PromptCacheStats(UsageStats):
+    """Prompt-cache usage reported by providers."""
+
+    REPORT_KEY = "prompt_cache"
+    SUMS = ("requests", "cache_hits", "input_tokens", "cache_read_tokens", "cache_creation_tokens")
+
+    def record(self, usage_metadata: Optional[Dict]):
+        if not usage_metadata:
+            return
+        details = usage_metadata.get("input_token_details") or {}
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += usage_metadata.get("input_tokens", 0) or 0
+            self.cache_read_tokens += details.get("cache_read", 0) or 0
+            self.cache_creation_tokens += details.get("cache_creation", 0) or 0
+            if details.get("cache_read"):
+                self.cache_hits += 1
+
+    @staticmethod
+    def summarize(entry: Dict):
+        entry["hit_rate"] = entry["cache_hits"] / entry["requests"] if entry["requests"] else 0.0
+        # Anthropic reports cached tokens separately from input_tokens; OpenAI
+        # counts them inside it. Relative to everything sent, this is the share
+        # of input that was served from cache.
+        total_input = max(entry["input_tokens"], entry["cache_read_tokens"])
+        entry["cached_token_ratio"] = entry["cache_read_tokens"] / total_input if total_input else 0.0
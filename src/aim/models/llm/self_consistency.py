@@ -0,0 +1,103 @@
+from collections import Counter
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from .usage_stats import UsageStats
+
+# A voting round asks for this many samples at once, then one at a time.
+# Two agreeing samples settle most judgements.
+DEFAULT_MIN_VOTES = 2
+
+
+class Tally:
+    """Votes for one judgement (a criterion, or one claim)."""
+
+    def __init__(self):
+        self.votes: Counter = Counter()
+
+    def add(self, vote: Hashable):
+        self.votes[vote] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.votes.values())
+
+    def leader(self) -> Tuple[Optional[Hashable], int]:
+        if not self.votes:
+            return None, 0
+        # Ties go to the first answer seen, which Counter preserves.
+        return max(self.votes.items(), key=lambda item: item[1])
+
+    def decided(self, min_votes: int, max_votes: int) -> bool:
+        """Whether more samples could still change the outcome."""
+        _, lead = self.leader()
+        # Abstentions aren't votes: a lone answer is never unanimous.
+        if self.total >= max(min_votes, 2) and lead == self.total:
+            return True
+        # The leader holds a majority of every possible vote.
+        return lead > max_votes // 2
+
+    @property
+    def agreement(self) -> float:
+        return self.leader()[1] / self.total if self.total else 0.0
+
+
+def vote(
+    sample: Callable[[int], Sequence],
+    judgements: Callable[[object], Dict[Hashable, Hashable]],
+    max_votes: int,
+    min_votes: int = DEFAULT_MIN_VOTES,
+    stats: Optional["AgreementStats"] = None,
+    keys: Iterable[Hashable] = (),
+) -> Dict[Hashable, Tally]:
+    """Majority-vote the judgements in repeated samples, stopping early.
+
+    ``sample(n)`` returns ``n`` fresh model outputs and ``judgements``
+    maps one output to ``{judgement_key: vote}`` (outputs that can't be
+    parsed map to ``{}`` and abstain). Sampling stops once every judgement
+    in ``keys`` or seen in an output is decided: at least ``min_votes``
+    (and two) non-abstaining votes all agree, or its leader holds a
+    majority of ``max_votes``.
+    A judgement every sample abstained on comes back as an empty tally,
+    whose leader is ``None``.
+    """
+    min_votes = min(min_votes, max_votes)
+    tallies: Dict[Hashable, Tally] = {key: Tally() for key in keys}
+    samples = 0
+
+    while samples < max_votes:
+        for output in sample(min_votes if samples == 0 else 1):
+            samples += 1
+            for key, value in judgements(output).items():
+                tallies.setdefault(key, Tally()).add(value)
+        if samples >= min_votes and tallies and all(
+            tally.decided(min_votes, max_votes) for tally in tallies.values()
+        ):
+            break
+
+    if stats is not None:
+        stats.record(samples, max_votes, tallies.values())
+    return tallies
+
+
+class AgreementStats(UsageStats):
+    """Self-consistency voting rounds and how often their samples agreed."""
+
+    REPORT_KEY = "self_consistency"
+    SUMS = ("rounds", "samples", "early_stops", "judgements", "unanimous", "agreement_sum")
+
+    def record(self, samples: int, max_votes: int, tallies: List[Tally]):
+        with self._lock:
+            self.rounds += 1
+            self.samples += samples
+            self.early_stops += samples < max_votes
+            for tally in tallies:
+                self.judgements += 1
+                self.unanimous += tally.agreement == 1.0
+                self.agreement_sum += tally.agreement
+
+    @staticmethod
+    def summarize(entry: Dict):
+        entry["avg_samples"] = entry["samples"] / entry["rounds"] if entry["rounds"] else 0.0
+        entry["early_stop_rate"] = entry["early_stops"] / entry["rounds"] if entry["rounds"] else 0.0
+        entry["unanimous_rate"] = entry["unanimous"] / entry["judgements"] if entry["judgements"] else 0.0
+        entry["mean_agreement"] = entry["agreement_sum"] / entry["judgements"] if entry["judgements"] else 0.0
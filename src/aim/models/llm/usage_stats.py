@@ -0,0 +1,91 @@
+import threading
+from typing import Dict, Tuple, Type
+
+
+class UsageStats:
+    """Thread-safe running totals that LLM calls record and reports collect.
+
+    Subclasses name their report section in ``REPORT_KEY``, list the
+    totals summed across drains and shards in ``SUMS`` and those kept at
+    their largest in ``MAXIMA``, and derive rates in ``summarize``.
+    """
+
+    REPORT_KEY = ""
+    SUMS: Tuple[str, ...] = ()
+    MAXIMA: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def drain(self) -> Dict[str, float]:
+        """Return the totals gathered since the last drain and reset them."""
+        with self._lock:
+            totals = {name: getattr(self, name) for name in self.SUMS + self.MAXIMA}
+            self._reset()
+        return totals
+
+    def add(self, totals: Dict[str, float]):
+        """Fold in totals drained elsewhere, e.g. in the daemon."""
+        with self._lock:
+            for name in self.SUMS:
+                setattr(self, name, getattr(self, name) + totals.get(name, 0))
+            for name in self.MAXIMA:
+                setattr(self, name, max(getattr(self, name), totals.get(name, 0)))
+
+    def _reset(self):
+        for name in self.SUMS + self.MAXIMA:
+            setattr(self, name, 0)
+
+    @classmethod
+    def accumulate(cls, entry: Dict, totals: Dict):
+        """Add ``totals`` (a drain, or another report's section) to ``entry``."""
+        for name in cls.SUMS:
+            entry[name] = entry.get(name, 0) + totals.get(name, 0)
+        for name in cls.MAXIMA:
+            entry[name] = max(entry.get(name, 0), totals.get(name, 0))
+        cls.summarize(entry)
+
+    @staticmethod
+    def summarize(entry: Dict):
+        pass
+
+
+def report_sections() -> Dict[str, Type[UsageStats]]:
+    """Stats types by the report key they fill."""
+    # Imported here: each of these modules imports UsageStats.
+    from .hedging import HedgingStats
+    from .prompt_cache import PromptCacheStats
+    from .self_consistency import AgreementStats
+
+    return {stats.REPORT_KEY: stats for stats in (PromptCacheStats, AgreementStats, HedgingStats)}
+
+
+def service_stats(llm_service) -> Tuple[UsageStats, ...]:
+    return (llm_service.prompt_cache_stats, llm_service.agreement_stats, llm_service.hedging_stats)
+
+
+def drain_service_stats(report: Dict, llm_service) -> bool:
+    """Move what ``llm_service`` recorded into its sections of ``report``.
+
+    Returns whether anything was recorded.
+    """
+    recorded = False
+    for stats in service_stats(llm_service):
+        totals = stats.drain()
+        if any(totals.values()):
+            stats.accumulate(report.setdefault(stats.REPORT_KEY, {}), totals)
+            recorded = True
+    return recorded
+
+
+def accumulate_section(report: Dict, key: str, entry: Dict) -> bool:
+    """Add ``entry`` to ``report[key]`` if ``key`` is a stats section.
+
+    Returns whether it was one.
+    """
+    stats = report_sections().get(key)
+    if stats is None:
+        return False
+    stats.accumulate(report.setdefault(key, {}), entry)
+    return True
@@ -1,4 +1,6 @@
+import os
 from enum import Enum
+from typing import Optional
 
 from .providers import ModelProvider
 
@@ -13,3 +15,18 @@ class ModelEnum(Enum):
     @property
     def model_name(self) -> str:
         return self.value
+
+    @property
+    def api_key(self) -> Optional[str]:
+        # ModelProvider values are the env vars holding each provider's key.
+        return os.getenv(self.provider.value)
+
+    @classmethod
+    def api_key_for(cls, name: Optional[str]) -> Optional[str]:
+        """``api_key`` of the model called ``name``; ``None`` without a name."""
+        if not name:
+            return None
+        for model in cls:
+            if model.value == name:
+                return model.api_key
+        raise ValueError(f"Unknown model: {name}")
@@ -0,0 +1,43 @@
+import os
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """Spaces calls evenly so a process stays under ``requests_per_minute``."""
+
+    def __init__(self, requests_per_minute: float):
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_shared: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def shared_rate_limiter() -> Optional[RateLimiter]:
+    """Process-wide limiter configured through ``AIM_RATE_LIMIT_RPM``, if set.
+
+    Under pytest-xdist the budget is split evenly across the workers.
+    """
+    global _shared
+    rpm = os.getenv("AIM_RATE_LIMIT_RPM")
+    if not rpm:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            workers = int(os.getenv("PYTEST_XDIST_WORKER_COUNT", "1"))
+            _shared = RateLimiter(float(rpm) / max(1, workers))
+        return _shared
@@ -0,0 +1,145 @@
+"""pytest plugin exposing session-scoped AIM services.
+
+Enabled automatically when ``aim`` is installed. Under pytest-xdist every
+worker writes report, failure and reference updates to its own shard, and the
+controller merges them into the usual ``aim_data/`` files once the session
+finishes. Worker shards are named ``<session>-<worker id>`` so the controller
+only merges its own; when a parent process set ``AIM_SHARD`` (``aim
+set-baseline -w``), the session is that shard and the parent merges it.
+"""
+import json
+import os
+from typing import Optional
+
+import pytest
+
+from .merge import merge_output_shards, merge_reference_shards
+from .state import ExecutionMode, set_shard
+
+
+def pytest_addoption(parser):
+    parser.addini("aim_llm_model", "LLM model used by the aim fixtures", default=None)
+    parser.addini("aim_embed_model", "Embedding model used by the aim fixtures", default=None)
+
+
+def _setting(config, name: str) -> Optional[str]:
+    return os.getenv(name.upper()) or config.getini(name) or None
+
+
+_fixtures_used = pytest.StashKey[bool]()
+
+
+def _is_xdist_worker(config) -> bool:
+    return hasattr(config, "workerinput")
+
+
+def _parent_shard() -> Optional[str]:
+    return os.getenv("AIM_SHARD") or None
+
+
+class _XdistControllerPlugin:
+    def __init__(self):
+        # Unique among sessions sharing aim_data/, unlike the timestamp.
+        self.session = _parent_shard() or f"p{os.getpid()}"
+
+    def pytest_configure_node(self, node):
+        node.workerinput["aim_timestamp"] = ExecutionMode.timestamp
+        node.workerinput["aim_run_id"] = ExecutionMode.run_id
+        node.workerinput["aim_session"] = self.session
+
+
+def pytest_configure(config):
+    if _is_xdist_worker(config):
+        workerinput = config.workerinput
+        set_shard(
+            f"{workerinput.get('aim_session', 'xdist')}-{workerinput['workerid']}",
+            workerinput.get("aim_timestamp"),
+            workerinput.get("aim_run_id"),
+        )
+    elif config.pluginmanager.hasplugin("xdist"):
+        config.pluginmanager.register(_XdistControllerPlugin(), "aim-xdist-controller")
+
+
+def pytest_sessionfinish(session):
+    # Run queued batch evaluations before the controller merges this
+    # process's report shard. Sessions that neither queue batches nor use
+    # the aim fixtures don't load the batch machinery at all.
+    if os.getenv("AIM_BATCH") == "1" or session.config.stash.get(_fixtures_used, False):
+        from .batch_runner import flush_batches
+        flush_batches()
+    controller = session.config.pluginmanager.get_plugin("aim-xdist-controller")
+    if _is_xdist_worker(session.config) or _parent_shard() or controller is None:
+        return
+    merge_output_shards(ExecutionMode.report_file, "report", shard=controller.session)
+    merge_output_shards(ExecutionMode.failures_file, "failures", shard=controller.session)
+    merge_reference_shards(ExecutionMode.reference_dir, shard=controller.session)
+
+
+@pytest.fixture(scope="session")
+def aim_llm_service(pytestconfig):
+    from .daemon import llm_service_for
+    from .models.llm.llm_models import LLMModel
+
+    pytestconfig.stash[_fixtures_used] = True
+    model = _resolve_model(pytestconfig, "aim_llm_model", LLMModel)
+    return llm_service_for(model.api_key, model.value)
+
+
+@pytest.fixture(scope="session")
+def aim_embedding_service(pytestconfig):
+    from .daemon import embedding_service_for
+    from .models.embeddings.embed_models import EmbedModels
+
+    pytestconfig.stash[_fixtures_used] = True
+    model = _resolve_model(pytestconfig, "aim_embed_model", EmbedModels)
+    return embedding_service_for(model.api_key, model.value)
+
+
+def _resolve_model(config, setting: str, models):
+    name = _setting(config, setting)
+    if not name:
+        pytest.skip(f"No model configured (set {setting.upper()} or the {setting} ini option)")
+    for model in models:
+        if model.value == name:
+            return model
+    raise ValueError(f"Unknown model: {name}")
+
+
+@pytest.fixture(scope="session")
+def aim_metrics(request):
+    """Factory returning one shared ``Metrics`` per reference id and settings.
+
+    Services are resolved lazily, so a suite that only runs criteria checks
+    doesn't need an embedding model configured.
+    """
+    from .metrics import Metrics
+
+    request.config.stash[_fixtures_used] = True
+    instances = {}
+
+    def make(reference_id: str, **kwargs) -> Metrics:
+        # Settings may be unhashable (lists, dicts); objects repr by identity.
+        key = (reference_id, json.dumps(kwargs, sort_keys=True, default=repr))
+        if key not in instances:
+            instances[key] = Metrics(
+                reference_id=reference_id,
+                llm_model=None,
+                llm_api_key=None,
+                embed_api_key=None,
+                embed_model=None,
+                llm_service=request.getfixturevalue("aim_llm_service"),
+                embeds_service=_optional_embeddings(request),
+                **kwargs,
+            )
+        return instances[key]
+
+    yield make
+
+    for metrics in instances.values():
+        metrics.close()
+
+
+def _optional_embeddings(request):
+    if not _setting(request.config, "aim_embed_model"):
+        return None
+    return request.getfixturevalue("aim_embedding_service")
@@ -1,6 +1,10 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import copy
 from enum import Enum
 from datetime import datetime
 import os
+from typing import Optional
 
 
 class ExecutionModes(Enum):
@@ -13,37 +17,150 @@ class DefaultThresholds():
     claim_check = 0.80
     general_criteria = 0.80
 
-_initial_mode = ExecutionModes.ASSERT
-_aim_mode_env = os.getenv("AIM_MODE")
-if _aim_mode_env:
-    _initial_mode = ExecutionModes(_aim_mode_env)
 
+class ExecutionContext:
+    """Mode, config and output paths for one evaluation job.
 
-class ExecutionMode:
-    mode = _initial_mode
-    iteration = int(os.getenv("AIM_ITERATION", "0"))
-    config = None
-    default_thresholds = DefaultThresholds()
-    failures_dir = "aim_data/failures"
-    report_dir = "aim_data/report"
-    reference_dir = "aim_data/reference"
-    _timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    failures_file = f"{failures_dir}/failures_{_timestamp}.json"
-    report_file = f"{report_dir}/report_{_timestamp}.json"
+    The process starts with a context built from ``AIM_MODE``,
+    ``AIM_ITERATION`` and ``AIM_SHARD``. Jobs that need their own mode or
+    output files run under ``use_context`` (or pass ``context=`` to
+    ``Metrics``), which only affects the current thread or asyncio task.
+    """
+
+    def __init__(
+        self,
+        mode: ExecutionModes = ExecutionModes.ASSERT,
+        iteration: Optional[int] = 0,
+        config=None,
+        shard: Optional[str] = None,
+        timestamp: Optional[str] = None,
+        data_dir: str = "aim_data",
+        run_id: Optional[str] = None,
+    ):
+        self.mode = mode
+        self.iteration = iteration
+        self.config = config
+        self.default_thresholds = DefaultThresholds()
+        self.failures_dir = f"{data_dir}/failures"
+        self.report_dir = f"{data_dir}/report"
+        self.reference_dir = f"{data_dir}/reference"
+        self.cache_dir = f"{data_dir}/cache"
+        self.batch_dir = f"{data_dir}/batch"
+        self.blob_dir = f"{data_dir}/blobs"
+        self.history_file = f"{data_dir}/history.sqlite"
+        self.shard = shard
+        self.timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._run_id = run_id
+        self.refresh_output_files()
+
+    @property
+    def run_id(self) -> str:
+        """Key of this run in the history store.
+
+        The timestamp alone is only unique to the second, so runs started
+        together (e.g. parallel baseline iterations) add the process id.
+        """
+        return self._run_id or f"{self.timestamp}-{os.getpid()}"
+
+    @run_id.setter
+    def run_id(self, run_id: Optional[str]):
+        self._run_id = run_id
+
+    @classmethod
+    def from_env(cls) -> "ExecutionContext":
+        mode = os.getenv("AIM_MODE")
+        return cls(
+            mode=ExecutionModes(mode) if mode else ExecutionModes.ASSERT,
+            iteration=int(os.getenv("AIM_ITERATION", "0")),
+            shard=os.getenv("AIM_SHARD") or None,
+        )
+
+    def derive(self, **changes) -> "ExecutionContext":
+        """A copy of this context with ``changes`` applied.
+
+        Output files follow the new directories, shard and timestamp unless
+        ``failures_file`` or ``report_file`` are given explicitly.
+        """
+        context = copy.copy(self)
+        context.default_thresholds = copy.copy(self.default_thresholds)
+        files = {key: changes.pop(key) for key in ("failures_file", "report_file") if key in changes}
+        for key, value in changes.items():
+            if not hasattr(context, key):
+                raise AttributeError(f"ExecutionContext has no attribute {key!r}")
+            setattr(context, key, value)
+        context.refresh_output_files()
+        for key, value in files.items():
+            setattr(context, key, value)
+        return context
+
+    def refresh_output_files(self):
+        if self.shard:
+            suffix = f"{self.timestamp}.{self.shard}"
+            self.failures_file = f"{self.failures_dir}/shards/failures_{suffix}.jsonl"
+            self.report_file = f"{self.report_dir}/shards/report_{suffix}.json"
+        else:
+            self.failures_file = f"{self.failures_dir}/failures_{self.timestamp}.jsonl"
+            self.report_file = f"{self.report_dir}/report_{self.timestamp}.json"
+
+
+_process_context = ExecutionContext.from_env()
+_current_context: ContextVar[Optional[ExecutionContext]] = ContextVar("aim_execution_context", default=None)
+
+
+def current_context() -> ExecutionContext:
+    return _current_context.get() or _process_context
+
+
+@contextmanager
+def use_context(context: ExecutionContext):
+    """Run the enclosed block (and tasks or pool work it starts) under ``context``."""
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(token)
+
+
+class _ContextProxy(type):
+    def __getattr__(cls, name):
+        return getattr(current_context(), name)
+
+    def __setattr__(cls, name, value):
+        setattr(current_context(), name, value)
+
+
+class ExecutionMode(metaclass=_ContextProxy):
+    """The current ``ExecutionContext``'s attributes, e.g. ``ExecutionMode.report_file``."""
 
 
 def set_mode(mode: ExecutionModes, iteration=None, config=None):
-    ExecutionMode.mode = mode
-    ExecutionMode.iteration = iteration
-    ExecutionMode.config = config
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    ExecutionMode.failures_file = f"{ExecutionMode.failures_dir}/failures_{timestamp}.json"
-    ExecutionMode.report_file = f"{ExecutionMode.report_dir}/report_{timestamp}.json"
+    context = current_context()
+    context.mode = mode
+    context.iteration = iteration
+    context.config = config
+
+    context.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    context.run_id = None
+    context.refresh_output_files()
+
+
+def set_shard(shard: Optional[str], timestamp: Optional[str] = None, run_id: Optional[str] = None):
+    """Route the current context's writes to shard files that are merged later.
+
+    Used when several processes (xdist workers, parallel baseline runs) write
+    to the same ``aim_data/`` tree at once.
+    """
+    context = current_context()
+    context.shard = shard
+    if timestamp:
+        context.timestamp = timestamp
+    if run_id:
+        context.run_id = run_id
+    context.refresh_output_files()
+
 
 def get_base_thresholds():
-    return ExecutionMode.default_thresholds
+    return current_context().default_thresholds
 
 def get_mode() -> ExecutionModes:
-    return ExecutionMode.mode
\ No newline at end of file
+    return current_context().mode
@@ -0,0 +1,185 @@
+"""Local stand-in for the OpenAI and Anthropic batch APIs.
+
+Point ``AIM_BATCH_BASE_URL`` at ``StubBatchServer.url`` and every batch
+client talks to it instead of the provider. Each request is answered by
+``respond(custom_id, tool_name, prompt)``, which returns the tool-call
+arguments (or ``None`` for a failed request). Batches report completion
+after ``polls_until_done`` status checks.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+
+class StubBatchServer:
+    def __init__(self, respond: Callable[[str, str, object], Optional[Dict]], polls_until_done: int = 1):
+        self.respond = respond
+        self.polls_until_done = polls_until_done
+        self.files: Dict[str, str] = {}
+        self.batches: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubBatchServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _create_batch(self, kind: str, requests: List[Dict], metadata: Optional[Dict] = None) -> Dict:
+        with self._lock:
+            batch_id = f"batch_{len(self.batches)}"
+            batch = {
+                "id": batch_id,
+                "kind": kind,
+                "requests": requests,
+                "metadata": metadata or {},
+                "created": time.time(),
+                "polls": 0,
+            }
+            self.batches[batch_id] = batch
+            return batch
+
+    def _poll(self, batch: Dict) -> bool:
+        with self._lock:
+            batch["polls"] += 1
+            return batch["polls"] >= self.polls_until_done
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path == "/files":
+                    message = BytesParser().parsebytes(
+                        f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+                    )
+                    content = next(
+                        part.get_payload(decode=True).decode("utf-8")
+                        for part in message.get_payload()
+                        if part.get_filename()
+                    )
+                    with server._lock:
+                        file_id = f"file_{len(server.files)}"
+                        server.files[file_id] = content
+                    return self._json({"id": file_id})
+                payload = json.loads(body)
+                if self.path == "/batches":
+                    lines = [json.loads(line) for line in server.files[payload["input_file_id"]].splitlines()]
+                    batch = server._create_batch("openai", lines, payload.get("metadata"))
+                    return self._json(self._openai(batch))
+                if self.path == "/messages/batches":
+                    batch = server._create_batch("anthropic", payload["requests"])
+                    return self._json(self._anthropic(batch))
+                self.send_error(404)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                parts = path.strip("/").split("/")
+                if path == "/batches":
+                    batches = [b for b in server.batches.values() if b["kind"] == "openai"]
+                    return self._json({
+                        "data": [self._openai(b) for b in reversed(batches)],
+                        "has_more": False,
+                    })
+                if path == "/messages/batches":
+                    batches = [b for b in server.batches.values() if b["kind"] == "anthropic"]
+                    return self._json({"data": [self._anthropic(b) for b in reversed(batches)]})
+                if parts[0] == "batches" and len(parts) == 2:
+                    batch = server.batches[parts[1]]
+                    server._poll(batch)
+                    return self._json(self._openai(batch))
+                if parts[0] == "files" and parts[-1] == "content":
+                    return self._text(server.files[parts[1]])
+                if parts[:2] == ["messages", "batches"] and len(parts) == 3:
+                    batch = server.batches[parts[2]]
+                    server._poll(batch)
+                    return self._json(self._anthropic(batch))
+                if parts[:2] == ["messages", "batches"] and parts[-1] == "results":
+                    return self._text(self._anthropic_results(server.batches[parts[2]]))
+                self.send_error(404)
+
+            def _openai(self, batch):
+                done = batch["polls"] >= server.polls_until_done
+                output_file_id = None
+                if done:
+                    output_file_id = f"out_{batch['id']}"
+                    if output_file_id not in server.files:
+                        server.files[output_file_id] = self._openai_results(batch)
+                return {
+                    "id": batch["id"],
+                    "status": "completed" if done else "in_progress",
+                    "metadata": batch["metadata"],
+                    "created_at": int(batch["created"]),
+                    "output_file_id": output_file_id,
+                }
+
+            def _openai_results(self, batch):
+                lines = []
+                for request in batch["requests"]:
+                    body = request["body"]
+                    tool_name = body["tools"][0]["function"]["name"]
+                    args = server.respond(request["custom_id"], tool_name, body["messages"][0]["content"])
+                    message = {"tool_calls": [{"function": {"name": tool_name, "arguments": json.dumps(args)}}]}
+                    response = {"body": {"choices": [{"message": message}]}} if args is not None else None
+                    lines.append(json.dumps({"custom_id": request["custom_id"], "response": response}))
+                return "\n".join(lines)
+
+            def _anthropic(self, batch):
+                done = batch["polls"] >= server.polls_until_done
+                created = datetime.fromtimestamp(batch["created"], timezone.utc).isoformat()
+                return {
+                    "id": batch["id"],
+                    "processing_status": "ended" if done else "in_progress",
+                    "created_at": created.replace("+00:00", "Z"),
+                    "request_counts": {
+                        "processing": 0 if done else len(batch["requests"]),
+                        "succeeded": len(batch["requests"]) if done else 0,
+                        "errored": 0,
+                        "canceled": 0,
+                        "expired": 0,
+                    },
+                }
+
+            def _anthropic_results(self, batch):
+                lines = []
+                for request in batch["requests"]:
+                    params = request["params"]
+                    tool_name = params["tools"][0]["name"]
+                    args = server.respond(request["custom_id"], tool_name, params["messages"][0]["content"])
+                    if args is None:
+                        result = {"type": "errored"}
+                    else:
+                        content = [{"type": "tool_use", "name": tool_name, "input": args}]
+                        result = {"type": "succeeded", "message": {"content": content}}
+                    lines.append(json.dumps({"custom_id": request["custom_id"], "result": result}))
+                return "\n".join(lines)
+
+            def _json(self, payload):
+                self._text(json.dumps(payload), "application/json")
+
+            def _text(self, text, content_type="application/jsonl"):
+                data = text.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
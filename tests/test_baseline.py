@@ -0,0 +1,55 @@
+import json
+import math
+import statistics
+
+import pytest
+
+from aim.baseline import BaselineTracker, RunningStats
+
+
+def write_scores(reference_dir, scores):
+    (reference_dir / "ref.json").write_text(json.dumps({"semantic_similarity": {"a": {"scores": scores}}}))
+
+
+def test_running_stats_match_the_sample_mean_and_std():
+    values = [0.91, 0.87, 0.95, 0.9, 0.88]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.std == pytest.approx(statistics.stdev(values))
+    assert stats.ci_half_width(0.95) == pytest.approx(1.959964 * statistics.stdev(values) / math.sqrt(5))
+    assert RunningStats().ci_half_width(0.95) == math.inf
+
+
+def test_tracker_converges_once_new_scores_settle(tmp_path):
+    # Scores stored before the tracker started don't count as new runs.
+    write_scores(tmp_path, [0.5])
+    tracker = BaselineTracker(tmp_path, tolerance=0.01, min_runs=3)
+    scores = [0.5]
+
+    for score in (0.9, 0.9):
+        scores.append(score)
+        write_scores(tmp_path, scores)
+        tracker.update()
+        assert not tracker.converged()
+    assert tracker.unconverged() == [("ref", "a")]
+
+    scores.append(0.9)
+    write_scores(tmp_path, scores)
+    tracker.update()
+
+    assert tracker.stats[("ref", "a")].count == 3
+    assert tracker.converged()
+
+
+def test_tracker_waits_while_scores_spread(tmp_path):
+    tracker = BaselineTracker(tmp_path, tolerance=0.01, min_runs=2)
+    scores = []
+    for score in (0.6, 0.9, 0.7, 0.95):
+        scores.append(score)
+        write_scores(tmp_path, scores)
+        tracker.update()
+
+    assert not tracker.converged()
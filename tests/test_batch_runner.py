@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from aim.batch_runner import BatchRunner
+from aim.history import HistoryStore
+from aim.models.llm import batch_clients
+from aim.models.llm.llm_service import LLMService
+from aim.state import ExecutionContext
+from stub_batch_server import StubBatchServer
+
+
+def respond(custom_id, tool_name, prompt):
+    if tool_name == "criteria_evaluation":
+        return {"result": custom_id.endswith("-0")}
+    if tool_name == "claim_extraction":
+        return {"claims": ["Paris is in France.", "Paris is on the Moon."]}
+    return {"claim_results": [
+        {"claim": "Paris is in France.", "validity": True},
+        {"claim": "Paris is on the Moon.", "validity": False},
+    ]}
+
+
+@pytest.fixture(params=["gpt-4o", "claude-sonnet-4-20250514"])
+def model(request, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    monkeypatch.setenv("AIM_BATCH_POLL_INTERVAL", "0")
+    return request.param
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with StubBatchServer(respond) as server:
+        monkeypatch.setenv("AIM_BATCH_BASE_URL", server.url)
+        yield server
+
+
+def make_runner(tmp_path, model):
+    runner = BatchRunner(
+        tmp_path / "batch.json", LLMService("test", model), report_file=str(tmp_path / "report.json"),
+        context=ExecutionContext(data_dir=str(tmp_path / "aim_data"), run_id="run-1"),
+    )
+    runner.add_criteria("Some content", ["first", "second"], "ref")
+    runner.add_claims("Paris is in France.", ["chunk one", "chunk two"], "ref")
+    return runner
+
+
+def report(tmp_path):
+    with (tmp_path / "report.json").open() as f:
+        return json.load(f)
+
+
+def test_run_scores_criteria_and_claims(tmp_path, model, server):
+    runner = make_runner(tmp_path, model)
+    runner.run()
+
+    assert runner.done
+    assert report(tmp_path)["criteria_check"] == {"count": 1, "avg": 50.0}
+    assert report(tmp_path)["claim_check"] == {"count": 1, "avg": 50.0}
+    assert len(server.batches) == 2
+
+    rows = HistoryStore.open(tmp_path / "aim_data" / "history.sqlite").connection.execute(
+        "SELECT run_id, reference_id, metric, assertion, score FROM results ORDER BY metric, assertion"
+    ).fetchall()
+    assert [tuple(row) for row in rows] == [
+        ("run-1", "ref", "claim_check", "", 50.0),
+        ("run-1", "ref", "criteria_check", "", 50.0),
+        ("run-1", "ref", "criterion", "first", 100.0),
+        ("run-1", "ref", "criterion", "second", 0.0),
+    ]
+
+
+def test_resume_after_crash_does_not_resubmit(tmp_path, model, server, monkeypatch):
+    client_cls = type(batch_clients.batch_client_for(LLMService("test", model).model, "test"))
+    submit = client_cls.submit
+
+    def submit_then_crash(self, requests, key):
+        submit(self, requests, key)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(client_cls, "submit", submit_then_crash)
+    with pytest.raises(KeyboardInterrupt):
+        make_runner(tmp_path, model).run()
+    assert len(server.batches) == 1
+
+    monkeypatch.setattr(client_cls, "submit", submit)
+    runner = BatchRunner.resume(tmp_path / "batch.json")
+    runner.run()
+
+    assert runner.done
+    assert len(server.batches) == 2
+    assert report(tmp_path)["criteria_check"]["avg"] == 50.0
+
+
+def test_requests_are_split_to_provider_limits(tmp_path, model, server, monkeypatch):
+    monkeypatch.setattr(batch_clients.OpenAIBatchClient, "max_requests", 2)
+    monkeypatch.setattr(batch_clients.AnthropicBatchClient, "max_requests", 2)
+    runner = make_runner(tmp_path, model)
+    runner.run()
+
+    assert all(len(batch["requests"]) <= 2 for batch in server.batches.values())
+    # 3 extract requests -> 2 batches; 2 verify requests -> 1 batch.
+    assert len(server.batches) == 3
+    assert report(tmp_path)["criteria_check"]["avg"] == 50.0
+    assert report(tmp_path)["claim_check"]["avg"] == 50.0
+
+
+def test_resume_rejects_a_look_alike_batch_from_another_process(tmp_path, server, monkeypatch, capsys):
+    model = "claude-sonnet-4-20250514"
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    monkeypatch.setenv("AIM_BATCH_POLL_INTERVAL", "0")
+    submit = batch_clients.AnthropicBatchClient.submit
+
+    def crash_before_sending(self, requests, key):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(batch_clients.AnthropicBatchClient, "submit", crash_before_sending)
+    with pytest.raises(KeyboardInterrupt):
+        make_runner(tmp_path, model).run()
+    monkeypatch.setattr(batch_clients.AnthropicBatchClient, "submit", submit)
+
+    # Another process submits a batch of the same size right afterwards.
+    other = tmp_path / "other"
+    other.mkdir()
+    make_runner(other, model).run()
+    foreign = set(server.batches)
+
+    runner = BatchRunner.resume(tmp_path / "batch.json")
+    runner.run()
+
+    assert runner.done
+    assert "holds other requests" in capsys.readouterr().out
+    assert runner.journal["batches"]["extract"][0]["batch_id"] not in foreign
+    assert report(tmp_path)["criteria_check"] == {"count": 1, "avg": 50.0}
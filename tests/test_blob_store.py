@@ -0,0 +1,54 @@
+import json
+import os
+import time
+
+from aim.blob_store import BlobStore, append_jsonl, read_failures
+
+
+def age(store, digest, seconds):
+    path = store._path(digest)
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_pack_stores_long_strings_once_and_unpack_restores_them(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    long_text = "x" * 1000
+    entry = {"candidate": long_text, "criteria": [long_text, "short"]}
+
+    packed = store.pack(entry)
+    append_jsonl(tmp_path / "failures.jsonl", packed)
+
+    assert packed["criteria"][1] == "short"
+    assert packed["candidate"] == packed["criteria"][0]
+    assert len(list(store.root.glob("*/*.z"))) == 1
+    assert list(read_failures(tmp_path / "failures.jsonl", store)) == [entry]
+
+
+def test_gc_keeps_referenced_and_young_blobs(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    live, dead, young = (store.put(text * 300) for text in "abc")
+    for digest in (live, dead):
+        age(store, digest, 7200)
+    (tmp_path / "report").mkdir()
+    (tmp_path / "report" / "failures.jsonl").write_text(json.dumps({"candidate": {"$blob": live}}) + "\n")
+
+    assert store.gc([tmp_path / "report"], dry_run=True)["removed"] == 1
+    assert store._path(dead).exists()
+
+    stats = store.gc([tmp_path / "report"])
+
+    assert (stats["referenced"], stats["kept"], stats["removed"]) == (1, 2, 1)
+    assert store.get(live) == "a" * 300
+    assert store.get(young) == "c" * 300
+    assert not store._path(dead).exists()
+
+
+def test_putting_an_existing_blob_makes_it_young_again(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    digest = store.put("a" * 300)
+    age(store, digest, 7200)
+
+    store.put("a" * 300)
+
+    assert store.gc([])["removed"] == 0
@@ -0,0 +1,85 @@
+from aim.cache import SqliteCache
+from aim.claim_checking.claim_checker import ClaimChecker
+from aim.claim_checking.claim_normalization import dedupe_claims, normalize_claim
+from aim.models.llm.llm_models import LLMModel
+
+
+class StandInLLM:
+    """Supports a claim if its first word appears in the chunk."""
+
+    model = LLMModel.GPT_4_O
+    max_votes = 1
+
+    def __init__(self, skip=()):
+        self.requests = []
+        self.skip = set(skip)
+
+    def verify_claims(self, claims, chunk, max_votes=None):
+        self.requests.append((chunk, [claim["claim"] for claim in claims]))
+        return [
+            {"claim": claim["claim"], "validity": claim["claim"].split()[0].lower() in chunk}
+            for claim in claims
+            if claim["claim"] not in self.skip
+        ]
+
+
+class StandInChecker(ClaimChecker):
+    def __init__(self, llm_service):
+        self.llm_service = llm_service
+
+    def fetch_reference(self, content, **kwargs):
+        return content
+
+    def chunk_content(self, content):
+        return content
+
+
+def results(checked):
+    return {claim["claim"]: claim["validity"] for claim in checked}
+
+
+def test_claims_differing_only_in_formatting_are_deduplicated():
+    claims = ["The sky is blue.", "the  sky is BLUE", "Grass is green", "The sky is blue;"]
+
+    unique, owners = dedupe_claims(claims)
+
+    assert unique == ["The sky is blue.", "Grass is green"]
+    assert owners == [0, 0, 1, 0]
+    assert normalize_claim("It’s  “true”.") == normalize_claim("it's \"true\"")
+
+
+def test_verdict_cache_only_sends_new_chunks_to_the_llm(tmp_path):
+    cache = SqliteCache.open(tmp_path / "verdicts.sqlite")
+    claims = ["Sky is blue", "Grass is red"]
+
+    first = StandInLLM()
+    checked = StandInChecker(first).check_claims(claims, ["sky facts", "more facts"], verdict_cache=cache)
+    assert results(checked) == {"Sky is blue": True, "Grass is red": False}
+    assert first.requests == [
+        ("sky facts", ["Sky is blue", "Grass is red"]),
+        ("more facts", ["Grass is red"]),
+    ]
+
+    # The first chunk is unchanged and answered from the cache; only the
+    # edited second chunk reaches the model.
+    second = StandInLLM()
+    checked = StandInChecker(second).check_claims(claims, ["sky facts", "grass facts"], verdict_cache=cache)
+    assert results(checked) == {"Sky is blue": True, "Grass is red": True}
+    assert second.requests == [("grass facts", ["Grass is red"])]
+
+
+def test_claims_the_model_leaves_out_are_asked_again_and_not_cached(tmp_path):
+    cache = SqliteCache.open(tmp_path / "verdicts.sqlite")
+    llm = StandInLLM(skip={"Grass is green"})
+
+    checked = StandInChecker(llm).check_claims(["Sky is blue", "Grass is green"], ["sky and grass"], verdict_cache=cache)
+
+    assert results(checked) == {"Sky is blue": True, "Grass is green": False}
+    assert llm.requests == [
+        ("sky and grass", ["Sky is blue", "Grass is green"]),
+        ("sky and grass", ["Grass is green"]),
+    ]
+
+    retry = StandInLLM()
+    StandInChecker(retry).check_claims(["Sky is blue", "Grass is green"], ["sky and grass"], verdict_cache=cache)
+    assert retry.requests == [("sky and grass", ["Grass is green"])]
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from aim import cli_entrypoint
+from aim.models import rate_limiter
+
+
+def test_rate_limit_is_split_across_xdist_workers(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_shared", None)
+    monkeypatch.setenv("AIM_RATE_LIMIT_RPM", "120")
+    monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT", "4")
+
+    assert rate_limiter.shared_rate_limiter().interval == 2.0
+
+
+def test_parallel_baseline_splits_the_rate_limit_across_runs(monkeypatch, tmp_path):
+    seen = tmp_path / "rpm"
+    command = f"{sys.executable} -c \"import os; open(r'{seen}', 'a').write(os.environ['AIM_RATE_LIMIT_RPM'] + ' ')\""
+    monkeypatch.setattr(cli_entrypoint, "merge_reference_shards", lambda *args, **kwargs: [])
+    monkeypatch.setattr(cli_entrypoint, "merge_shard_outputs", lambda *args, **kwargs: [])
+
+    cli_entrypoint._run_parallel_baseline({"run": command}, {**os.environ, "AIM_RATE_LIMIT_RPM": "60"}, 2, 2)
+
+    assert seen.read_text().split() == ["30.0", "30.0"]
+
+
+def test_interrupted_parallel_baseline_terminates_its_runs(monkeypatch):
+    started = []
+    popen = subprocess.Popen
+
+    def record_popen(*args, **kwargs):
+        started.append(popen(*args, **kwargs))
+        return started[-1]
+
+    def interrupt(_seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(cli_entrypoint.subprocess, "Popen", record_popen)
+    monkeypatch.setattr(cli_entrypoint, "time", SimpleNamespace(sleep=interrupt))
+
+    with pytest.raises(KeyboardInterrupt):
+        cli_entrypoint._run_parallel_baseline({"run": "sleep 30; sleep 30"}, dict(os.environ), 2, 2)
+
+    assert len(started) == 2
+    assert all(process.poll() is not None for process in started)
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+import threading
+
+import pytest
+
+from aim.daemon import DaemonClient, EvaluationDaemon, RemoteEmbeddingService, RemoteLLMService, connect
+from aim.models.llm.hedging import HedgingStats
+from aim.models.llm.prompt_cache import PromptCacheStats
+from aim.models.llm.self_consistency import AgreementStats
+
+
+class StandInLLM:
+    def __init__(self):
+        self.prompt_cache_stats = PromptCacheStats()
+        self.agreement_stats = AgreementStats()
+        self.hedging_stats = HedgingStats()
+
+    def evaluate_criterion(self, criterion, content, max_votes=None):
+        self.hedging_stats.record(0.1, hedged=True)
+        self.prompt_cache_stats.record({"input_tokens": 100, "input_token_details": {"cache_read": 80}})
+        return max_votes == 3
+
+    def extract_claims(self, content):
+        raise ValueError("no claims here")
+
+
+class StandInEmbeddings:
+    embed_model_name = "text-embedding-3-small"
+
+    def __init__(self):
+        self.sent = []
+
+    def embed_batch(self, contents):
+        self.sent.append(list(contents))
+        return [[float(len(content))] for content in contents]
+
+
+@pytest.fixture
+def daemon():
+    """A daemon serving stand-in services on a private socket."""
+    daemon = EvaluationDaemon()
+    services = {"llm": StandInLLM(), "embed": StandInEmbeddings()}
+    daemon._service = lambda spec: services[spec["kind"]]
+    daemon.services = services
+
+    loop = asyncio.new_event_loop()
+    # Unix socket paths are limited to about 100 characters.
+    with tempfile.TemporaryDirectory(prefix="aim-") as directory:
+        daemon.socket_path = os.path.join(directory, "daemon.sock")
+        server = loop.run_until_complete(asyncio.start_unix_server(daemon._handle, path=daemon.socket_path))
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            yield daemon
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            loop.close()
+
+
+def test_remote_llm_service_records_the_stats_of_its_calls(daemon):
+    remote = RemoteLLMService("key", "gpt-4o", DaemonClient(daemon.socket_path))
+
+    assert remote.evaluate_criterion("criterion", "content", max_votes=3) is True
+
+    hedging = remote.hedging_stats.drain()
+    assert (hedging["requests"], hedging["hedged"]) == (1, 1)
+    assert remote.prompt_cache_stats.drain()["cache_read_tokens"] == 80
+    # The daemon's shared service keeps nothing between calls.
+    assert daemon.services["llm"].hedging_stats.drain()["requests"] == 0
+
+
+def test_daemon_errors_are_raised_in_the_client(daemon):
+    remote = RemoteLLMService("key", "gpt-4o", DaemonClient(daemon.socket_path))
+
+    with pytest.raises(RuntimeError, match="ValueError: no claims here"):
+        remote.extract_claims("content")
+
+
+def test_daemon_embeds_only_texts_it_has_not_seen(daemon):
+    remote = RemoteEmbeddingService("key", "text-embedding-3-small", DaemonClient(daemon.socket_path))
+
+    assert remote.embed_batch(["a", "bb"]) == [[1.0], [2.0]]
+    assert remote.embed_batch(["bb", "ccc"]) == [[2.0], [3.0]]
+    assert daemon.services["embed"].sent == [["a", "bb"], ["ccc"]]
+
+
+def test_connect_requires_opt_in_and_a_listening_socket(daemon, monkeypatch):
+    monkeypatch.setenv("AIM_DAEMON_SOCKET", daemon.socket_path)
+    monkeypatch.delenv("AIM_DAEMON", raising=False)
+    assert connect() is None
+
+    monkeypatch.setenv("AIM_DAEMON", "1")
+    assert connect().socket_path == daemon.socket_path
+
+    monkeypatch.setenv("AIM_DAEMON_SOCKET", daemon.socket_path + ".missing")
+    assert connect() is None
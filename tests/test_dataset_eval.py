@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from aim.dataset_eval import DatasetEvaluator
+from aim.metrics import Metrics
+from aim.models.llm.hedging import HedgingStats
+from aim.models.llm.llm_models import LLMModel
+from aim.models.llm.prompt_cache import PromptCacheStats
+from aim.models.llm.self_consistency import AgreementStats
+from aim.state import ExecutionContext
+
+
+class StandInLLM:
+    model = LLMModel.GPT_4_O
+    max_votes = 1
+
+    def __init__(self):
+        self.prompt_cache_stats = PromptCacheStats()
+        self.agreement_stats = AgreementStats()
+        self.hedging_stats = HedgingStats()
+
+    def evaluate_criterion(self, criterion, content, max_votes=None):
+        return "good" in content
+
+
+@pytest.fixture
+def metrics(tmp_path, monkeypatch):
+    monkeypatch.setenv("AIM_HISTORY", "0")
+    context = ExecutionContext(data_dir=str(tmp_path / "aim_data"))
+    return Metrics("eval", None, None, None, None, llm_service=StandInLLM(), context=context)
+
+
+def write_dataset(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def read_results(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_malformed_line_records_error_and_run_continues(tmp_path, metrics):
+    dataset = tmp_path / "dataset.jsonl"
+    write_dataset(dataset, [
+        json.dumps({"id": 1, "content": "good", "criteria": ["c"]}),
+        "{not json",
+        json.dumps({"id": 3, "content": "bad", "criteria": ["c"]}),
+    ])
+    checkpoint = DatasetEvaluator(metrics, dataset, tmp_path / "out.jsonl", concurrency=2).run()
+
+    results = read_results(tmp_path / "out.jsonl")
+    assert [result["id"] for result in results] == [1, None, 3]
+    assert "error" in results[1]
+    assert checkpoint["errors"] == 1
+    assert checkpoint["stats"]["criteria_check"]["count"] == 2
+
+
+def test_resume_discards_results_after_checkpoint(tmp_path, metrics):
+    dataset = tmp_path / "dataset.jsonl"
+    write_dataset(dataset, [json.dumps({"id": i, "content": "good", "criteria": ["c"]}) for i in range(10)])
+    output = tmp_path / "out.jsonl"
+
+    evaluator = DatasetEvaluator(metrics, dataset, output, concurrency=1, checkpoint_every=4, checkpoint_interval=60)
+    commit = evaluator._commit
+    commits = []
+
+    def crash_on_third_commit(sink, checkpoint):
+        commits.append(checkpoint["items_done"])
+        if len(commits) == 3:
+            raise KeyboardInterrupt
+        commit(sink, checkpoint)
+
+    evaluator._commit = crash_on_third_commit
+    with pytest.raises(KeyboardInterrupt):
+        evaluator.run()
+    assert len(read_results(output)) > 4
+
+    checkpoint = DatasetEvaluator(metrics, dataset, output, concurrency=1).run()
+    assert [result["id"] for result in read_results(output)] == list(range(10))
+    assert checkpoint["items_done"] == 10
+
+
+def test_output_shorter_than_checkpoint_is_rejected(tmp_path, metrics):
+    dataset = tmp_path / "dataset.jsonl"
+    write_dataset(dataset, [json.dumps({"id": i, "content": "good"}) for i in range(3)])
+    output = tmp_path / "out.jsonl"
+    evaluator = DatasetEvaluator(metrics, dataset, output)
+    checkpoint = evaluator._load_checkpoint()
+    checkpoint["output_offset"] = 100
+    evaluator._save_checkpoint(checkpoint)
+
+    with pytest.raises(ValueError, match="corrupt"):
+        DatasetEvaluator(metrics, dataset, output).run()
+
+
+def test_fresh_run_appends_to_existing_output(tmp_path, metrics):
+    dataset = tmp_path / "dataset.jsonl"
+    write_dataset(dataset, [json.dumps({"id": i, "content": "good", "criteria": ["c"]}) for i in range(2)])
+    output = tmp_path / "out.jsonl"
+    write_dataset(output, [json.dumps({"id": f"earlier-{i}"}) for i in range(3)])
+
+    DatasetEvaluator(metrics, dataset, output).run()
+
+    assert [result["id"] for result in read_results(output)] == ["earlier-0", "earlier-1", "earlier-2", 0, 1]
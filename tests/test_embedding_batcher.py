@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from aim.models.embeddings.embedding_batcher import EmbeddingBatcher
+
+
+class StandInProvider:
+    """Embeds each text as ``[len(text)]``, blocking until ``release`` is set."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        with self._lock:
+            self.requests.append(list(texts))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.release.wait(2)
+        with self._lock:
+            self.in_flight -= 1
+        return [[float(len(text))] for text in texts]
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_a_lone_request_is_sent_without_waiting():
+    provider = StandInProvider()
+    batcher = EmbeddingBatcher(provider.embed, max_wait_ms=0)
+
+    start = time.monotonic()
+    assert batcher.submit("abc").result(1) == [3.0]
+    assert time.monotonic() - start < 0.05
+
+
+def test_requests_made_while_senders_are_busy_share_one_batch():
+    provider = StandInProvider()
+    provider.release.clear()
+    batcher = EmbeddingBatcher(provider.embed, max_in_flight=2)
+
+    busy = []
+    for text in ("a", "bb"):
+        busy.append(batcher.submit(text))
+        wait_for(lambda: provider.in_flight == len(busy))
+    waiting = [batcher.submit(text) for text in ("ccc", "dddd", "eeeee")]
+    provider.release.set()
+
+    assert [future.result(1) for future in busy + waiting] == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert provider.max_in_flight == 2
+    assert provider.requests == [["a"], ["bb"], ["ccc", "dddd", "eeeee"]]
+
+
+def test_a_short_answer_fails_the_whole_batch():
+    batcher = EmbeddingBatcher(lambda texts: [[0.0]], max_in_flight=1)
+    batcher._senders.acquire()
+    futures = [batcher.submit("a"), batcher.submit("b")]
+    time.sleep(0.05)
+    batcher._senders.release()
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="1 vectors for 2 texts"):
+            future.result(1)
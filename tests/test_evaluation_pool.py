@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from aim.evaluation_pool import EvaluationPool
+
+
+def test_submit_blocks_until_a_slot_frees():
+    release = threading.Event()
+    with EvaluationPool(max_workers=1, max_pending=1) as pool:
+        first = pool.submit(release.wait)
+        threading.Timer(0.1, release.set).start()
+        start = time.monotonic()
+        second = pool.submit(lambda: "second")
+
+        assert time.monotonic() - start >= 0.09
+        assert first.result(1) is True
+        assert second.result(1) == "second"
+
+
+def test_full_pool_refuses_to_block_a_worker_or_event_loop():
+    release = threading.Event()
+    with EvaluationPool(max_workers=1, max_pending=1) as pool:
+        pool.submit(release.wait)
+
+        async def submit_in_loop():
+            pool.submit(lambda: None)
+
+        with pytest.raises(RuntimeError, match="asubmit"):
+            asyncio.run(submit_in_loop())
+        release.set()
+
+    with EvaluationPool(max_workers=1, max_pending=1) as pool:
+        nested = pool.submit(lambda: pool.submit(lambda: None))
+        with pytest.raises(RuntimeError, match="deadlock"):
+            nested.result(1)
+
+
+def test_asubmit_waits_for_a_slot_without_blocking_the_loop():
+    release = threading.Event()
+
+    async def main():
+        with EvaluationPool(max_workers=1, max_pending=1) as pool:
+            first = await pool.asubmit(release.wait)
+            waiting = asyncio.ensure_future(pool.asubmit(lambda: "second"))
+            await asyncio.sleep(0.05)
+            assert not waiting.done()
+
+            release.set()
+            second = await asyncio.wait_for(waiting, 1)
+            return await first, await second
+
+    assert asyncio.run(main()) == (True, "second")
+
+
+def test_cancelled_asubmit_does_not_leak_a_slot():
+    release = threading.Event()
+
+    async def main():
+        with EvaluationPool(max_workers=1, max_pending=1) as pool:
+            first = await pool.asubmit(release.wait)
+            waiting = asyncio.ensure_future(pool.asubmit(lambda: "never"))
+            await asyncio.sleep(0.05)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+
+            release.set()
+            await first
+            # The single slot is free again.
+            return await asyncio.wait_for(await pool.asubmit(lambda: "after"), 1)
+
+    assert asyncio.run(main()) == "after"
@@ -0,0 +1,33 @@
+import pytest
+
+from aim.files import SharedPerPath, load_json, save_json, write_atomic
+
+
+def test_a_failed_write_keeps_the_old_file_and_no_temporary(tmp_path):
+    path = tmp_path / "data.json"
+    save_json(path, {"a": 1})
+
+    def fail(f):
+        f.write(b"{")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        write_atomic(path, fail)
+
+    assert load_json(path, None) == {"a": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+def test_open_shares_one_instance_per_path_and_class(tmp_path):
+    class Store(SharedPerPath):
+        def __init__(self, path):
+            self.path = path
+
+    class OtherStore(Store):
+        pass
+
+    store = Store.open(tmp_path / "a")
+
+    assert Store.open(str(tmp_path / "sub" / ".." / "a")) is store
+    assert Store.open(tmp_path / "b") is not store
+    assert OtherStore.open(tmp_path / "a") is not store
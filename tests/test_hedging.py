@@ -0,0 +1,140 @@
+import asyncio
+import contextvars
+import time
+
+import pytest
+
+from aim.models.llm.hedging import HedgeBudget, Hedger, HedgingStats, LatencyTracker
+
+FAST = 0.01
+SLOW = 0.5
+
+request_tag = contextvars.ContextVar("request_tag", default=None)
+
+
+def warm_tracker(latency=FAST, samples=20):
+    """A tracker whose p95 deadline is ``latency``."""
+    tracker = LatencyTracker(min_samples=samples)
+    for _ in range(samples):
+        tracker.record(latency)
+    return tracker
+
+
+def hedger(tracker=None, budget_rate=1.0, failover=False):
+    budget = HedgeBudget(budget_rate)
+    return Hedger(95, tracker or warm_tracker(), budget, HedgingStats(), failover=failover)
+
+
+def stand_in(answer, delay=0.0, error=None):
+    """A provider call that answers (or fails) after ``delay`` seconds."""
+    def call():
+        time.sleep(delay)
+        if error:
+            raise error
+        return answer
+    return call
+
+
+def test_no_hedge_before_tracker_has_enough_samples():
+    h = hedger(tracker=LatencyTracker(min_samples=20))
+    hedges = []
+
+    assert h.call(stand_in("primary", FAST), lambda: hedges.append(1)) == "primary"
+    assert hedges == []
+    assert h.stats.drain()["hedged"] == 0
+
+
+def test_slow_primary_is_hedged_and_hedge_wins():
+    h = hedger()
+    start = time.monotonic()
+
+    assert h.call(stand_in("primary", SLOW), stand_in("hedge", FAST)) == "hedge"
+    assert time.monotonic() - start < SLOW / 2
+
+    stats = h.stats.drain()
+    assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_budget_denial_waits_for_primary():
+    h = hedger(budget_rate=0.0)
+    hedges = []
+
+    assert h.call(stand_in("primary", 0.1), lambda: hedges.append(1)) == "primary"
+    assert hedges == []
+    assert h.stats.drain()["budget_denied"] == 1
+
+
+def test_failover_retries_a_failed_primary():
+    h = hedger(failover=True)
+    assert h.call(stand_in(None, error=RuntimeError("down")), stand_in("fallback")) == "fallback"
+    assert h.stats.drain()["failovers"] == 1
+
+    with pytest.raises(RuntimeError):
+        hedger().call(stand_in(None, error=RuntimeError("down")), stand_in("fallback"))
+
+
+def test_orphaned_losers_hold_the_budget_until_they_finish():
+    h = Hedger(95, warm_tracker(), HedgeBudget(1.0, burst=1), HedgingStats())
+
+    assert h.call(stand_in("primary", 0.3), stand_in("hedge", FAST)) == "hedge"
+    # The losing primary is still running and billed, so this slow call
+    # isn't hedged.
+    assert h.call(stand_in("primary", 0.05), stand_in("hedge", FAST)) == "primary"
+    stats = h.stats.drain()
+    assert (stats["orphaned"], stats["budget_denied"]) == (1, 1)
+
+    time.sleep(0.35)
+    assert h.call(stand_in("primary", 0.3), stand_in("hedge", FAST)) == "hedge"
+
+
+def test_tracker_records_only_primary_latency():
+    tracker = warm_tracker()
+    h = hedger(tracker=tracker)
+
+    assert h.call(stand_in("primary", 0.3), stand_in("hedge", FAST)) == "hedge"
+    # The fast hedge answer isn't a latency sample; the losing primary's is,
+    # once it answers.
+    assert len(tracker._latencies) == 20
+    deadline = time.monotonic() + 2
+    while len(tracker._latencies) == 20 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert max(tracker._latencies) >= 0.3
+
+
+def test_calls_run_in_the_callers_context():
+    h = hedger()
+    request_tag.set("job-1")
+    seen = []
+
+    def primary():
+        seen.append(("primary", request_tag.get()))
+        time.sleep(0.2)
+        return "primary"
+
+    def hedge():
+        seen.append(("hedge", request_tag.get()))
+        return "hedge"
+
+    h.call(primary, hedge)
+    assert sorted(seen) == [("hedge", "job-1"), ("primary", "job-1")]
+
+
+def test_async_hedge_win_cancels_primary():
+    h = hedger()
+    cancelled = []
+
+    async def primary():
+        try:
+            await asyncio.sleep(SLOW)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "primary"
+
+    async def hedge():
+        await asyncio.sleep(FAST)
+        return "hedge"
+
+    assert asyncio.run(h.acall(primary, hedge)) == "hedge"
+    assert cancelled == [True]
+    assert h.stats.drain()["hedge_wins"] == 1
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from aim.history import HistoryStore
+
+
+@pytest.fixture
+def history(tmp_path):
+    return HistoryStore(tmp_path / "history.sqlite")
+
+
+def record_run(history, run_id, scores, metric="criterion"):
+    """One run scoring each ``{assertion: score}``; scores under 50 fail."""
+    history.record_many(
+        {
+            "run_id": run_id, "metric": metric, "score": score, "passed": score >= 50,
+            "reference_id": "ref", "assertion": assertion, "mode": "report",
+        }
+        for assertion, score in scores.items()
+    )
+
+
+def test_record_many_adds_every_row_and_each_run_once(history):
+    record_run(history, "run-1", {"a": 100.0, "b": 0.0, "c": 50.0})
+
+    connection = history.connection
+    assert connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 1
+    assert connection.execute("SELECT COUNT(*) FROM results WHERE failures = 1").fetchone()[0] == 1
+    assert connection.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 3
+
+
+def test_trend_averages_each_run_oldest_first(history):
+    for i, scores in enumerate([{"a": 100.0, "b": 0.0}, {"a": 80.0, "b": 60.0}, {"a": 90.0, "b": 90.0}]):
+        record_run(history, f"run-{i}", scores)
+
+    trend = history.trend("criterion", last=2)
+
+    assert [(row["run_id"], row["avg"], row["fail_rate"]) for row in trend] == [
+        ("run-1", 70.0, 0.0),
+        ("run-2", 90.0, 0.0),
+    ]
+    assert [row["avg"] for row in history.trend("criterion", assertion="b")] == [0.0, 60.0, 90.0]
+
+
+def test_regressions_compare_the_latest_run_with_the_window_before_it(history):
+    for i, score in enumerate([10.0, 90.0, 90.0, 90.0, 45.0]):
+        record_run(history, f"run-{i}", {"drops": score, "steady": 80.0})
+
+    regressions = history.regressions(window=3, min_drop=0.1)
+
+    # The 10.0 run is outside the window of three, so the baseline is 90.
+    assert [(row["assertion"], row["latest"], row["baseline"]) for row in regressions] == [("drops", 45.0, 90.0)]
+    assert regressions[0]["drop_ratio"] == pytest.approx(0.5)
+    assert history.regressions(window=3, min_drop=0.6) == []
+
+
+def test_worst_ranks_by_fail_rate_then_score(history):
+    record_run(history, "run-0", {"flaky": 0.0, "broken": 0.0, "fine": 100.0, "meh": 60.0})
+    record_run(history, "run-1", {"flaky": 100.0, "broken": 0.0, "fine": 100.0, "meh": 55.0})
+
+    worst = history.worst(limit=3)
+
+    assert [(row["assertion"], row["fail_rate"]) for row in worst] == [
+        ("broken", 1.0),
+        ("flaky", 0.5),
+        ("meh", 0.0),
+    ]
+
+
+def test_reports_are_indexed_once_with_their_counts(history, tmp_path):
+    report = tmp_path / "report_20240101_120000.json"
+    report.write_text(json.dumps({
+        "criteria_check": {"count": 4, "avg": 75.0, "failed": 1},
+        "prompt_cache": {"requests": 3},
+    }))
+
+    assert history.index_reports([report]) == 1
+    assert history.index_reports([report]) == 0
+
+    (row,) = history.trend("criteria_check")
+    assert (row["n"], row["avg"], row["fail_rate"]) == (4, 75.0, 0.25)
@@ -0,0 +1,86 @@
+import hashlib
+import json
+
+import numpy as np
+import pytest
+
+from aim.local_index import LocalVectorIndex
+
+
+class StandInEmbeddings:
+    """Random but repeatable vectors: the same text always gets the same one."""
+
+    embed_model_name = "stand-in"
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_batch(self, texts):
+        return [self._vector(text) for text in texts]
+
+    @staticmethod
+    def _vector(text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).normal(size=16).tolist()
+
+
+@pytest.fixture
+def documents():
+    return {f"doc-{i}": f"document number {i}" for i in range(600)}
+
+
+def test_ivf_search_finds_the_exact_nearest_chunk(tmp_path, documents):
+    index = LocalVectorIndex(tmp_path / "index", StandInEmbeddings())
+    index.add_documents(documents)
+    queries = [documents[f"doc-{i}"] for i in range(0, 600, 37)]
+
+    exact = index.search_many(queries, k=3, exact=True)
+    index.build_ivf(n_lists=16)
+    probed = index.search_many(queries, k=3)
+    full_scan = index.search_many(queries, k=3, nprobe=16)
+
+    # A chunk always sits in the list of its closest centroid, so a query
+    # equal to it finds it however few lists are probed.
+    assert [hits[0]["doc_id"] for hits in probed] == [hits[0]["doc_id"] for hits in exact]
+    # Probing every list is an exact search.
+    assert [[hit["row"] for hit in hits] for hits in full_scan] == [[hit["row"] for hit in hits] for hits in exact]
+
+
+def test_saved_index_reloads_with_its_ivf_lists(tmp_path, documents):
+    path = tmp_path / "index"
+    index = LocalVectorIndex(path, StandInEmbeddings(), ivf_min_chunks=100)
+    index.add_documents(documents)
+    index.save()
+
+    reopened = LocalVectorIndex.open(path, StandInEmbeddings())
+    assert len(reopened.chunks) == len(reopened.vectors) == 600
+    assert reopened._centroids is not None
+    assert reopened.search("document number 7", k=1)[0]["doc_id"] == "doc-7"
+
+
+def test_each_save_writes_a_new_version_and_keeps_the_previous_one(tmp_path):
+    path = tmp_path / "index"
+    index = LocalVectorIndex(path, StandInEmbeddings())
+    versions = []
+    for i in range(3):
+        index.add_documents({f"doc-{i}": f"text {i}"})
+        index.save()
+        versions.append(json.loads((path / "index.json").read_text())["version"])
+
+    assert len(set(versions)) == 3
+    assert sorted(p.name for p in path.glob("v-*")) == sorted(versions[1:])
+
+
+def test_missing_or_inconsistent_index_is_an_error(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LocalVectorIndex.open(tmp_path / "missing", StandInEmbeddings())
+
+    path = tmp_path / "index"
+    index = LocalVectorIndex(path, StandInEmbeddings())
+    index.add_documents({"a": "one", "b": "two"})
+    index.save()
+    version = json.loads((path / "index.json").read_text())["version"]
+    (path / version / "chunks.json").write_text(json.dumps(index.chunks[:1]))
+
+    with pytest.raises(ValueError, match="1 chunks but 2 vectors"):
+        LocalVectorIndex(path, StandInEmbeddings())
@@ -0,0 +1,107 @@
+import json
+
+from aim.merge import (
+    add_service_stats,
+    merge_output_shards,
+    merge_reference_shards,
+    merge_reports,
+    shard_matches,
+)
+from aim.models.llm.hedging import HedgingStats
+from aim.models.llm.prompt_cache import PromptCacheStats
+from aim.models.llm.self_consistency import AgreementStats
+
+
+class StandInLLM:
+    def __init__(self):
+        self.prompt_cache_stats = PromptCacheStats()
+        self.agreement_stats = AgreementStats()
+        self.hedging_stats = HedgingStats()
+
+
+def test_service_stats_are_drained_into_report_sections(tmp_path):
+    report = tmp_path / "report.json"
+    llm = StandInLLM()
+    llm.hedging_stats.record(0.2, hedged=True, hedge_won=True)
+    llm.hedging_stats.record(0.4)
+
+    add_service_stats(report, llm)
+
+    data = json.loads(report.read_text())
+    # Sections with nothing recorded are left out.
+    assert set(data) == {"hedging"}
+    assert data["hedging"]["requests"] == 2
+    assert data["hedging"]["hedge_rate"] == 0.5
+    assert data["hedging"]["latency_max"] == 0.4
+    assert llm.hedging_stats.drain()["requests"] == 0
+
+
+def test_merge_reports_sums_stats_sections_and_scores(tmp_path):
+    paths = []
+    for i, (latency, hits) in enumerate([(0.5, 1), (0.1, 3)]):
+        llm = StandInLLM()
+        llm.hedging_stats.record(latency)
+        for _ in range(hits):
+            llm.prompt_cache_stats.record({"input_tokens": 10, "input_token_details": {"cache_read": 5}})
+        path = tmp_path / f"report{i}.json"
+        path.write_text(json.dumps({"criteria_check": {"count": 1, "avg": 100.0 * i}}))
+        add_service_stats(path, llm)
+        paths.append(path)
+
+    merged = merge_reports(paths)
+
+    assert merged["criteria_check"] == {"count": 2, "avg": 50.0}
+    assert merged["hedging"]["requests"] == 2
+    assert merged["hedging"]["latency_max"] == 0.5
+    assert merged["prompt_cache"]["cache_hits"] == 4
+    assert merged["prompt_cache"]["hit_rate"] == 1.0
+
+
+def write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data))
+
+
+def test_shards_match_their_xdist_sub_shards_only():
+    assert shard_matches("b0", None)
+    assert shard_matches("b0", "b0")
+    assert shard_matches("b0-gw1", "b0")
+    assert not shard_matches("b01", "b0")
+    assert not shard_matches("b1-gw0", "b0")
+
+
+def test_worker_report_shards_fold_into_the_report_and_are_removed(tmp_path):
+    report = tmp_path / "report_20240101_120000.json"
+    write_json(report, {"criteria_check": {"count": 2, "avg": 100.0, "failed": 0}})
+    for worker, avg in (("gw0", 50.0), ("gw1", 0.0)):
+        write_json(tmp_path / "shards" / f"report_20240101_120000.p1-{worker}.json",
+                   {"criteria_check": {"count": 1, "avg": avg, "failed": 1}})
+    other = tmp_path / "shards" / "report_20240101_120000.p2-gw0.json"
+    write_json(other, {"criteria_check": {"count": 1, "avg": 0.0}})
+
+    assert merge_output_shards(report, "report", shard="p1") == report
+
+    assert json.loads(report.read_text()) == {"criteria_check": {"count": 4, "avg": 62.5, "failed": 2}}
+    # Another session's shard is left for that session to merge.
+    assert [path.name for path in (tmp_path / "shards").iterdir()] == [other.name]
+
+
+def test_reference_shards_append_baseline_scores_and_replace_references(tmp_path):
+    write_json(tmp_path / "ref.json", {"semantic_similarity": {
+        "kept": {"reference": "old", "scores": [1.0]},
+        "replaced": {"reference": "old", "scores": [1.0]},
+    }})
+    write_json(tmp_path / "shards" / "ref.s-gw0.json", {"semantic_similarity": {
+        "kept": {"scores": [0.5]},
+        "replaced": {"reference": "new", "scores": []},
+    }})
+    write_json(tmp_path / "shards" / "ref.s-gw1.json", {"semantic_similarity": {"kept": {"scores": [0.75]}}})
+
+    assert merge_reference_shards(tmp_path, shard="s") == [tmp_path / "ref.json"]
+
+    entries = json.loads((tmp_path / "ref.json").read_text())["semantic_similarity"]
+    assert entries["kept"]["scores"] == [1.0, 0.5, 0.75]
+    assert entries["kept"]["mean"] == 0.75
+    assert entries["kept"]["suggested_threshold"] == 0.4
+    assert entries["replaced"] == {"reference": "new", "scores": []}
+    assert not list((tmp_path / "shards").iterdir())
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from aim.models.llm.llm_models import LLMModel
+from aim.models.llm.llm_service import LLMService
+from aim.models.llm.prompt_cache import CACHE_BREAKPOINT, split_prompt
+
+PROMPTS = Path(__file__).parent.parent / "prompts"
+
+
+def test_prompts_put_the_judged_content_before_the_breakpoint():
+    prefix, suffix = split_prompt((PROMPTS / "criteria-checking.txt").read_text())
+
+    assert "{content}" in prefix
+    assert "{criterion}" in suffix
+    assert CACHE_BREAKPOINT not in prefix + suffix
+
+
+def test_a_template_without_breakpoint_has_no_cacheable_prefix():
+    assert split_prompt("  Extract claims from {content}\n") == ("", "Extract claims from {content}")
+
+
+def test_only_anthropic_prefixes_are_marked_for_caching():
+    anthropic = LLMService("test", LLMModel.CLAUDE_SONNET_4)
+    openai = LLMService("test", LLMModel.GPT_4_O)
+
+    assert anthropic._prompt_content("stable", "varies") == [
+        {"type": "text", "text": "stable", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": "varies"},
+    ]
+    assert anthropic._prompt_content("", "varies") == "varies"
+    assert openai._prompt_content("stable", "varies") == "stable\n\nvaries"
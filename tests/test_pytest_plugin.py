@@ -0,0 +1,40 @@
+pytest_plugins = ["pytester"]
+
+
+CHECK_BATCH_RUNNER = """
+import sys
+
+def pytest_unconfigure(config):
+    with open("loaded.txt", "w") as f:
+        f.write(str("aim.batch_runner" in sys.modules))
+"""
+
+
+def test_sessions_without_aim_do_not_load_the_batch_runner(pytester, monkeypatch):
+    monkeypatch.delenv("AIM_BATCH", raising=False)
+    pytester.makeconftest(CHECK_BATCH_RUNNER)
+    pytester.makepyfile("def test_unrelated():\n    assert True\n")
+
+    pytester.runpytest_subprocess().assert_outcomes(passed=1)
+
+    assert (pytester.path / "loaded.txt").read_text() == "False"
+
+
+def test_metrics_factory_shares_instances_for_unhashable_settings(pytester, monkeypatch):
+    monkeypatch.setenv("AIM_LLM_MODEL", "gpt-4o")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.delenv("AIM_DAEMON", raising=False)
+    pytester.makepyfile("""
+        from aim.state import ExecutionContext
+
+        class UnhashableContext(ExecutionContext):
+            __hash__ = None
+
+        def test_factory(aim_metrics, tmp_path):
+            context = UnhashableContext(data_dir=str(tmp_path))
+            first = aim_metrics("ref", context=context, max_votes=3)
+            assert aim_metrics("ref", context=context, max_votes=3) is first
+            assert aim_metrics("ref", context=context, max_votes=5) is not first
+    """)
+
+    pytester.runpytest_subprocess().assert_outcomes(passed=1)
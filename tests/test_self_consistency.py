@@ -0,0 +1,122 @@
+import pytest
+
+from aim.cache import SqliteCache
+from aim.claim_checking.claim_checker import ClaimChecker
+from aim.metrics import Metrics
+from aim.models.llm.llm_models import LLMModel
+from aim.models.llm.self_consistency import AgreementStats, vote
+
+
+def sampler(outputs):
+    """A ``sample(n)`` that hands out ``outputs`` in order and counts calls."""
+    remaining = list(outputs)
+    asked = []
+
+    def sample(n):
+        asked.append(n)
+        batch, remaining[:] = remaining[:n], remaining[n:]
+        return batch
+
+    return sample, asked
+
+
+def as_judgement(output):
+    # None stands for an output that couldn't be parsed.
+    return {} if output is None else {"result": output}
+
+
+def test_unanimous_votes_stop_after_the_first_round():
+    sample, asked = sampler([True, True, False, False, False])
+    stats = AgreementStats()
+
+    tallies = vote(sample, as_judgement, max_votes=5, stats=stats, keys=["result"])
+
+    assert tallies["result"].leader() == (True, 2)
+    assert asked == [2]
+    totals = stats.drain()
+    assert (totals["samples"], totals["early_stops"], totals["unanimous"]) == (2, 1, 1)
+
+
+def test_an_abstention_does_not_make_a_lone_vote_unanimous():
+    sample, asked = sampler([True, None, True, False, False])
+
+    tallies = vote(sample, as_judgement, max_votes=5, keys=["result"])
+
+    # One vote and one abstention isn't agreement; a second True is.
+    assert asked == [2, 1]
+    assert tallies["result"].leader() == (True, 2)
+
+
+def test_majority_of_max_votes_stops_early():
+    sample, asked = sampler([True, False, True, True, False])
+
+    tallies = vote(sample, as_judgement, max_votes=5, keys=["result"])
+
+    assert asked == [2, 1, 1]
+    assert tallies["result"].leader() == (True, 3)
+
+
+def test_a_judgement_every_sample_abstained_on_is_undecided():
+    sample, asked = sampler([None, None, None])
+
+    tallies = vote(sample, as_judgement, max_votes=3, keys=["result"])
+
+    assert asked == [2, 1]
+    assert tallies["result"].leader() == (None, 0)
+
+
+class StandInLLM:
+    model = LLMModel.GPT_4_O
+    max_votes = 1
+
+    def __init__(self):
+        self.calls = []
+
+    def evaluate_criterion(self, criterion, content, max_votes=None):
+        self.calls.append(max_votes)
+        return True
+
+    def verify_claims(self, claims, content, max_votes=None):
+        self.calls.append(max_votes)
+        return [{"claim": claim["claim"], "validity": True} for claim in claims]
+
+
+class StandInChecker(ClaimChecker):
+    def __init__(self, llm_service):
+        self.llm_service = llm_service
+
+    def fetch_reference(self, content, **kwargs):
+        return [content]
+
+    def chunk_content(self, content):
+        return content
+
+
+def test_metrics_passes_max_votes_per_call_without_touching_the_service():
+    llm = StandInLLM()
+    metrics = Metrics("ref", None, None, None, None, llm_service=llm, max_votes=5)
+
+    metrics._criteria_check_handler("content", ["one"])
+
+    assert llm.calls == [5]
+    assert llm.max_votes == 1
+
+
+def test_hedging_settings_are_refused_for_a_passed_in_service():
+    with pytest.raises(ValueError, match="hedge_percentile"):
+        Metrics("ref", None, None, None, None, llm_service=StandInLLM(), hedge_percentile=95)
+
+
+def test_verdict_cache_is_keyed_by_max_votes(tmp_path):
+    llm = StandInLLM()
+    checker = StandInChecker(llm)
+    cache = SqliteCache.open(tmp_path / "verdicts.sqlite")
+    claims = ["Sky is blue."]
+
+    checker.check_claims(claims, ["chunk"], verdict_cache=cache, max_votes=3)
+    checker.check_claims(claims, ["chunk"], verdict_cache=cache, max_votes=3)
+    assert llm.calls == [3]
+
+    # A verdict from a different vote count is judged again.
+    checker.check_claims(claims, ["chunk"], verdict_cache=cache, max_votes=5)
+    assert llm.calls == [3, 5]
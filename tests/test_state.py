@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+from aim.evaluation_pool import EvaluationPool
+from aim.state import ExecutionContext, ExecutionMode, ExecutionModes, current_context, set_mode, use_context
+
+
+def test_use_context_only_affects_the_current_thread(tmp_path):
+    context = ExecutionContext(mode=ExecutionModes.REPORT, data_dir=str(tmp_path))
+    inside, entered, release = [], threading.Event(), threading.Event()
+
+    def other_thread():
+        entered.wait(1)
+        inside.append(current_context())
+        release.set()
+
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    with use_context(context):
+        entered.set()
+        release.wait(1)
+        assert ExecutionMode.mode is ExecutionModes.REPORT
+    thread.join()
+
+    assert inside[0] is not context
+    assert current_context() is not context
+
+
+def test_tasks_and_pool_work_run_under_the_context_that_started_them(tmp_path):
+    contexts = [ExecutionContext(data_dir=str(tmp_path / str(i))) for i in range(2)]
+
+    async def read_context():
+        return current_context()
+
+    async def job(context):
+        with use_context(context):
+            await asyncio.sleep(0.01)
+            in_task = await asyncio.create_task(read_context())
+            return in_task, current_context()
+
+    async def main():
+        return await asyncio.gather(*(job(context) for context in contexts))
+
+    assert asyncio.run(main()) == [(context, context) for context in contexts]
+
+    with EvaluationPool(max_workers=1) as pool:
+        futures = []
+        for context in contexts:
+            with use_context(context):
+                futures.append(pool.submit(current_context))
+        assert [future.result(1) for future in futures] == contexts
+
+
+def test_set_mode_changes_only_the_active_context(tmp_path):
+    context = ExecutionContext(data_dir=str(tmp_path))
+    before = current_context().mode
+
+    with use_context(context):
+        set_mode(ExecutionModes.SET_BASELINE, iteration=2)
+        assert context.report_file.startswith(f"{tmp_path}/report/report_")
+
+    assert context.mode is ExecutionModes.SET_BASELINE
+    assert current_context().mode is before
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+import requests
+
+from aim.claim_checking.web_checker import WebChecker
+
+
+class StandInResponse:
+    headers = {"Content-Type": "text/html"}
+
+    def __init__(self, url):
+        self.text = f"<html><script>skip()</script><p>Page {url}</p></html>"
+
+
+def test_pages_are_fetched_concurrently_without_blocking_the_loop(monkeypatch):
+    def slow_get(url):
+        time.sleep(0.2)
+        return StandInResponse(url)
+
+    monkeypatch.setattr(requests, "get", slow_get)
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    async def main():
+        ticker = asyncio.ensure_future(tick())
+        start = time.monotonic()
+        texts = await WebChecker(llm_service=None).fetch_reference(urls=["a", "b", "c"])
+        ticker.cancel()
+        return texts, time.monotonic() - start
+
+    texts, elapsed = asyncio.run(main())
+
+    assert texts == ["Page a", "Page b", "Page c"]
+    assert elapsed < 0.5
+    # The loop kept running while the pages were fetched.
+    assert len(ticks) >= 5